@@ -1,4 +1,28 @@
 import numpy as np
+import pandas as pd
+
+class LazyData():
+    """ A handle to an object that is only loaded when first accessed through
+    a RecursiveDict or ParticipantData dictionary.
+    Parameters
+    __________
+    loader: function
+        A function returning the data object
+    args, kwargs:
+        Arguments passed to the loader
+    """
+    def __init__(self, loader, *args, **kwargs):
+        self._loader = loader
+        self._args = args
+        self._kwargs = kwargs
+
+    def __call__(self):
+        return self._loader(*self._args, **self._kwargs)
+
+    def __repr__(self):
+        return 'Unloaded data: {}'.format(
+            ', '.join(str(arg) for arg in self._args))
+
 
 class RecursiveDict(dict):
     """ A dictionary that can directly access items from nested dictionaries
@@ -18,9 +42,9 @@ class RecursiveDict(dict):
         if key == '':
             return KeyError('')
         if key_split:
-            return dict.__getitem__(self, key).__getitem__('/'.join(key_split))
+            return self._resolve(key).__getitem__('/'.join(key_split))
         else:
-            return dict.__getitem__(self, key)
+            return self._resolve(key)
 
     def __setitem__(self, key, value):
         key_split = key.split('/')
@@ -32,17 +56,57 @@ class RecursiveDict(dict):
         else:
             dict.__setitem__(self, key, value)
 
+    def update(self, *args, **kwargs):
+        """ As dict.update, without loading LazyData handles
+        """
+        for other in args + (kwargs,):
+            items = dict.items(other) if isinstance(other, dict) else other
+            for key, value in items:
+                dict.__setitem__(self, key, value)
+
+    def _resolve(self, key):
+        """ Returns the value of a key in this dictionary, loading and
+        replacing it first if it is a LazyData handle.
+        """
+        value = dict.__getitem__(self, key)
+        if isinstance(value, LazyData):
+            value = value()
+            dict.__setitem__(self, key, value)
+        return value
+
     def _get_x(self, xattr):
         out = []
-        for x, v in zip(getattr(self, xattr)(), self.values()):
+        for key in list(dict.keys(self)):
+            v = dict.__getitem__(self, key)
             if isinstance(v, RecursiveDict):
                 out.extend(v._get_x(xattr))
-            elif isinstance(v, dict) & hasattr(v, xattr):
+                continue
+            if xattr == 'keys':
+                x = key
+            else:
+                v = self._resolve(key)
+                x = v if xattr == 'values' else (key, v)
+            if isinstance(v, dict) & hasattr(v, xattr):
                 out.extend(getattr(v, xattr)())
             else:
                 out.append(x)
         return out
 
+    def _find(self, name):
+        """ Returns a list of the values of a key at any depth, only loading
+        the matching values.
+        """
+        out = []
+        for key in list(dict.keys(self)):
+            v = dict.__getitem__(self, key)
+            if isinstance(v, RecursiveDict):
+                out.extend(v._find(name))
+            elif isinstance(v, dict) and name in v:
+                out.append(v[name])
+            elif key == name:
+                out.append(self._resolve(key))
+        return out
+
     def _get_items(self):
         return self._get_x('items')
 
@@ -73,12 +137,10 @@ class AttrRecDict(RecursiveDict):
         d['inner/innerkey'] returns 'innerval
     """
     def __getattr__(self, name):
-        if name not in [x for x in self._get_keys()]:
-            raise AttributeError(
-                "No such attribute '{}' in '{}'".format(name, self))
-        kv = self._get_items()
-        val = [x[1] for x in kv if x[0] == name] or None
-        if val is None:
+        if name.startswith('__'):
+            raise AttributeError(name)
+        val = self._find(name)
+        if not val:
             raise AttributeError(
                 "No such attribute '{}' in '{}'".format(name, self))
         elif len(val) > 1:
@@ -2,8 +2,19 @@ import os
 import tables
 from functools import wraps
 
-# Pytables HDF5 default filter
-_FILTER = tables.Filters(complib='blosc:snappy', complevel=1, shuffle=True)
+# Pytables HDF5 default filter. Snappy is not included in current Blosc
+# builds; LZ4 is as fast with a better ratio on RADAR data. Per-modality filters
+# can be chosen with radar.io.compression and stored in a ProjectFile.
+_FILTER = tables.Filters(complib='blosc:lz4', complevel=1, shuffle=True)
+
+# HDF5 chunking: target duration of samples per chunk (s), minimum and
+# maximum chunk size (bytes), and the recording duration (s) used to set
+# expectedrows. The maximum is the chunk size PyTables picks for 1e6 rows;
+# larger chunks make windowed reads slower (benchmarks/hdf5_chunkshape.py).
+_CHUNK_SECONDS = 60
+_MIN_CHUNK_BYTES = 16384
+_MAX_CHUNK_BYTES = 131072
+_EXPECTED_DURATION = 28 * 24 * 3600
 
 # Schemas dir
 _PACKAGE_DIR = '/' + os.path.join('', *__file__.split(os.path.sep)[:-2])
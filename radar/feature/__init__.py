@@ -0,0 +1,3 @@
+from .extract import extract_features, window_view
+from .definitions import FEATURES, register_feature
+from .hrv import hrv_features, HRV_FEATURES
@@ -1 +1,107 @@
 #!/usr/bin/env python3
+import numpy as np
+
+"""
+Window feature definitions.
+Each feature is a function of a batch of windows (radar.feature.extract.
+WindowBatch) returning one value per window and channel, i.e. an array of
+shape (windows, channels). Features are registered by name in FEATURES with
+register_feature, and selected by name in extract_features.
+"""
+
+FEATURES = {}
+
+# Default percentiles and spectral bands (Hz) of the registered features
+PERCENTILES = (5, 25, 50, 75, 95)
+BANDS = {'band_0_1': (0, 1), 'band_1_3': (1, 3), 'band_3_8': (3, 8)}
+
+DEFAULT_FEATURES = ('mean', 'std', 'min', 'max', 'p25', 'p50', 'p75',
+                    'energy', 'zero_crossings')
+
+
+def register_feature(name, func=None):
+    """ Registers a window feature. Can be used as a decorator.
+    Parameters
+    __________
+    name: str
+        The name of the feature
+    func: callable (optional)
+        Function taking a WindowBatch and returning an array of shape
+        (windows, channels)
+    Returns
+    _______
+    func: callable
+    """
+    if func is None:
+        return lambda f: register_feature(name, f)
+    FEATURES[name] = func
+    return func
+
+def percentile(q):
+    """ Returns a feature function computing the q-th percentile, linearly
+    interpolated as numpy.percentile, from the sorted window values.
+    """
+    def feature(w):
+        pos = q / 100 * (w.sorted.shape[-1] - 1)
+        low = int(np.floor(pos))
+        high = min(low + 1, w.sorted.shape[-1] - 1)
+        frac = pos - low
+        return (1 - frac) * w.sorted[..., low] + frac * w.sorted[..., high]
+    return feature
+
+def band_power(low, high):
+    """ Returns a feature function computing the mean spectral power density
+    of the (mean removed) signal between low and high Hz, inclusive of low.
+    """
+    def feature(w):
+        mask = (w.frequencies >= low) & (w.frequencies < high)
+        if not mask.any():
+            return np.full(w.values.shape[:-1], np.nan)
+        return w.power[..., mask].mean(axis=-1)
+    return feature
+
+
+@register_feature('mean')
+def mean(w):
+    return w.mean
+
+@register_feature('std')
+def std(w):
+    return np.sqrt(np.einsum('...i,...i->...', w.centered, w.centered)
+                   / w.values.shape[-1])
+
+@register_feature('min')
+def minimum(w):
+    return w.values.min(axis=-1)
+
+@register_feature('max')
+def maximum(w):
+    return w.values.max(axis=-1)
+
+@register_feature('energy')
+def energy(w):
+    """ Mean of the squared signal """
+    return np.einsum('...i,...i->...', w.values, w.values) \
+        / w.values.shape[-1]
+
+@register_feature('zero_crossings')
+def zero_crossings(w):
+    """ Number of sign changes """
+    signs = np.signbit(w.values)
+    return (signs[..., 1:] != signs[..., :-1]).sum(axis=-1)
+
+@register_feature('mean_crossings')
+def mean_crossings(w):
+    """ Number of times the signal crosses the window mean """
+    signs = w.centered > 0
+    return (signs[..., 1:] != signs[..., :-1]).sum(axis=-1)
+
+@register_feature('dominant_frequency')
+def dominant_frequency(w):
+    """ Frequency (Hz) of the largest non-zero spectral peak """
+    return w.frequencies[1:][w.power[..., 1:].argmax(axis=-1)]
+
+for _q in PERCENTILES:
+    register_feature('p{:02d}'.format(_q), percentile(_q))
+for _name, (_low, _high) in BANDS.items():
+    register_feature(_name, band_power(_low, _high))
@@ -1 +1,272 @@
 #!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+from scipy import fft
+from numpy.lib.stride_tricks import sliding_window_view
+from .definitions import FEATURES, DEFAULT_FEATURES
+from .mappings import MODALITY_COLUMNS, MODALITY_FEATURES
+
+"""
+Windowed feature extraction.
+A signal is divided into windows of a fixed number of samples, taken from a
+strided view of the signal, and each feature is computed for a batch of
+windows at once with numpy reductions over the window axis.
+Windows of timestamped signals start at fixed times, found with searchsorted
+as in radar.feature.hrv, and windows with samples missing (e.g. spanning a
+gap in the recording) are dropped.
+"""
+
+TIME_COLUMN = 'value.time'
+# Maximum number of (window, channel, sample) values in a batch of windows
+MAX_BATCH_VALUES = 2**23
+
+
+class WindowBatch():
+    """ A batch of windows of a multi-channel signal, given to feature
+    functions. Values shared by several features (the mean and the power
+    spectrum) are computed once per batch.
+    Parameters
+    __________
+    values: numpy.array
+        The windows, with shape (windows, channels, samples), usually taken
+        from a strided view of the signal.
+    freq: float
+        The sampling frequency (Hz)
+    """
+    def __init__(self, values, freq):
+        self.values = values
+        self.freq = freq
+        self._mean = None
+        self._centered = None
+        self._sorted = None
+        self._power = None
+
+    @property
+    def mean(self):
+        if self._mean is None:
+            self._mean = self.values.mean(axis=-1)
+        return self._mean
+
+    @property
+    def centered(self):
+        """ The values of each window minus the window mean """
+        if self._centered is None:
+            self._centered = self.values - self.mean[..., None]
+        return self._centered
+
+    @property
+    def sorted(self):
+        """ The values of each window in ascending order """
+        if self._sorted is None:
+            self._sorted = np.sort(self.values, axis=-1)
+        return self._sorted
+
+    @property
+    def frequencies(self):
+        """ Frequencies (Hz) of the power spectrum """
+        return np.fft.rfftfreq(self.values.shape[-1], 1 / self.freq)
+
+    @property
+    def power(self):
+        """ Periodogram of the mean removed windows, with shape (windows,
+        channels, frequencies)
+        """
+        if self._power is None:
+            n = self.values.shape[-1]
+            spectrum = fft.rfft(self.centered, axis=-1)
+            self._power = (spectrum.real**2 + spectrum.imag**2) \
+                          / (self.freq * n)
+        return self._power
+
+
+def window_view(values, window, step=1):
+    """ Returns a strided view of fixed length windows of a signal
+    Parameters
+    __________
+    values: numpy.array
+        The signal, with time on the first axis, shape (samples, channels).
+        Multi-channel signals are copied once to be channel-major.
+    window: int
+        Samples per window
+    step: int
+        Samples between the start of consecutive windows
+    Returns
+    _______
+    windows: numpy.array
+        Read-only strided view with shape (windows, channels, window)
+    """
+    if len(values) < window:
+        return np.empty((0,) + values.shape[1:] + (window,),
+                        dtype=values.dtype)
+    windows = _sliding_windows(values, window)[..., ::step, :]
+    return np.moveaxis(windows, -2, 0)
+
+def signal_frequency(times):
+    """ Returns the median sampling frequency (Hz) of sample times
+    Parameters
+    __________
+    times: numpy.array
+        Sample times as int64 ns
+    """
+    interval = np.median(np.diff(times)) if len(times) > 1 else 0
+    if not interval > 0:
+        raise ValueError('Cannot find the sampling frequency of the signal')
+    return 1e9 / interval
+
+def signal_times(data):
+    """ Returns the sample times of a DataFrame as int64 ns, from its
+    DatetimeIndex or otherwise its 'value.time' column (datetimes or
+    seconds since the epoch). Returns None if it has neither.
+    """
+    if isinstance(data.index, pd.DatetimeIndex):
+        index = data.index
+        return (index if index.unit == 'ns' else index.as_unit('ns')).asi8
+    if TIME_COLUMN not in data:
+        return None
+    times = np.asarray(data[TIME_COLUMN])
+    if np.issubdtype(times.dtype, np.datetime64):
+        return times.astype('M8[ns]').view('int64')
+    return np.round(times.astype(np.float64) * 1e9).astype(np.int64)
+
+def _sliding_windows(values, window):
+    """ Returns a view of every window of a signal with time on the first
+    axis, with shape (channels, windows, window).
+    """
+    # Windows of a channel-major copy are contiguous along the window axis,
+    # so reductions over each window read consecutive memory
+    channels = np.ascontiguousarray(np.moveaxis(values, 0, -1))
+    return sliding_window_view(channels, window, axis=-1)
+
+def _take_windows(windows, first):
+    """ Returns the windows of _sliding_windows starting at samples first,
+    with shape (windows, channels, window). A view if they are evenly spaced
+    (as in a signal without gaps), otherwise a copy.
+    """
+    if len(first) > 1:
+        steps = np.diff(first)
+        if steps[0] > 0 and (steps == steps[0]).all():
+            windows = windows[:, first[0]:first[-1] + 1:steps[0]]
+            return np.moveaxis(windows, 1, 0)
+    return np.moveaxis(windows[:, first], 1, 0)
+
+def _time_windows(times, n_window, window, step):
+    """ Returns the start times (ns) and first sample of windows of length
+    window (s) starting every step (s) from the first sample, keeping only
+    windows with n_window samples before their end.
+    """
+    window_ns = int(round(window * 1e9))
+    step_ns = int(round(step * 1e9))
+    starts = np.arange(times[0], times[-1] + 1, step_ns)
+    first = np.searchsorted(times, starts, side='left')
+    last = first + n_window - 1
+    complete = last < len(times)
+    complete[complete] = times[last[complete]] < \
+        starts[complete] + window_ns
+    return starts[complete], first[complete]
+
+def extract_features(data, window, step=None, freq=None, features=None,
+                     columns=None, modality=None, start=None):
+    """ Computes features of fixed length windows of a regularly sampled
+    signal, for all windows at once.
+    Parameters
+    __________
+    data: pandas.DataFrame, pandas.Series or numpy.array
+        The signal. One channel per column, with times in a DatetimeIndex
+        or 'value.time' column for pandas objects. Arrays have time on the
+        first axis.
+    window: float
+        The window length (s)
+    step: float (optional)
+        The time between the start of consecutive windows (s). The window
+        length by default.
+    freq: float (optional)
+        The sampling frequency (Hz). By default, the median frequency of
+        the sample times. Required for arrays and DataFrames without times.
+    features: list of str (optional)
+        Names of features in radar.feature.definitions.FEATURES. The
+        modality's features from radar.feature.mappings, or DEFAULT_FEATURES.
+    columns: list of str (optional)
+        The DataFrame columns used as channels. The modality's columns from
+        radar.feature.mappings, or all numeric columns but 'value.time'.
+    modality: str (optional)
+        The RADAR modality name of the signal
+    start: datetime-like (optional)
+        The time of the first sample of an array. Without it, windows of
+        arrays are indexed by the sample number they start at.
+    Returns
+    _______
+    features: pandas.DataFrame
+        One row per window, indexed by the window start, and one column per
+        channel and feature, named '<channel>.<feature>'
+    Notes
+    _____
+    The times of a DataFrame are its DatetimeIndex or 'value.time' column.
+    Windows of a signal with times start every step from the first sample,
+    and are made of the first round(window * freq) samples from their start.
+    Windows without that many samples before their end, such as those
+    spanning a gap in the recording, are left out.
+    """
+    if features is None:
+        features = MODALITY_FEATURES.get(modality, DEFAULT_FEATURES)
+    unknown = [name for name in features if name not in FEATURES]
+    if unknown:
+        raise ValueError('Unknown features: {}'.format(', '.join(unknown)))
+
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+    if isinstance(data, pd.DataFrame):
+        if columns is None:
+            columns = MODALITY_COLUMNS.get(modality)
+        if columns is None:
+            columns = data.select_dtypes('number').columns\
+                          .drop(TIME_COLUMN, errors='ignore')
+        values = data[columns].to_numpy(dtype=np.float64)
+        times = signal_times(data)
+        if freq is None:
+            if times is None:
+                raise ValueError('freq is required for signals without '
+                                 'times')
+            freq = signal_frequency(times)
+    else:
+        if freq is None:
+            raise ValueError('freq is required for array signals')
+        values = np.asarray(data, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+        if columns is None:
+            columns = range(values.shape[1])
+        times = None
+
+    step = window if step is None else step
+    n_window = int(round(window * freq))
+    n_step = int(round(step * freq))
+    if n_window < 1 or n_step < 1:
+        raise ValueError('window and step must be at least one sample')
+    n_channels = values.shape[1]
+    if times is not None and len(times):
+        starts, first = _time_windows(times, n_window, window, step)
+        tz = getattr(data.index, 'tz', None)
+        starts = pd.to_datetime(starts, utc=tz is not None)
+        if tz is not None:
+            starts = starts.tz_convert(tz)
+    else:
+        first = np.arange(0, len(values) - n_window + 1, n_step)
+        starts = first
+        if start is not None:
+            starts = pd.Timestamp(start) + pd.to_timedelta(first / freq, 's')
+    n_windows = len(first)
+
+    out = {name: np.empty((n_windows, n_channels)) for name in features}
+    if n_windows:
+        windows = _sliding_windows(values, n_window)
+    batch = max(1, MAX_BATCH_VALUES // (n_window * n_channels))
+    for i in range(0, n_windows, batch):
+        w = WindowBatch(_take_windows(windows, first[i:i + batch]), freq)
+        for name in features:
+            out[name][i:i + batch] = FEATURES[name](w)
+
+    names = ['{}.{}'.format(col, name) for name in features
+             for col in columns]
+    result = np.concatenate([out[name] for name in features], axis=1)
+    return pd.DataFrame(result, columns=names,
+                        index=pd.Index(starts, name='window_start'))
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+import numpy as np
+import pandas as pd
+
+"""
+Heart rate variability (HRV) features of inter-beat interval (IBI) streams.
+Beats are irregularly spaced, so windows are fixed time spans whose beats
+are found with searchsorted. Time domain features are computed for all
+windows at once from sums over the beats between window boundaries, and
+frequency domain features from a Lomb-Scargle periodogram of each window,
+also computed from such sums (over beats and frequencies).
+"""
+
+IBI_MODALITY = 'android_empatica_e4_inter_beat_interval'
+IBI_COLUMN = 'value.interBeatInterval'
+TIME_COLUMN = 'value.time'
+
+HRV_FEATURES = ('n_beats', 'mean_nn', 'sdnn', 'rmssd', 'pnn50',
+                'lf', 'hf', 'lf_hf')
+
+# Frequency bands (Hz) and the periodogram frequency resolution (Hz)
+LF_BAND = (0.04, 0.15)
+HF_BAND = (0.15, 0.4)
+FREQ_STEP = 0.005
+
+# Maximum number of (beat, frequency) values in a periodogram batch
+MAX_BATCH_VALUES = 2**21
+
+
+def hrv_features(data, window=300., step=None, ibi_column=IBI_COLUMN,
+                 time_column=TIME_COLUMN, min_beats=30, ibi_range=(0.3, 2.),
+                 gap_tolerance=0.25, frequency=True):
+    """ Computes HRV features over fixed time windows of an IBI stream.
+    Parameters
+    __________
+    data: pandas.DataFrame
+        The IBI stream. Beat times are taken from time_column (datetimes or
+        seconds since the epoch), or the index if it is a DatetimeIndex and
+        time_column is not a column.
+    window: float
+        The window length (s)
+    step: float (optional)
+        The time between the start of consecutive windows (s). The window
+        length by default. Windows start at multiples of step since the
+        epoch.
+    ibi_column, time_column: str
+        The IBI (s) and beat time columns
+    min_beats: int
+        Windows with fewer beats have NaN features (other than n_beats)
+    ibi_range: tuple (optional)
+        IBIs (s) outside of this range are treated as artefacts and dropped
+    gap_tolerance: float
+        Successive differences are only used between consecutive beats,
+        i.e. where the time between two beats is within gap_tolerance (s) of
+        the second beat's IBI
+    frequency: bool
+        Whether to compute the frequency domain features (lf, hf, lf_hf)
+    Returns
+    _______
+    features: pandas.DataFrame
+        One row per window, indexed by the window start, with columns:
+        n_beats: number of beats
+        mean_nn: mean IBI (s)
+        sdnn: standard deviation of IBIs (s)
+        rmssd: root mean square of successive IBI differences (s)
+        pnn50: fraction of successive differences over 50 ms
+        lf, hf: Lomb-Scargle power integrated over LF_BAND and HF_BAND
+        lf_hf: lf / hf
+    """
+    if time_column in data:
+        times = data[time_column].values
+    else:
+        times = data.index.values
+    times, ibi = _beat_arrays(times, data[ibi_column].values, ibi_range)
+    step = window if step is None else step
+    if not len(times):
+        return pd.DataFrame(columns=HRV_FEATURES,
+                            index=pd.DatetimeIndex([], name='window_start'))
+
+    # Window starts at multiples of step (ns since the epoch), with beat
+    # times in seconds relative to the first window start
+    step_ns = int(round(step * 1e9))
+    origin = times[0] // step_ns * step_ns
+    t = (times - origin) / 1e9
+    starts = np.arange(0, t[-1] + step, step)
+    starts = starts[starts <= t[-1]]
+    lo = np.searchsorted(t, starts, side='left')
+    hi = np.searchsorted(t, starts + window, side='left')
+
+    out = dict(zip(HRV_FEATURES[:5], time_domain(t, ibi, lo, hi,
+                                                 gap_tolerance)))
+    if frequency:
+        out['lf'], out['hf'] = frequency_domain(t, ibi, lo, hi)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out['lf_hf'] = out['lf'] / out['hf']
+    few = out['n_beats'] < min_beats
+    for name in out:
+        if name != 'n_beats':
+            out[name][few] = np.nan
+    index = pd.DatetimeIndex(origin + np.round(starts * 1e9).astype('int64'),
+                             name='window_start')
+    return pd.DataFrame(out, index=index)
+
+def time_domain(t, ibi, lo, hi, gap_tolerance=0.25):
+    """ Returns the time domain HRV features of windows of beats [lo, hi)
+    Parameters
+    __________
+    t: numpy.array
+        Sorted beat times (s)
+    ibi: numpy.array
+        IBI (s) of each beat
+    lo, hi: numpy.array of int
+        The first and last + 1 beat of each window
+    gap_tolerance: float
+        See hrv_features
+    Returns
+    _______
+    n_beats, mean_nn, sdnn, rmssd, pnn50: numpy.array
+    """
+    n = (hi - lo).astype(np.float64)
+    # IBIs are centred on their overall mean so that the window variance
+    # from cumulative sums does not suffer from cancellation
+    centre = ibi.mean()
+    x = ibi - centre
+    sums = _window_sums(np.stack([x, x**2]), lo, hi)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums[0] / n
+        var = (sums[1] - n * mean**2) / (n - 1)
+        sdnn = np.sqrt(np.maximum(var, 0))
+
+        # Successive difference j is between beats j and j + 1, so is in the
+        # window if both beats are: j in [lo, hi - 1)
+        diff = np.diff(ibi)
+        valid = np.abs(np.diff(t) - ibi[1:]) <= gap_tolerance
+        diff = np.where(valid, diff, 0)
+        d_sums = _window_sums(np.stack([valid, diff**2,
+                                        np.abs(diff) > 0.05]),
+                              lo, np.maximum(hi - 1, lo))
+        rmssd = np.sqrt(d_sums[1] / d_sums[0])
+        pnn50 = d_sums[2] / d_sums[0]
+    return n, mean + centre, sdnn, rmssd, pnn50
+
+def frequency_domain(t, ibi, lo, hi, lf_band=LF_BAND, hf_band=HF_BAND,
+                     freq_step=FREQ_STEP):
+    """ Returns the LF and HF power of windows of beats [lo, hi), from the
+    Lomb-Scargle periodogram of the window's mean removed IBIs (as
+    scipy.signal.lombscargle), integrated over each band.
+    Parameters
+    __________
+    t, ibi, lo, hi: numpy.array
+        See time_domain
+    lf_band, hf_band: tuple
+        The LF and HF bands (Hz)
+    freq_step: float
+        The periodogram frequency resolution (Hz)
+    Returns
+    _______
+    lf, hf: numpy.array
+    """
+    freqs = np.arange(lf_band[0], hf_band[1] + freq_step / 2, freq_step)
+    bands = [(freqs >= low) & (freqs < high)
+             for low, high in (lf_band, hf_band)]
+    power = np.full((len(lo), len(freqs)), np.nan)
+    # Windows are processed in batches spanning a limited number of beats,
+    # so the (beats, frequencies) arrays have bounded size
+    max_beats = max(MAX_BATCH_VALUES // len(freqs), 1)
+    first = 0
+    while first < len(lo):
+        last = max(np.searchsorted(hi, lo[first] + max_beats, side='right'),
+                   first + 1)
+        b_lo, b_hi = lo[first], hi[last - 1]
+        power[first:last] = _lombscargle(t[b_lo:b_hi], ibi[b_lo:b_hi],
+                                         lo[first:last] - b_lo,
+                                         hi[first:last] - b_lo, freqs)
+        first = last
+    return tuple(power[:, band].sum(axis=1) * freq_step for band in bands)
+
+def _lombscargle(t, y, lo, hi, freqs):
+    """ Lomb-Scargle periodogram of the mean removed values of each window of
+    samples [lo, hi), with shape (windows, frequencies). freqs must be
+    evenly spaced.
+    """
+    n = (hi - lo).astype(np.float64)
+    t = t - t[0]
+    # exp(i omega t) by frequency and beat. On an even frequency grid each
+    # frequency is the previous one times the same per-beat phase step, so
+    # only two complex exponentials of the beat times are needed.
+    z = np.empty((len(freqs), len(t)), dtype=np.complex128)
+    z[0] = np.exp(2j * np.pi * freqs[0] * t)
+    if len(freqs) > 1:
+        phase_step = np.exp(2j * np.pi * (freqs[1] - freqs[0]) * t)
+        for k in range(1, len(freqs)):
+            np.multiply(z[k - 1], phase_step, out=z[k])
+    y = y - y.mean()
+    s_y = _window_sums(y, lo, hi)
+    # Window sums of cos + i sin, y (cos + i sin) and cos(2wt) + i sin(2wt)
+    s_z, s_yz, s_zz = (_window_sums(term, lo, hi)
+                       for term in (z, y * z, z * z))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = s_y / n
+        # Sums of the mean removed window values times cos and sin
+        yc = s_yz.real - mean * s_z.real
+        ys = s_yz.imag - mean * s_z.imag
+        s_cc = 0.5 * (n + s_zz.real)
+        s_sc = 0.5 * s_zz.imag
+        tau = 0.5 * np.arctan2(s_zz.imag, s_zz.real)
+        c, s = np.cos(tau), np.sin(tau)
+        cc_tau = c * c * s_cc + 2 * c * s * s_sc + s * s * (n - s_cc)
+        ss_tau = n - cc_tau
+        power = 0.5 * ((c * yc + s * ys)**2 / cc_tau
+                       + (c * ys - s * yc)**2 / ss_tau)
+    return power.T
+
+def _window_sums(values, lo, hi):
+    """ Returns the sums of values[..., lo:hi] (along the last axis) for
+    each window. Values are summed in blocks between consecutive window
+    boundaries, and window sums taken from the cumulative sum of blocks.
+    """
+    n = values.shape[-1]
+    bounds = np.unique(np.concatenate([lo, hi]))
+    bounds = bounds[bounds < n]
+    cumsum = np.zeros(values.shape[:-1] + (len(bounds) + 1,),
+                      dtype=np.result_type(values, np.float64))
+    if len(bounds):
+        np.cumsum(np.add.reduceat(values, bounds, axis=-1), axis=-1,
+                  out=cumsum[..., 1:])
+    return cumsum[..., np.searchsorted(bounds, hi)] \
+        - cumsum[..., np.searchsorted(bounds, lo)]
+
+def _beat_arrays(times, ibi, ibi_range=None):
+    """ Returns beat times (int64 ns since the epoch) and IBIs (s) sorted by
+    time, without missing values and IBIs outside of ibi_range.
+    """
+    times = np.asarray(times)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype('M8[ns]').view('int64')
+        missing = times == np.iinfo(np.int64).min
+    else:
+        missing = np.isnan(times)
+        times = np.round(np.where(missing, 0, times) * 1e9).astype('int64')
+    ibi = np.asarray(ibi, dtype=np.float64)
+    keep = ~missing & ~np.isnan(ibi)
+    if ibi_range is not None:
+        keep &= (ibi >= ibi_range[0]) & (ibi <= ibi_range[1])
+    times, ibi = times[keep], ibi[keep]
+    order = np.argsort(times, kind='stable')
+    return times[order], ibi[order]
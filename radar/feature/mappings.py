@@ -1 +1,36 @@
 #!/usr/bin/env python3
+from .definitions import DEFAULT_FEATURES
+
+"""
+Signal columns and default window features of RADAR modalities, used by
+radar.feature.extract.extract_features when given a modality name.
+"""
+
+MODALITY_COLUMNS = {
+    'android_empatica_e4_acceleration': ['value.x', 'value.y', 'value.z'],
+    'android_empatica_e4_blood_volume_pulse': ['value.bloodVolumePulse'],
+    'android_empatica_e4_electrodermal_activity': [
+        'value.electroDermalActivity'],
+    'android_empatica_e4_temperature': ['value.temperature'],
+    'android_biovotion_vsm1_acceleration': ['value.x', 'value.y', 'value.z'],
+    'android_biovotion_vsm1_blood_pulse_wave': ['value.bloodPulseWave'],
+    'android_biovotion_vsm1_galvanic_skin_response': [
+        'value.galvanicSkinResponseAmplitude'],
+    'android_biovotion_vsm1_temperature': ['value.temperature'],
+}
+
+MODALITY_FEATURES = {
+    'android_empatica_e4_acceleration': DEFAULT_FEATURES + (
+        'mean_crossings', 'dominant_frequency', 'band_0_1', 'band_1_3',
+        'band_3_8'),
+    'android_empatica_e4_blood_volume_pulse': DEFAULT_FEATURES + (
+        'dominant_frequency', 'band_0_1', 'band_1_3'),
+    'android_empatica_e4_electrodermal_activity': (
+        'mean', 'std', 'min', 'max', 'p50'),
+    'android_empatica_e4_temperature': ('mean', 'std', 'min', 'max'),
+    'android_biovotion_vsm1_acceleration': DEFAULT_FEATURES + (
+        'mean_crossings', 'dominant_frequency', 'band_0_1', 'band_1_3',
+        'band_3_8'),
+    'android_biovotion_vsm1_blood_pulse_wave': DEFAULT_FEATURES + (
+        'dominant_frequency', 'band_0_1', 'band_1_3'),
+}
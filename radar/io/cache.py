@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+import os
+import json
+import hashlib
+import numpy as np
+import pandas.api.types as ptypes
+import dask.dataframe as dd
+from ..defaults import TIME_COLS
+from .csv import _read_folder
+from .generic import RadarTable
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+"""
+Persistent columnar cache for filesystem projects.
+Modality folders of raw CSV files are converted to typed, uncompressed
+Feather (Arrow IPC) files on first access, which are read on later loads
+instead of re-parsing the CSV files.
+"""
+
+CACHE_EXT = '.feather'
+META_EXT = '.json'
+# Entries written with another version of typed_columns are rebuilt
+CACHE_VERSION = 2
+
+
+class FolderCache():
+    """ A directory of cached modality folders.
+    Parameters
+    __________
+    cache_dir: str
+        The directory to store cached files in. Created if it does not exist.
+    max_size: int (optional)
+        The maximum total size in bytes of the cache. When exceeded, the least
+        recently used entries are removed. Unlimited if not given.
+    """
+    def __init__(self, cache_dir, max_size=None):
+        if feather is None:
+            raise ImportError('pyarrow is required to use a FolderCache')
+        self.path = os.path.abspath(cache_dir)
+        self.max_size = max_size
+        os.makedirs(self.path, exist_ok=True)
+
+    def __repr__(self):
+        return 'RADAR folder cache at {} ({} bytes)'.format(self.path,
+                                                           self.size())
+
+    def _entry(self, folder):
+        key = hashlib.sha1(os.path.abspath(folder).encode()).hexdigest()
+        return os.path.join(self.path, key)
+
+    def cached_file(self, folder, extension='.csv', specification=None,
+                    **kwargs):
+        """ Returns the path of a valid cached file for the folder, converting
+        the folder first if there is none or the source files have changed.
+        Parameters
+        __________
+        folder: str
+            The modality folder
+        extension: str
+            The extension of the source files
+        specification: radar.util.specifications.ModalitySpec (optional)
+            The modality specification, whose time columns are kept at full
+            precision (see typed_columns)
+        kwargs:
+            Keyword arguments passed to radar.io.csv._read_folder
+        Returns
+        _______
+        path: str
+            Path to the cached Feather file
+        """
+        entry = self._entry(folder)
+        signature = source_signature(folder, extension)
+        meta = _read_meta(entry + META_EXT)
+        if meta is not None and meta['signature'] == signature and \
+           meta.get('version') == CACHE_VERSION and \
+           os.path.exists(entry + CACHE_EXT):
+            # Sidecar mtime records the last access for eviction
+            os.utime(entry + META_EXT)
+            return entry + CACHE_EXT
+
+        df = _read_folder(folder, extension=extension,
+                          time_columns=TIME_COLS, **kwargs)
+        if df is None:
+            return None
+        df = typed_columns(df, specification=specification)
+        tmp = entry + CACHE_EXT + '.tmp'
+        feather.write_feather(df, tmp, compression='uncompressed')
+        os.replace(tmp, entry + CACHE_EXT)
+        with open(entry + META_EXT, 'w') as f:
+            json.dump({'source': os.path.abspath(folder),
+                       'signature': signature,
+                       'version': CACHE_VERSION}, f)
+        self.evict(keep=entry)
+        return entry + CACHE_EXT
+
+    def entries(self):
+        """ Returns a list of (entry path, last access time, size in bytes)
+        for each cache entry.
+        """
+        entries = []
+        with os.scandir(self.path) as it:
+            for f in it:
+                if not f.name.endswith(META_EXT):
+                    continue
+                entry = f.path[:-len(META_EXT)]
+                size = f.stat().st_size
+                if os.path.exists(entry + CACHE_EXT):
+                    size += os.stat(entry + CACHE_EXT).st_size
+                entries.append((entry, f.stat().st_mtime, size))
+        return entries
+
+    def size(self):
+        """ Returns the total size in bytes of the cache
+        """
+        return sum(e[2] for e in self.entries())
+
+    def evict(self, max_size=None, keep=None):
+        """ Removes least recently used entries until the cache is no larger
+        than max_size (by default the cache's max_size).
+        """
+        if max_size is None:
+            max_size = self.max_size
+        if max_size is None:
+            return
+        entries = sorted(self.entries(), key=lambda e: e[1])
+        total = sum(e[2] for e in entries)
+        for entry, _, size in entries:
+            if total <= max_size:
+                break
+            if entry == keep:
+                continue
+            for ext in (CACHE_EXT, META_EXT):
+                if os.path.exists(entry + ext):
+                    os.remove(entry + ext)
+            total -= size
+
+    def clear(self):
+        """ Removes all entries from the cache
+        """
+        self.evict(max_size=0)
+
+
+class CachedTable(RadarTable):
+    """ A table of RADAR data read from a FolderCache Feather file.
+    Only the requested columns are read.
+    """
+    def _make_dask_df(self, where, name, cache=None, compression=None,
+                      specification=None, **kwargs):
+        extension = '.csv' if compression is None else '.csv.gz'
+        self._cache_file = cache.cached_file(os.path.join(where, name),
+                                             extension=extension,
+                                             specification=specification)
+        if self._cache_file is None:
+            raise ValueError('No files found in ' + os.path.join(where, name))
+        meta = feather.read_table(self._cache_file, memory_map=True)\
+                      .schema.empty_table().to_pandas()
+        return dd.from_map(read_cached, [self._cache_file], meta=meta)
+
+
+def read_cached(path, columns=None):
+    """ Reads columns of a cached Feather file
+    Parameters
+    __________
+    path: str
+        Path to the Feather file
+    columns: list (optional)
+        Column names to read. All columns by default.
+    Returns
+    _______
+    df: pandas.DataFrame
+    """
+    return feather.read_table(path, columns=columns,
+                              memory_map=True).to_pandas()
+
+def typed_columns(df, category_fraction=0.5, specification=None):
+    """ Returns a dataframe with compact column types for caching:
+    datetimes as datetime64[ns], floating point values as float32, and key or
+    low cardinality string columns as categoricals.
+    Timestamps and durations stored as floats (the specification's time and
+    timedelta columns, and any column with 'time' in its name) are kept as
+    float64, as float32 resolves epoch seconds only to about two minutes.
+    """
+    keep = set()
+    if specification is not None:
+        keep.update(specification.time_columns())
+        keep.update(specification.timedelta_columns())
+    df = df.reset_index(drop=True)
+    for col in df:
+        dtype = df[col].dtype
+        if col in TIME_COLS or ptypes.is_datetime64_any_dtype(dtype):
+            df[col] = df[col].astype('M8[ns]')
+        elif ptypes.is_float_dtype(dtype):
+            if col not in keep and 'time' not in col.lower():
+                df[col] = df[col].astype(np.float32)
+        elif ptypes.is_object_dtype(dtype) or ptypes.is_string_dtype(dtype):
+            if col.startswith('key.') or \
+               df[col].nunique() <= category_fraction * len(df):
+                df[col] = df[col].astype('category')
+    return df
+
+def source_signature(folder, extension='.csv'):
+    """ Returns a dictionary of {filename: [mtime_ns, size]} for the source
+    files in a folder, used to invalidate cache entries.
+    """
+    with os.scandir(folder) as it:
+        return {f.name: [f.stat().st_mtime_ns, f.stat().st_size]
+                for f in it if f.name.endswith(extension) and f.is_file()}
+
+def _read_meta(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+import tables
+from .hdf5 import open_project_file, _df_to_usable
+
+"""
+Compression filter selection for HDF5 project files.
+Candidate Blosc filters are tried on a sample of each modality, measuring the
+compression ratio and write and read throughput, and the best filters are
+stored in a ProjectFile filter profile (ProjectFile.set_filter_profile).
+"""
+
+CODECS = ('blosc:lz4', 'blosc:zstd', 'blosc:blosclz')
+LEVELS = (1, 5, 9)
+SHUFFLES = ('shuffle', 'bitshuffle', None)
+
+
+def candidate_filters(codecs=CODECS, levels=LEVELS, shuffles=SHUFFLES):
+    """ Returns a list of tables.Filters for each combination of codec,
+    compression level and shuffle. Codecs unavailable in this build of
+    PyTables are skipped.
+    Parameters
+    __________
+    codecs: list of str
+        PyTables complib names
+    levels: list of int
+        Compression levels (1-9)
+    shuffles: list
+        'shuffle', 'bitshuffle' or None (no shuffle)
+    Returns
+    _______
+    filters: list of tables.Filters
+    """
+    filters = []
+    for codec in codecs:
+        try:
+            tables.Filters(complib=codec, complevel=1)
+        except ValueError:
+            continue
+        for level in levels:
+            for shuffle in shuffles:
+                filters.append(tables.Filters(
+                    complib=codec, complevel=level,
+                    shuffle=shuffle == 'shuffle',
+                    bitshuffle=shuffle == 'bitshuffle'))
+    return filters
+
+def benchmark_filters(df, filters=None, repeats=3):
+    """ Writes and reads a sample of a modality as a RadarTable with each
+    filter, and measures the compression ratio and throughput.
+    Parameters
+    __________
+    df: pandas.DataFrame
+        A sample of the modality's data
+    filters: list of tables.Filters (optional)
+        The filters to try. candidate_filters() by default.
+    repeats: int
+        The number of times each write and read is timed, taking the fastest.
+    Returns
+    _______
+    results: pandas.DataFrame
+        One row per filter with columns complib, complevel, shuffle,
+        bitshuffle, ratio (uncompressed / stored size), write_mbs and read_mbs
+        (uncompressed MB/s)
+    """
+    filters = candidate_filters() if filters is None else filters
+    records, _ = _df_to_usable(df)
+    rows = []
+    with tempfile.TemporaryDirectory() as path:
+        for i, f in enumerate(filters):
+            fn = os.path.join(path, 'sample{}.h5'.format(i))
+            write, read = [], []
+            for _ in range(repeats):
+                h5 = open_project_file(fn, mode='w')
+                t0 = time.perf_counter()
+                table = h5.create_radar_table('/', 'sample', obj=records,
+                                              filters=f)
+                h5.flush()
+                write.append(time.perf_counter() - t0)
+                nbytes, stored = table.size_in_memory, table.size_on_disk
+                h5.close()
+                h5 = open_project_file(fn, mode='r')
+                t0 = time.perf_counter()
+                h5.get_node('/sample').read()
+                read.append(time.perf_counter() - t0)
+                h5.close()
+            rows.append({'complib': f.complib, 'complevel': f.complevel,
+                         'shuffle': f.shuffle, 'bitshuffle': f.bitshuffle,
+                         'ratio': nbytes / stored,
+                         'write_mbs': nbytes / min(write) / 1e6,
+                         'read_mbs': nbytes / min(read) / 1e6})
+    return pd.DataFrame(rows)
+
+def select_filter(results, ratio_weight=1., read_weight=1., write_weight=.5):
+    """ Selects the filter with the best weighted geometric mean of
+    compression ratio, read and write throughput, each relative to the best
+    result.
+    Parameters
+    __________
+    results: pandas.DataFrame
+        The output of benchmark_filters
+    ratio_weight, read_weight, write_weight: float
+        The weight of each measure
+    Returns
+    _______
+    filters: tables.Filters
+    """
+    score = sum(w * np.log(results[col] / results[col].max())
+                for col, w in (('ratio', ratio_weight),
+                               ('read_mbs', read_weight),
+                               ('write_mbs', write_weight)))
+    best = results.loc[score.idxmax()]
+    return tables.Filters(complib=best['complib'],
+                          complevel=int(best['complevel']),
+                          shuffle=bool(best['shuffle']),
+                          bitshuffle=bool(best['bitshuffle']))
+
+def tune_filter_profile(samples, filters=None, repeats=3, **kwargs):
+    """ Selects the filters for each modality from a sample of its data
+    Parameters
+    __________
+    samples: dict
+        {modality name: pandas.DataFrame}
+    filters: list of tables.Filters (optional)
+        The filters to try. candidate_filters() by default.
+    repeats: int
+        See benchmark_filters
+    kwargs:
+        Weights passed to select_filter
+    Returns
+    _______
+    profile: dict
+        {modality name: tables.Filters}, for ProjectFile.set_filter_profile
+    """
+    return {name: select_filter(benchmark_filters(df, filters, repeats),
+                                **kwargs)
+            for name, df in samples.items()}
@@ -1,23 +1,236 @@
 #!/usr/bin/env python3
+import numpy as np
 import pandas as pd
 import dask.dataframe as dd
 import glob, os, sys
 import csv
+import json
+import re
+from collections import deque
+from concurrent import futures
+from itertools import islice
 from ..defaults import TIME_COLS
 from ..util.specifications import ModalitySpec
 from ..util.avro import RadarSchema
 from .generic import RadarTable
 
 
+# Hourly RADAR output files are named by their start time, e.g.
+# 20180101_1000.csv.gz
+FILENAME_TIME_REGEX = re.compile(r'(\d{8})_(\d{4})')
+FILENAME_TIME_FORMAT = '%Y%m%d%H%M'
+FILE_DURATION = pd.Timedelta('1h')
+TIME_EXTENT_CACHE = '.time_extents.json'
+
+# Parsed files are merged in batches of this many files as they are read, so
+# that only one batch of per-file frames is held alongside the merged rows
+MERGE_BATCH_FILES = 32
+
+# Time extents of folders whose TIME_EXTENT_CACHE could not be written (e.g.
+# read-only data), kept in memory instead: {cache path: cache}
+_time_extent_memory = {}
+
+
 class CsvTable(RadarTable):
-    def _make_dask_df(self, where, name, compression=None):
+    """ A table of RADAR data stored as a folder of CSV files.
+    If the files are named by hour (or their time extents can be scanned),
+    the underlying dask dataframe is indexed by time with known divisions,
+    and time ranges can be read with CsvTable.loc[start:end], opening only
+    the files that overlap the range.
+    """
+    def _make_dask_df(self, where, name, compression=None,
+                      time_column='value.time', **kwargs):
         folder = os.path.join(where, name)
-        if compression is None:
-            return dd.read_csv(os.path.join(folder, '*.csv'))
-        else:
-            return dd.read_csv(os.path.join(folder, '*.csv.*'),
+        pattern = '*.csv' if compression is None else '*.csv.*'
+        files = sorted(glob.glob(os.path.join(folder, pattern)))
+        self._time_column = time_column
+        self._read_kwargs = {} if compression is None else \
+                            {'compression': compression}
+        self._file_index = file_time_index(files, time_column,
+                                           **self._read_kwargs)
+        if self._file_index is None:
+            if compression is None:
+                return dd.read_csv(os.path.join(folder, pattern))
+            return dd.read_csv(os.path.join(folder, pattern),
                                compression=compression,
                                blocksize=None)
+        files = list(self._file_index.index)
+        meta = _read_time_indexed(files[0], time_column, nrows=100,
+                                  **self._read_kwargs).iloc[:0]
+        return dd.from_map(_read_time_indexed, files, meta=meta,
+                           divisions=_index_divisions(self._file_index),
+                           time_column=time_column, **self._read_kwargs)
+
+    @property
+    def loc(self):
+        """ Time range indexer, e.g.
+        table.loc['2018-01-01 10:00':'2018-01-01 11:00']
+        """
+        return _TimeRangeIndexer(self)
+
+    def files_between(self, start=None, end=None):
+        """ Returns the files whose time extents overlap the given range.
+        Parameters
+        __________
+        start: datetime-like (optional)
+        end: datetime-like (optional)
+        Returns
+        _______
+        files: list
+            Paths of the overlapping files, in time order
+        """
+        if self._file_index is None:
+            raise ValueError('No time index is available for ' + self.path)
+        idx = self._file_index
+        mask = np.ones(len(idx), dtype=bool)
+        if start is not None:
+            mask &= (idx['end'] >= pd.Timestamp(start)).values
+        if end is not None:
+            mask &= (idx['start'] <= pd.Timestamp(end)).values
+        return list(idx.index[mask])
+
+    def read_time_range(self, start=None, end=None, **kwargs):
+        """ Reads the rows between two times (inclusive), opening only the
+        files that overlap the range.
+        Parameters
+        __________
+        start: datetime-like (optional)
+        end: datetime-like (optional)
+        kwargs:
+            Keyword arguments passed to radar.io.csv._iter_files, e.g. workers
+        Returns
+        _______
+        df: pandas.DataFrame
+            A dataframe indexed by time
+        """
+        files = self.files_between(start, end)
+        if not files:
+            return self._data._meta.copy()
+        df = _concat_batches(_iter_files(files, time_column=self._time_column,
+                                         reader=_read_time_indexed,
+                                         **self._read_kwargs, **kwargs),
+                             MERGE_BATCH_FILES)
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index(kind='mergesort')
+        # As Timestamps, so that a string end is not widened to its
+        # resolution (e.g. a whole minute) by partial string indexing
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        return df.loc[start:end]
+
+
+class _TimeRangeIndexer():
+    def __init__(self, table):
+        self._table = table
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError('Only a time slice [start:end] is supported')
+        return self._table.read_time_range(key.start, key.stop)
+
+
+def _filename_time(fname):
+    """ Returns the start time encoded in a RADAR output filename, or None
+    """
+    match = FILENAME_TIME_REGEX.search(os.path.basename(fname))
+    if match is None:
+        return None
+    try:
+        return pd.to_datetime(''.join(match.groups()),
+                              format=FILENAME_TIME_FORMAT)
+    except ValueError:
+        return None
+
+def _scan_time_extents(files, time_column, **kwargs):
+    """ Returns the min and max of the time column of each file. Results are
+    cached in a TIME_EXTENT_CACHE file next to the data, keyed on file mtime
+    and size, so each file is only scanned once. If the cache cannot be
+    written, it is kept in memory for the rest of the session.
+    """
+    def stat_key(f):
+        st = os.stat(f)
+        return [st.st_mtime, st.st_size]
+
+    folder = os.path.dirname(files[0])
+    cache_path = os.path.join(folder, TIME_EXTENT_CACHE)
+    try:
+        with open(cache_path, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = _time_extent_memory.get(cache_path, {})
+
+    starts, ends, updated = [], [], False
+    for f in files:
+        name = os.path.basename(f)
+        key = stat_key(f)
+        if name not in cache or cache[name][:2] != key:
+            times = pd.read_csv(f, usecols=[time_column],
+                                dtype={time_column: np.float64},
+                                **kwargs)[time_column]
+            cache[name] = key + [times.min(), times.max()]
+            updated = True
+        starts.append(cache[name][2])
+        ends.append(cache[name][3])
+    if updated:
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump(cache, f)
+        except OSError:
+            _time_extent_memory[cache_path] = cache
+    return (pd.to_datetime(starts, unit='s').as_unit('ns'),
+            pd.to_datetime(ends, unit='s').as_unit('ns'))
+
+def file_time_index(files, time_column='value.time', **kwargs):
+    """ Builds a file to time range index for a list of CSV files.
+    Start times are taken from RADAR hourly filenames where possible,
+    otherwise the time column of each file is scanned.
+    Parameters
+    __________
+    files: list
+        Paths of the CSV files
+    time_column: str
+        The epoch time column, which the files are indexed by. It is
+        scanned if filenames have no time.
+    kwargs:
+        Keyword arguments passed to pandas.read_csv when scanning
+    Returns
+    _______
+    file_index: pandas.DataFrame or None
+        A dataframe indexed by file path, with datetime 'start' and 'end'
+        columns, sorted by start. None if no time index could be made,
+        e.g. the files have no time_column.
+    """
+    if not files:
+        return None
+    header = pd.read_csv(files[0], nrows=0, **kwargs)
+    if time_column not in header:
+        return None
+    starts = [_filename_time(f) for f in files]
+    if all(s is not None for s in starts):
+        starts = pd.DatetimeIndex(starts).as_unit('ns')
+        ends = starts + FILE_DURATION
+    else:
+        starts, ends = _scan_time_extents(files, time_column, **kwargs)
+    index = pd.DataFrame({'start': starts, 'end': ends}, index=files)
+    return index.sort_values('start', kind='mergesort')
+
+def _index_divisions(file_index):
+    """ Returns dask divisions for a file index, or None if file time ranges
+    overlap.
+    """
+    starts = file_index['start'].values
+    ends = file_index['end'].values
+    if (np.diff(starts) <= np.timedelta64(0)).any() or \
+       (ends[:-1] > starts[1:]).any():
+        return None
+    return tuple(pd.DatetimeIndex(starts)) + (pd.Timestamp(ends[-1]),)
+
+def _read_time_indexed(f, time_column='value.time', **kwargs):
+    df = _read_file(f, time_columns=TIME_COLS, **kwargs)
+    df.index = pd.DatetimeIndex(df[time_column].values)
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index(kind='mergesort')
+    return df
 
 class CsvDataGroup():
     pass
@@ -33,9 +246,113 @@ def write_csv(arr, fname: str = '', fieldnames: list = None, **kwargs):
     if f is not sys.stdout:
         f.close()
 
-def _read_files(files, sort: str = None, index: str = None, **kwargs):
-    df = pd.concat(pd.read_csv(f, **kwargs) for f in files)
-    if sort:
+def _epoch_to_datetime(df, time_columns):
+    """ Converts columns of float epoch seconds to datetime64[ns] in a single
+    vectorised step per column.
+    Parameters
+    __________
+    df: pandas.DataFrame
+        A dataframe with time columns read as float64
+    time_columns: list
+        Names of the columns to convert. Columns not in df are ignored.
+    Returns
+    _______
+    df: pandas.DataFrame
+        The same dataframe with the time columns converted
+    """
+    for col in time_columns:
+        if col in df:
+            # pandas >= 3 infers the unit (e.g. seconds for whole seconds)
+            df[col] = pd.to_datetime(df[col].values, unit='s').as_unit('ns')
+    return df
+
+def _read_file(f, time_columns=None, **kwargs):
+    df = pd.read_csv(f, **kwargs)
+    if time_columns:
+        df = _epoch_to_datetime(df, time_columns)
+    return df
+
+def _iter_files(files, workers: int = None, executor: str = 'thread',
+                max_in_flight: int = None, reader=_read_file, **kwargs):
+    """ Yields a dataframe for each file, in the order the files are given.
+    Parameters
+    __________
+    files: list
+        Paths of the CSV files to read
+    workers: int (optional)
+        The number of threads/processes used to decompress and parse files.
+        Files are read serially if not given or 1.
+    executor: {'thread', 'process'}
+        The type of worker pool. Default is 'thread'
+    max_in_flight: int (optional)
+        The maximum number of files being parsed, or parsed and waiting to be
+        yielded, at any one time. Default is twice the number of workers.
+    reader: function
+        The function used to read each file. Default is _read_file
+    kwargs:
+        Keyword arguments passed to the reader and pandas.read_csv
+    Yields
+    ______
+    df: pandas.DataFrame
+        The parsed contents of each file
+    """
+    if not workers or workers == 1:
+        for f in files:
+            yield reader(f, **kwargs)
+        return
+    if executor == 'thread':
+        pool_class = futures.ThreadPoolExecutor
+    elif executor == 'process':
+        pool_class = futures.ProcessPoolExecutor
+    else:
+        raise ValueError('executor must be "thread" or "process"')
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+    files = iter(files)
+    with pool_class(max_workers=workers) as pool:
+        pending = deque(pool.submit(reader, f, **kwargs)
+                        for f in islice(files, max(max_in_flight, 1)))
+        while pending:
+            df = pending.popleft().result()
+            for f in islice(files, 1):
+                pending.append(pool.submit(reader, f, **kwargs))
+            yield df
+
+def _concat_batches(frames, batch_size, **kwargs):
+    """ Concatenates dataframes in batches of batch_size as they are yielded,
+    so that at most one batch of the frames is held at once.
+    Parameters
+    __________
+    frames: iterable
+        The dataframes, e.g. from _iter_files
+    batch_size: int
+        The number of frames concatenated at a time
+    kwargs:
+        Keyword arguments passed to pandas.concat
+    Returns
+    _______
+    df: pandas.DataFrame
+    """
+    frames = iter(frames)
+    batches = []
+    while True:
+        batch = list(islice(frames, max(batch_size, 1)))
+        if not batch:
+            break
+        batches.append(pd.concat(batch, **kwargs))
+        # Free the frames before the next batch is read
+        del batch
+    return pd.concat(batches, **kwargs)
+
+def _read_files(files, sort: str = None, index: str = None, workers=None,
+                executor='thread', max_in_flight=None,
+                batch_files=MERGE_BATCH_FILES, **kwargs):
+    df = _concat_batches(_iter_files(files, workers=workers, executor=executor,
+                                     max_in_flight=max_in_flight, **kwargs),
+                         batch_files, ignore_index=True)
+    # Files are read in name (i.e. time) order, so no sort is needed unless
+    # their contents overlap
+    if sort and not df[sort].is_monotonic_increasing:
         df = df.sort_values(by=sort)
     if index:
         df = df.set_index(index)
@@ -43,7 +360,7 @@ def _read_files(files, sort: str = None, index: str = None, **kwargs):
 
 def _read_folder(path: str, extension: str = '.csv',
                 sort: str = None, **kwargs):
-    files = glob.glob(os.path.join(path, '*' + extension))
+    files = sorted(glob.glob(os.path.join(path, '*' + extension)))
     if files:
         return _read_files(files, sort, **kwargs)
     print('No files found in', path)
@@ -57,16 +374,15 @@ def read_folder(path: str, schema: RadarSchema = None,
         if schema is None:
             return argdict
         cols = schema.get_col_names()
-        argdict['dtype'] = {col:dtype for col, dtype in
-                            zip(cols, schema.get_col_numpy_types())
-                            if col not in TIME_COLS}
-        argdict['usecols'] = cols
-
-        time_columns = TIME_COLS
+        time_columns = list(TIME_COLS)
         if spec is not None:
             time_columns = list(set((*TIME_COLS, *spec.time_columns())))
-        argdict['parse_dates'] = time_columns
-        argdict['date_parser'] = date_parser
+        # Timestamps are read as floats and converted per file by _read_file
+        argdict['dtype'] = {col: np.float64 if col in time_columns else dtype
+                            for col, dtype in
+                            zip(cols, schema.get_col_numpy_types())}
+        argdict['usecols'] = cols
+        argdict['time_columns'] = [col for col in time_columns if col in cols]
         return argdict
 
     argdict = schema_spec_kwargs(schema, specification)
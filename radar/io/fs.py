@@ -2,8 +2,10 @@ import os
 import glob
 from collections import Counter
 from ..common import AttrRecDict
-from .csv import CsvTable
-from .generic import ProjectIO, ParticipantIO, ParticipantData
+from .csv import CsvTable, TIME_EXTENT_CACHE
+from .cache import FolderCache, CachedTable
+from .manifest import ProjectManifest
+from .generic import ProjectIO, ParticipantIO, ParticipantData, LazyData
 
 """
 File system project IO.
@@ -19,6 +21,7 @@ class ProjectFolder(ProjectIO):
         self.name = kwargs['name'] if 'name' in kwargs else \
                     os.path.split(self.path)[1]
         self.parent = kwargs.get('parent')
+        self._manifest = kwargs.get('manifest')
         self.subprojects = AttrRecDict()
         participants = kwargs.get('participants')
         self.participants = AttrRecDict() if participants is None \
@@ -56,11 +59,12 @@ class ProjectFolder(ProjectIO):
 
     def get_participants(self, *args, **kwargs):
         ptcs = AttrRecDict()
-        participant_names = [f for f in listfolders(self.path)
+        participant_names = [f for f in listfolders(self.path, self._manifest)
                              if f not in self.subprojects]
         paths = [os.path.join(self.path, name) for name in participant_names]
         for i, name in enumerate(participant_names):
             ptcs[name] = ParticipantFolder(folder_path=paths[i], name=name,
+                                           manifest=self._manifest,
                                            *args, **kwargs)
         return ptcs
 
@@ -82,12 +86,16 @@ class ParticipantFolder(ParticipantIO):
         self._subdirs = kwargs.get('subdirs')
         if self._subdirs is None:
             self._subdirs = []
+        self._cache = kwargs.get('cache')
+        if isinstance(self._cache, str):
+            self._cache = FolderCache(self._cache)
+        self._manifest = kwargs.get('manifest')
         self.data = self.get_data_dict()
         self.info = {}
 
     def get_data_dict(self, filetypes=None, subdirs=None, **kwargs):
         """ Returns a dictionary of data modality objects within the participant
-        folder.
+        folder. Modality objects are loaded lazily, on first access.
 
         Input
         _______
@@ -106,11 +114,12 @@ class ParticipantFolder(ParticipantIO):
         def get_folders(path, subdirs):
             if subdirs is None:
                 subdirs = []
-            folders = listfolders(path)
+            folders = listfolders(path, self._manifest)
             for sd in subdirs:
                 if sd not in folders:
                     continue
-                for modal in listfolders(os.path.join(path, sd)):
+                for modal in listfolders(os.path.join(path, sd),
+                                         self._manifest):
                     folders.append(os.path.join(sd, modal))
 
             return [f for f in folders if f not in subdirs]
@@ -122,13 +131,15 @@ class ParticipantFolder(ParticipantIO):
                     if name not in whitelist:
                         continue
                 key = os.path.basename(name)
-                modalities[key] = data_loader(where, name, data_funcs)
+                modalities[key] = LazyData(data_loader, where, name,
+                                           data_funcs)
             return modalities
 
         def data_loader(where, name, data_funcs):
-            files = listfiles(os.path.join(where, name))
-            if 'schema.json' in files:
-                files.remove('schema.json')
+            files = listfiles(os.path.join(where, name), self._manifest)
+            for f in ('schema.json', TIME_EXTENT_CACHE):
+                if f in files:
+                    files.remove(f)
             filetype = determine_filetype(files)
             if filetype in data_funcs:
                 return data_funcs[filetype](where, name)
@@ -161,37 +172,69 @@ class ParticipantFolder(ParticipantIO):
                               whitelist=kwargs.get('whitelist'))
 
     def _load_csv(self, where, name):
+        if self._cache is not None:
+            return CachedTable(where, name, cache=self._cache)
         return CsvTable(where, name)
 
     def _load_csvgz(self, where, name):
+        if self._cache is not None:
+            return CachedTable(where, name, cache=self._cache,
+                               compression='gzip')
         return CsvTable(where, name, compression='gzip')
 
     def _load_imec(self, where, name):
         return 0
 
 
-def listdir_conditional(path, conditional):
+def listdir_entries(path, conditional):
     """
-    Function that returns a list of paths relative to the input path if the
-    conditional function called on the full path evaluates to True
+    Function that returns a list of names within the given path if the
+    conditional function called on the os.DirEntry evaluates to True. Uses
+    os.scandir, so file types are usually known without a stat call.
     """
-    pathstr = '' if path is None else path
-    return [f for f in os.listdir(path) if
-            conditional(os.path.join(pathstr, f))]
+    with os.scandir(path) as it:
+        return [entry.name for entry in it if conditional(entry)]
 
-def listfolders(path=None):
+def listfolders(path=None, manifest=None):
     """
     Returns a list of relative paths to folders within the given path. If path
-    is not given, uses the current working directory.
+    is not given, uses the current working directory. If a ProjectManifest is
+    given, its cached listing is used.
     """
-    return listdir_conditional(path, os.path.isdir)
+    if manifest is not None:
+        return manifest.listfolders(path)
+    return listdir_entries(path, os.DirEntry.is_dir)
 
-def listfiles(path=None):
+def listfiles(path=None, manifest=None):
     """
     Returns a list of relative paths to files within the given path. If path
-    is not given, uses the current working directory.
+    is not given, uses the current working directory. If a ProjectManifest is
+    given, its cached listing is used.
     """
-    return listdir_conditional(path, os.path.isfile)
-
-def open_project_folder(folder, *args, **kwargs):
-    return ProjectFolder(folder, *args, **kwargs)
+    if manifest is not None:
+        return manifest.listfiles(path)
+    return listdir_entries(path, os.DirEntry.is_file)
+
+def open_project_folder(folder, *args, manifest=False, **kwargs):
+    """ Opens a filesystem project folder.
+    Parameters
+    __________
+    folder: str
+        The project folder path
+    manifest: bool
+        Whether to use a ProjectManifest stored in the project root. The
+        manifest is created on first open, which lists and stats every file
+        in the project; on re-opening only directories whose mtime has
+        changed are listed again. Default False, when opening only lists the
+        project and participant folders.
+    Returns
+    _______
+    project: ProjectFolder
+    """
+    if not manifest:
+        return ProjectFolder(folder, *args, **kwargs)
+    manifest = ProjectManifest(folder)
+    manifest.refresh()
+    project = ProjectFolder(folder, *args, manifest=manifest, **kwargs)
+    manifest.save()
+    return project
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os
+from ..common import LazyData
 
 class ProjectIO():
     pass
@@ -10,12 +11,37 @@ class ParticipantIO():
 
 
 class ParticipantData(dict):
+    """ A dictionary of participant data objects. LazyData values are
+    loaded and replaced on first access.
+    """
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, LazyData):
+            value = value()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
     def __repr__(self):
         return 'Participant data tables:\n' + ', '.join(list(self.keys()))
 
     def available(self):
         print(self.__repr__())
 
+    def loaded(self):
+        """ Returns a list of keys whose data has already been loaded
+        """
+        return [key for key in self.keys() if not
+                isinstance(dict.__getitem__(self, key), LazyData)]
+
 
 class RadarTable():
     def __init__(self, where, name, **kwargs):
@@ -1,17 +1,48 @@
 #!/usr/bin/env python3
 import os
+import json
 import tables
+from contextlib import contextmanager
 import numpy as np
 import pandas as pd
-from ..common import obj_col_names, progress_bar, AttrRecDict
-from ..defaults import _FILTER
+import dask.dataframe as dd
+from dask.utils import SerializableLock
+from ..common import obj_col_names, progress_bar, AttrRecDict, LazyData
+from ..defaults import _FILTER, _CHUNK_SECONDS, _MIN_CHUNK_BYTES, \
+                       _MAX_CHUNK_BYTES, _EXPECTED_DURATION, TIME_COLS
 from .generic import ParticipantData
+from .swmr import FileLock, hdf5_file_locking_disabled, HDF5_LOCKING_ENV
 
 SPEC_HDF_TYPE = {
     'TIMESTAMP': tables.Int64Col(),
     'DURATION': tables.Int64Col(),
 }
 
+# Summary pyramid levels, and the group under which they are stored (mirroring
+# the path of the summarised node)
+PYRAMID_LEVELS = ('1s', '10s', '1min', '10min')
+PYRAMID_ROOT = '/_pyramid'
+PYRAMID_STATS = ('min', 'max', 'mean')
+# Default minimum number of points returned by read_summary
+MIN_SUMMARY_POINTS = 2000
+
+# Default RadarDataGroup column chunk length used by BufferedAppender
+DEFAULT_CHUNK_ROWS = 4096
+
+# Arrays of a delta encoded time column (see DeltaTimeColumn)
+DELTA_NODES = ('anchor_rows', 'anchor_values', 'exception_rows',
+               'exception_values')
+
+# Table under the root holding the RADAR index: the path and RADAR_TYPE ('' if
+# none) of each child of the root and of each subproject group
+INDEX_NODE = '_radar_index'
+
+# Root attribute holding the per-modality filter profile (JSON)
+FILTER_PROFILE_ATTR = 'FILTER_PROFILE'
+
+# HDF5 is not thread safe, so dask partitions are read one at a time
+_HDF5_LOCK = SerializableLock()
+
 NP_HDF_CONVERTERS = {
     '<M8[ns]': lambda x=None: 'int64',
     '|O': lambda x: 'S' + str(max(map(len, x))),
@@ -22,54 +53,251 @@ class ProjectFile(tables.File):
     """ HDF5 file for a RADAR project. Subclass of tables.File TODO
     Parameters
     __________
+    swmr: bool
+        Open the file for single writer, multiple reader access across
+        processes (see radar.io.swmr). One process may open the file for
+        writing, and must make all its writes within ProjectFile.writing(),
+        which holds off readers and flushes on exit; writing or flushing
+        outside it raises a RuntimeError. Readers in other processes see the flushed rows
+        after ProjectFile.refresh(), or on entering ProjectFile.reading().
+        HDF5 file locking would stop readers opening the file alongside the
+        writer, so swmr requires HDF5_USE_FILE_LOCKING=FALSE to be set before
+        HDF5 is loaded (e.g. in the environment of each process).
     See Also
     ________
     tables.File : For more information on the PyTables File object
     """
 
     def __init__(self, filename, mode='r', title='', root_uep='/',
-                 filters=_FILTER, subprojects=None, **kwargs):
-        super(ProjectFile, self).__init__(filename=filename, mode=mode,
-                                          title=title, root_uep=root_uep,
-                                          filters=filters, **kwargs)
-        self.data = ProjectGroup(self.root)
+                 filters=_FILTER, subprojects=None, swmr=False, **kwargs):
+        open_kwargs = dict(filename=filename, title=title,
+                           root_uep=root_uep, filters=filters, **kwargs)
+        if not swmr:
+            super(ProjectFile, self).__init__(mode=mode, **open_kwargs)
+            self._lock = None
+            self._load_index()
+            return
+
+        if not hdf5_file_locking_disabled():
+            raise RuntimeError(
+                'SWMR access requires HDF5 file locking to be turned off: '
+                'set {}=FALSE before HDF5 is loaded'.format(HDF5_LOCKING_ENV))
+        lock = FileLock(filename)
+        try:
+            if mode != 'r':
+                lock.claim_writer()
+            with lock.exclusive() if lock.writer else lock.shared():
+                super(ProjectFile, self).__init__(mode=mode, **open_kwargs)
+                self._lock = lock
+                self._open_kwargs = open_kwargs
+                self._generation = lock.generation()
+                self._load_index()
+        except Exception:
+            lock.close()
+            raise
+
+    def flush(self):
+        """ Flushes the file. A SWMR writer may only flush within
+        ProjectFile.writing(), and signals readers that new data is available.
+        """
+        if self._lock is None or not self._lock.writer:
+            self._store_index()
+            return super(ProjectFile, self).flush()
+        _require_writing(self)
+        self._store_index()
+        super(ProjectFile, self).flush()
+        self._generation = self._lock.advance()
+
+    def close(self):
+        if not self.isopen:
+            return
+        lock = getattr(self, '_lock', None)
+        if lock is None:
+            self._store_index()
+            return super(ProjectFile, self).close()
+        if lock.writer:
+            with lock.exclusive():
+                self._store_index()
+                super(ProjectFile, self).close()
+                lock.advance()
+        else:
+            super(ProjectFile, self).close()
+        lock.close()
+
+    def refresh(self):
+        """ Reopens a SWMR reader if the writer has flushed since it was
+        opened, so that new rows are visible. Nodes taken from the file before
+        refreshing are closed and must be taken again (e.g. from self.data).
+        Returns
+        _______
+        refreshed: bool
+            Whether the file was reopened
+        """
+        lock = getattr(self, '_lock', None)
+        if lock is None or lock.writer:
+            return False
+        with lock.shared():
+            generation = lock.generation()
+            if generation == self._generation:
+                return False
+            open_kwargs = self._open_kwargs
+            # tables.File.close clears the instance dictionary
+            tables.File.close(self)
+            tables.File.__init__(self, mode='r', **open_kwargs)
+            self._lock = lock
+            self._open_kwargs = open_kwargs
+            self._generation = generation
+            self._load_index()
+        return True
+
+    @contextmanager
+    def reading(self):
+        """ Context manager for SWMR readers. Refreshes the file, and holds off
+        the writer's flushes until exit so that reads are consistent.
+        """
+        if self._lock is None:
+            yield self
+            return
+        with self._lock.shared():
+            self.refresh()
+            yield self
+
+    @contextmanager
+    def writing(self):
+        """ Context manager for a SWMR writer's batch of writes, which a SWMR
+        writer must make all its writes within. Readers are held off until the
+        writes are flushed on exit.
+        """
+        if self._lock is None:
+            yield self
+            self.flush()
+            return
+        with self._lock.exclusive():
+            yield self
+            self.flush()
+
+    def update_radar_index(self):
+        """ Rebuilds the RADAR index of subprojects and participants from the
+        file's nodes and reloads the project tree. Groups added or removed
+        are detected when the file is opened, but this is needed after a
+        group has its RADAR_TYPE changed outside of this object.
+        """
+        _require_writing(self)
+        self._load_index(rebuild=True)
+
+    def _load_index(self, rebuild=False):
+        """ Loads the RADAR index and builds the project tree (self.data) """
+        self._index_entries = _index_entries(self.root, rebuild=rebuild)
+        self._index_changed = False
+        self.data = ProjectGroup(self.root,
+                                 index=_nested_index(self._index_entries, '/'))
+
+    def _store_index(self):
+        """ Stores the RADAR index if groups have been registered since it
+        was loaded (see _register_data_node)
+        """
+        if getattr(self, '_index_changed', False) and self.mode != 'r':
+            _store_index_entries(self.root, self._index_entries)
+            self._index_changed = False
+
+    def filter_profile(self):
+        """ Returns the per-modality filter profile stored in the file
+        Returns
+        _______
+        profile: dict
+            {modality name: tables.Filters}
+        """
+        if FILTER_PROFILE_ATTR not in self.root._v_attrs:
+            return {}
+        profile = json.loads(self.root._v_attrs[FILTER_PROFILE_ATTR])
+        return {name: tables.Filters(**f) for name, f in profile.items()}
+
+    def set_filter_profile(self, profile, update=True):
+        """ Stores the filters to use for new tables and data groups of each
+        modality, applied by create_radar_table and create_radar_data_group
+        when no filters are given. See radar.io.compression for choosing them.
+        Parameters
+        __________
+        profile: dict
+            {modality name: tables.Filters}
+        update: bool
+            Whether to update the stored profile rather than replace it
+        """
+        stored = self.filter_profile() if update else {}
+        stored.update(profile)
+        self.root._v_attrs[FILTER_PROFILE_ATTR] = json.dumps(
+            {name: _filters_dict(f) for name, f in stored.items()})
+
+    def modality_filters(self, name):
+        """ Returns the filters for a modality from the filter profile, or the
+        file's default filters.
+        """
+        return self.filter_profile().get(name, self.filters)
 
     def create_radar_data_group(self, where, name, description=None, title='',
-                                filters=_FILTER, createparents=True, obj=None,
+                                filters=None, createparents=True, obj=None,
                                 **kwargs):
         """ Create a new radar data group
         Parameters
         __________
+        filters: tables.Filters (optional)
+            The filters for the group's columns. By default, those of the
+            modality in the file's filter profile, or the file's filters.
 
         See also
         ________
         """
+        _require_writing(self)
         parentnode = self._get_or_create_path(where, createparents)
+        if filters is None:
+            filters = self.modality_filters(name)
         tables.file._checkfilters(filters)
         new = name not in parentnode
         ptobj = RadarDataGroup(parentnode, name, title=title,
                                filters=filters, new=new, **kwargs)
-        if obj:
+        if new:
+            _register_data_node(ptobj)
+        if obj is not None:
             ptobj.append_dataframe(obj)
         return ptobj
 
     def create_radar_table(self, where, name, description=None, title='',
-                     filters=_FILTER, expectedrows=1000000,
+                     filters=None, expectedrows=None,
                      chunkshape=None, byteorder=None,
-                     createparents=True, obj=None):
+                     createparents=True, obj=None, overwrite=False,
+                     index_columns=None, frequency=None, duration=None,
+                     specification=None):
         """ Create a new radar table
-        Essentially a copy of tables.File.create_table()
+        Essentially a copy of tables.File.create_table(). If obj is a
+        DataFrame, the numpy dtype of each column is stored in the table
+        attribute 'np_dtypes' so that it can be restored on read.
         Parameters
         __________
+        filters: tables.Filters (optional)
+            The table filters. By default, those of the modality in the file's
+            filter profile, or the file's filters.
+        index_columns: str or list (optional)
+            Column name(s) to create a completely sorted index (CSI) on, e.g.
+            'value.time', for fast RadarTable.time_slice queries.
+        frequency: float (optional)
+            The sample rate (Hz) of the data. Taken from the specification
+            if not given. Used to set chunkshape and expectedrows, if they
+            are not given, with chunk_policy.
+        duration: float (optional)
+            The expected recording duration (s). Default 28 days.
+        specification: radar.util.specifications.ModalitySpec (optional)
+            The modality specification, used for its sample rate.
         See also
         ________
         tables.File.create_table()
         """
+        _require_writing(self)
+        np_dtypes = None
         if obj is not None:
             if isinstance(obj, np.ndarray):
                 pass
             elif isinstance(obj, pd.DataFrame):
-                obj = self
+                obj, np_dtypes = _df_to_usable(obj)
             else:
                 raise TypeError('Invalid obj type %r' %obj)
             descr, _ = tables.description.descr_from_dtype(obj.dtype)
@@ -81,14 +309,39 @@ class ProjectFile(tables.File):
         parentnode = self._get_or_create_path(where, createparents)
         if description is None:
             raise ValueError('No description provided')
+        if filters is None:
+            filters = self.modality_filters(name)
         tables.file._checkfilters(filters)
+        if frequency is None and specification is not None:
+            frequency = specification.frequency()
+        if frequency is not None and (chunkshape is None or
+                                      expectedrows is None):
+            rowsize = tables.description.dtype_from_descr(description).itemsize
+            policy_rows, policy_chunks = chunk_policy(frequency, rowsize,
+                                                      duration=duration)
+            expectedrows = policy_rows if expectedrows is None else \
+                           expectedrows
+            chunkshape = policy_chunks if chunkshape is None else chunkshape
+        if expectedrows is None:
+            expectedrows = 1000000
+        if overwrite and name in parentnode:
+            parentnode._f_get_child(name)._f_remove(recursive=True)
 
         ptobj = RadarTable(parentnode, name, description=description,
                            title=title, filters=filters,
                            expectedrows=expectedrows, chunkshape=chunkshape,
                            byteorder=byteorder)
+        if np_dtypes is not None:
+            ptobj._v_attrs.np_dtypes = np_dtypes
+        _register_data_node(ptobj)
         if obj is not None:
             ptobj.append(obj)
+        if index_columns is not None:
+            if isinstance(index_columns, str):
+                index_columns = [index_columns]
+            for col in index_columns:
+                ptobj.colinstances[col].create_csindex()
+        return ptobj
 
     def create_table_schema(self, where, name, schema, createparents=True,
                             **kwargs):
@@ -99,6 +352,14 @@ class ProjectFile(tables.File):
         self.create_radar_table(where, name, description=description,
                                 createparents=createparents, **kwargs)
 
+    def build_pyramid(self, node, levels=PYRAMID_LEVELS, **kwargs):
+        """ Builds min/max/mean summaries of a RadarTable or RadarDataGroup
+        at several time resolutions. See radar.io.hdf5.build_pyramid.
+        """
+        if isinstance(node, str):
+            node = self.get_node(node)
+        return build_pyramid(node, levels=levels, **kwargs)
+
     def save_dataframe(self, df, where, name, source_type='DATA', **kwargs):
         """Add a pandas dataframe to an entrypoint in the hdf5 file
         """
@@ -109,12 +370,17 @@ class ProjectFile(tables.File):
         return table
 
 class ProjectGroup():
-    """
+    """ The subprojects and participants of a RADAR project file or subproject
+    group. The tree is built from the file's RADAR index (see radar_index),
+    and participant groups are only loaded from the file when first accessed.
     """
     def __init__(self, hdf, **kwargs):
         if isinstance(hdf, tables.link.ExternalLink):
             hdf = hdf()
         self._hdf = hdf
+        self._index = kwargs.get('index')
+        if self._index is None:
+            self._index = radar_index(hdf)
 
         subprojects = kwargs.get('subprojects')
         self.subprojects = {} if subprojects is None else subprojects
@@ -133,29 +399,38 @@ class ProjectGroup():
 
     def get_subprojects(self):
         sp = AttrRecDict()
-        for name, child in self._hdf._v_children.items():
-            if isinstance(child, tables.link.Link):
-                child = child()
-            if not hasattr(child._v_attrs, 'RADAR_TYPE'):
-                continue
-            if child._v_attrs.RADAR_TYPE == 'SUBPROJECT':
+        for name, entry in self._index.items():
+            if entry['type'] == 'SUBPROJECT':
                 self.participants[name] = AttrRecDict()
-                sp[name] = ProjectGroup(child, participants=self.participants[name],
+                sp[name] = ProjectGroup(self._hdf._f_get_child(name),
+                                        participants=self.participants[name],
+                                        index=entry['children'],
                                         name=name, parent=self)
         return sp
 
     def get_participants(self):
         ptcs = AttrRecDict()
-        for name, child in self._hdf._v_children.items():
-            if isinstance(child, tables.link.Link):
-                child = child()
-            if not hasattr(child._v_attrs, 'RADAR_TYPE'):
-                continue
-            if child._v_attrs.RADAR_TYPE == 'PARTICIPANT':
-                child.__class__ = ParticipantGroup
-                ptcs[name] = child
+        for name, entry in self._index.items():
+            if entry['type'] == 'PARTICIPANT':
+                ptcs[name] = LazyData(_load_participant, self._hdf, name)
         return ptcs
 
+    def _add_index_entry(self, name, entry):
+        """ Adds a subproject or participant group registered since the tree
+        was built (see _register_data_node)
+        """
+        if entry['type'] == 'SUBPROJECT':
+            self._index[name] = entry
+            self.participants[name] = AttrRecDict()
+            self.subprojects[name] = ProjectGroup(
+                self._hdf._f_get_child(name),
+                participants=self.participants[name],
+                index=entry['children'], name=name, parent=self)
+        elif entry['type'] == 'PARTICIPANT':
+            self._index[name] = entry
+            self.participants[name] = LazyData(_load_participant, self._hdf,
+                                               name)
+
     def create_subproject(self, where, name):
         pass
 
@@ -170,7 +445,7 @@ class ParticipantGroup(tables.Group):
     """
     def __init__(self, *args, **kwargs):
         super(ParticipantGroup, self).__init__(*args, **kwargs)
-        self._dict = get_data_dict()
+        self._dict = self.get_data_dict()
 
     def get_data_dict(self):
         data_dict = ParticipantData()
@@ -189,14 +464,142 @@ class RadarTable(tables.Table):
     """ A Pytables table object for use with RADAR participant data.
     """
     def append_dataframe(self, df, *args, **kwargs):
-        df = _df_to_usable(df)
+        df, _ = _df_to_usable(df)
         self.append(df, *args, **kwargs)
 
+    def append(self, rows):
+        _require_writing(self._v_file)
+        super(RadarTable, self).append(rows)
+
     def __getitem__(self, key):
         df = super(RadarTable, self).__getitem__(key)
         df = pd.DataFrame.from_records(df)
         return df
 
+    def appender(self, **kwargs):
+        """ Returns a BufferedAppender for the table. See BufferedAppender.
+        """
+        return BufferedAppender(self, **kwargs)
+
+    def _np_dtypes(self):
+        if 'np_dtypes' in self._v_attrs:
+            return self._v_attrs.np_dtypes
+        return {}
+
+    def _searchsorted(self, value, column='value.time', side='left'):
+        """ Binary search of a sorted column on disk, reading one row per
+        step rather than the whole column.
+        """
+        return _bisect(lambda i: self.read(i, i + 1)[column][0], self.nrows,
+                       value, side)
+
+    def _time_rows(self, start_time=None, stop_time=None,
+                   time_column='value.time'):
+        """ Returns the (start, stop) rows spanning a time range (inclusive)
+        in a table sorted by time. Uses the column's index if it has one,
+        otherwise a binary search.
+        """
+        dtype = self.coldtypes[time_column]
+        start_time = None if start_time is None else \
+                     _as_column_type(start_time, dtype)
+        stop_time = None if stop_time is None else \
+                    _as_column_type(stop_time, dtype)
+        if self.colindexed[time_column] and \
+           not (start_time is None and stop_time is None):
+            conditions, condvars = [], {'t': self.colinstances[time_column]}
+            if start_time is not None:
+                conditions.append('(t >= t0)')
+                condvars['t0'] = start_time
+            if stop_time is not None:
+                conditions.append('(t <= t1)')
+                condvars['t1'] = stop_time
+            coords = self.get_where_list(' & '.join(conditions),
+                                         condvars=condvars, sort=True)
+            if len(coords) == 0:
+                return 0, 0
+            return int(coords[0]), int(coords[-1]) + 1
+        start = 0 if start_time is None else \
+                self._searchsorted(start_time, time_column, side='left')
+        stop = self.nrows if stop_time is None else \
+               self._searchsorted(stop_time, time_column, side='right')
+        return start, stop
+
+    def time_slice(self, start=None, end=None, columns=None,
+                   time_column='value.time'):
+        """ Reads the rows between two times (inclusive) from a table sorted
+        by time. Only the rows in the window are read, so the cost is
+        proportional to the window rather than the table size.
+        Parameters
+        __________
+        start, end: datetime-like (optional)
+            The window start and end
+        columns: list or str (optional)
+            The column name(s) to read. All columns by default.
+        time_column: str
+            The time column. Default 'value.time'
+        Returns
+        _______
+        df: pandas.DataFrame
+        """
+        start, stop = self._time_rows(start, end, time_column)
+        return self.read_columns(columns, start, stop)
+
+    def read_summary(self, start=None, end=None, columns=None, **kwargs):
+        """ Reads a time window from the coarsest stored summary level with
+        enough points, or the raw data. See radar.io.hdf5.read_summary.
+        """
+        return read_summary(self, start, end, columns, **kwargs)
+
+    def read_columns(self, columns=None, start=None, stop=None, step=None,
+                     time_range=None, time_column='value.time'):
+        """ Reads the given columns into a DataFrame, column by column.
+        Rows are read as records in blocks of the table's buffer size
+        (nrowsinbuf) and the requested fields copied out, so memory use is
+        that of the requested columns and one block. Datetime and string
+        columns written from a DataFrame are returned with their original
+        dtypes.
+        Parameters
+        __________
+        columns: list or str (optional)
+            The column name(s) to read. All columns by default.
+        start, stop, step: int (optional)
+            The row range to read
+        time_range: tuple (optional)
+            A (start, stop) pair of datetimes. Rows are found by index or
+            binary search of the (sorted) time column, and override start and
+            stop.
+        time_column: str
+            The time column used with time_range. Default 'value.time'
+        Returns
+        _______
+        df: pandas.DataFrame
+        """
+        if columns is None:
+            columns = self.colnames
+        elif isinstance(columns, str):
+            columns = [columns]
+        if time_range is not None:
+            start, stop = self._time_rows(*time_range, time_column=time_column)
+        np_dtypes = self._np_dtypes()
+        rows = range(*slice(start, stop, step).indices(self.nrows))
+        data = {col: np.empty(len(rows), dtype=self.coldtypes[col])
+                for col in columns}
+        # Table.read(field=...) has a fixed cost of tens of milliseconds per
+        # call (see scripts/benchmarks/hdf5_columnar_read.py), whereas reads
+        # of whole records of consecutive rows are as fast as the chunks can
+        # be decompressed
+        block = max(self.nrowsinbuf // abs(rows.step), 1)
+        for i in range(0, len(rows), block):
+            part = rows[i:i + block]
+            lo, hi = min(part[0], part[-1]), max(part[0], part[-1]) + 1
+            records = self.read(lo, hi)[part[0] - lo::part.step]
+            for col in columns:
+                data[col][i:i + len(part)] = records[col]
+        for col in columns:
+            if col in np_dtypes:
+                data[col] = _restore_dtype(data[col], np_dtypes[col])
+        return pd.DataFrame(data, columns=columns, copy=False)
+
 
 class RadarDataGroup(tables.Group):
     """ A Group object for storing RADAR data.
@@ -214,7 +617,7 @@ class RadarDataGroup(tables.Group):
     def __init__(self, parentnode, name, filters=_FILTER,
                  obj=None, overwrite=False, **kwargs):
         super(RadarDataGroup, self).__init__(parentnode, name,
-                                             filters=_FILTER, **kwargs)
+                                             filters=filters, **kwargs)
         if obj is not None:
             self.insert_dataframe(obj, overwrite=overwrite)
 
@@ -288,8 +691,9 @@ class RadarDataGroup(tables.Group):
         """
         cols, index = self._item_parse(item)
         dtypes = self._col_dtypes(cols)
-        return pd.DataFrame({c: self._f_get_child(c)[index]
-                             for c in cols}).astype(dtypes)
+        return pd.DataFrame({c: _restore_dtype(self._column(c)[index],
+                                               dtypes.get(c))
+                             for c in cols})
 
     def __setitem__(self, item, df):
         """Sets the column(s) at the given index to the values in the given
@@ -326,46 +730,1057 @@ class RadarDataGroup(tables.Group):
         for col in cols:
             self._f_get_child(col)[index] = df[col].values
 
-    def insert_dataframe(self, df, overwrite=False, attrs=None):
+    def _column(self, name):
+        """ Returns a column node, or a DeltaTimeColumn for a delta encoded
+        time column.
+        """
+        node = self._f_get_child(name)
+        if isinstance(node, tables.Group) and \
+           getattr(node._v_attrs, 'RADAR_ENCODING', None) == 'delta':
+            # Kept so that lookups share the column's cached arrays
+            columns = self.__dict__.setdefault('_v_delta_columns', {})
+            column = columns.get(name)
+            if column is None or column._group is not node:
+                column = columns[name] = DeltaTimeColumn(node)
+            return column
+        return node
+
+    def insert_dataframe(self, df, overwrite=False, attrs=None,
+                         delta_times=None):
+        """ Inserts each column of a DataFrame as a new column
+        Parameters
+        __________
+        delta_times: dict (optional)
+            {column name: sample interval (s)} of time columns to store with
+            insert_delta_times.
+        """
+        delta_times = {} if delta_times is None else delta_times
         for col in obj_col_names(df):
-            self.insert_array(df[col].values, name=col, attrs=attrs)
+            if col in delta_times:
+                self.insert_delta_times(df[col].values, col,
+                                        delta_times[col], overwrite=overwrite)
+            else:
+                self.insert_array(df[col].values, name=col,
+                                  overwrite=overwrite, attrs=attrs)
 
-    def append_dataframe(self, df, create_columns=True):
+    def append_dataframe(self, df, create_columns=True, delta_times=None):
+        """ Appends each column of a DataFrame
+        Parameters
+        __________
+        create_columns: bool
+            Whether to create columns that do not exist yet
+        delta_times: dict (optional)
+            {column name: sample interval (s)} of time columns to create
+            with insert_delta_times.
+        """
+        delta_times = {} if delta_times is None else delta_times
         for col in obj_col_names(df):
             self.append_array(df[col].values, name=col,
-                              create_column=create_columns)
+                              create_column=create_columns,
+                              interval=delta_times.get(col))
 
-    def insert_array(self, arr, name, overwrite=False, attrs=None):
+    def insert_delta_times(self, arr, name, interval, overwrite=False,
+                           max_exceptions=0.1):
+        """ Inserts a time column of regularly sampled data as a delta encoded
+        column (see DeltaTimeColumn) rather than a full array. If more than a
+        fraction max_exceptions of the times differ from the regular sequence
+        the column is stored as a normal array instead.
+        Parameters
+        __________
+        arr: numpy.ndarray
+            Times as datetime64[ns], int64 ns or float seconds
+        name: str
+            The column name
+        interval: float
+            The nominal sample interval in seconds
+        overwrite: bool
+            Whether to replace an existing column
+        max_exceptions: float
+            The maximum fraction of times not in the regular sequence
+        Returns
+        _______
+        encoded: bool
+            Whether the column was delta encoded
+        """
+        _require_writing(self._v_file)
+        values, dt = _hdf_compatible(np.asarray(arr))
+        if values.dtype.kind not in 'if':
+            raise TypeError('Cannot delta encode {} values'.format(dt))
+        interval = interval if values.dtype.kind == 'f' else interval * 1e9
+        encoded = delta_encode(values, interval)
+        if len(encoded[2]) > max_exceptions * len(values):
+            self.insert_array(arr, name, overwrite=overwrite)
+            return False
         if name in self._v_children:
             if overwrite:
-                self._hdf._f_getChild(name).remove()
+                self._f_get_child(name)._f_remove(recursive=True)
             else:
                 raise ValueError(('There is already a column "{}" in table'
                                   '{}'.format(name, self._v_name)))
+        group = self._v_file.create_group(self, name, title=name)
+        attrs = group._v_attrs
+        attrs.RADAR_ENCODING = 'delta'
+        attrs.np_dtype = dt
+        attrs.interval = interval
+        attrs.nrows = 0
+        for node, dtype in zip(DELTA_NODES, (np.int64, values.dtype,
+                                             np.int64, values.dtype)):
+            self._v_file.create_earray(group, node,
+                                       atom=tables.Atom.from_dtype(
+                                           np.dtype(dtype)),
+                                       shape=(0,))
+        DeltaTimeColumn(group)._write(values, encoded)
+        return True
 
-        dt = arr.dtype.str
-        if attrs is not None:
-            attrs['np_dtype'] = dt
-        else:
-            attrs = {'np_dtype': dt}
-        if dt in NP_HDF_TYPES:
-            arr = arr.astype(NP_HDF_TYPES[dt])
+    def insert_array(self, arr, name, overwrite=False, attrs=None,
+                     chunkshape=None):
+        _require_writing(self._v_file)
+        if name in self._v_children:
+            if overwrite:
+                self._f_get_child(name)._f_remove(recursive=True)
+            else:
+                raise ValueError(('There is already a column "{}" in table'
+                                  '{}'.format(name, self._v_name)))
+
+        arr, dt = _hdf_compatible(arr)
+        attrs = {} if attrs is None else dict(attrs)
+        attrs.setdefault('np_dtype', dt)
 
-        self._v_file.create_earray(self, name=name, title=name, obj=arr)
+        self._v_file.create_earray(self, name=name, title=name, obj=arr,
+                                   chunkshape=chunkshape)
         for k, v in attrs.items():
             setattr(self._f_get_child(name)._v_attrs, k, v)
 
-    def append_array(self, arr, name, create_column=True):
+    def append_array(self, arr, name, create_column=True, interval=None):
+        _require_writing(self._v_file)
         if name not in self._v_children:
-            if create_column:
-                self.insert_array(arr, name)
-            else:
+            if not create_column:
                 raise ValueError(('There is no such column {} '
                                   'and create_column is set to '
                                   'False'.format(name)))
+            elif interval is not None:
+                self.insert_delta_times(arr, name, interval)
+            else:
+                self.insert_array(arr, name)
+        else:
+            self._column(name).append(_hdf_compatible(arr)[0])
+
+    def appender(self, **kwargs):
+        """ Returns a BufferedAppender for the group. See BufferedAppender.
+        """
+        return BufferedAppender(self, **kwargs)
+
+    def _time_rows(self, start_time=None, stop_time=None,
+                   time_column='value.time'):
+        """ Returns the (start, stop) rows spanning a time range (inclusive)
+        by binary search of a sorted time column.
+        """
+        col = self._column(time_column)
+        start = 0 if start_time is None else \
+                _bisect(col.__getitem__, col.nrows,
+                        _as_column_type(start_time, col.atom.dtype), 'left')
+        stop = col.nrows if stop_time is None else \
+               _bisect(col.__getitem__, col.nrows,
+                       _as_column_type(stop_time, col.atom.dtype), 'right')
+        return start, stop
+
+    def time_slice(self, start=None, end=None, columns=None,
+                   time_column='value.time'):
+        """ Reads the rows between two times (inclusive) from a group whose
+        time column is sorted.
+        Parameters
+        __________
+        start, end: datetime-like (optional)
+            The window start and end
+        columns: list or str (optional)
+            The column name(s) to read. All columns by default.
+        time_column: str
+            The time column. Default 'value.time'
+        Returns
+        _______
+        df: pandas.DataFrame
+        """
+        start, stop = self._time_rows(start, end, time_column)
+        if columns is None:
+            return self[start:stop]
+        if isinstance(columns, str):
+            columns = [columns]
+        return self[list(columns), start:stop]
+
+    def read_summary(self, start=None, end=None, columns=None, **kwargs):
+        """ Reads a time window from the coarsest stored summary level with
+        enough points, or the raw data. See radar.io.hdf5.read_summary.
+        """
+        return read_summary(self, start, end, columns, **kwargs)
+
+    def to_dask(self, columns=None, chunks_per_partition=1,
+                time_column='value.time'):
+        """ Returns the group as a lazily read dask DataFrame.
+        Each partition holds a whole number of chunks of the column arrays. If
+        the group has a sorted time column it is used as a DatetimeIndex with
+        known divisions, so time selections only read the partitions needed.
+        Parameters
+        __________
+        columns: list (optional)
+            The columns to read. All columns by default.
+        chunks_per_partition: int
+            The number of time column chunks in each partition. Default 1.
+        time_column: str
+            The time column. Default 'value.time'
+        Returns
+        _______
+        df: dask.dataframe.DataFrame
+        """
+        all_columns = _node_columns(self)
+        columns = all_columns if columns is None else list(columns)
+        indexed = time_column in all_columns
+        ref = self._column(time_column if indexed else columns[0])
+        nrows = min(self._column(c).nrows for c in
+                    columns + ([time_column] if indexed else []))
+        step = ref.chunkshape[0] * chunks_per_partition
+        starts = list(range(0, nrows, step)) or [0]
+        rows = [(start, min(start + step, nrows)) for start in starts]
+
+        kwargs = {'filename': self._v_file.filename,
+                  'path': self._v_pathname,
+                  'columns': columns,
+                  'time_column': time_column if indexed else None}
+        meta = _read_group_partition((0, 0), **kwargs)
+        if not indexed:
+            divisions = starts + [max(nrows - 1, 0)]
+        elif nrows:
+            divisions = _time_divisions(ref, starts, nrows)
+        else:
+            divisions = None
+        return dd.from_map(_read_group_partition, rows, meta=meta,
+                           divisions=divisions, **kwargs)
+
+
+class DeltaTimeColumn():
+    """ A RadarDataGroup time column of regularly sampled data, stored as
+    segments of a regular sequence and a sparse list of exceptions:
+    - anchor_rows/anchor_values: the row and time at which each regular
+      segment starts (the first row, and the row after each gap)
+    - exception_rows/exception_values: the times that differ from their
+      segment's regular sequence (jitter)
+    The time of row i in a segment starting at row r with time t is
+    t + (i - r) * interval, unless it is an exception. Times are rebuilt only
+    for the rows that are read, and exactly match the written values.
+    Parameters
+    __________
+    group: tables.Group
+        The group written by RadarDataGroup.insert_delta_times
+    """
+    def __init__(self, group):
+        self._group = group
+        self._v_attrs = group._v_attrs
+        self._v_name = group._v_name
+        self.interval = group._v_attrs.interval
+        self.dtype = group._f_get_child('anchor_values').atom.dtype
+        self.atom = tables.Atom.from_dtype(self.dtype)
+        # Partitions and appends follow the chunks of the other columns
+        sibling = next((c for c in group._v_parent._f_iter_nodes()
+                        if isinstance(c, tables.EArray)), None)
+        self.chunkshape = (DEFAULT_CHUNK_ROWS,) if sibling is None else \
+                          sibling.chunkshape
+        self._cache = None
+
+    def __repr__(self):
+        return 'Delta encoded time column {} ({} rows)'.format(
+            self._group._v_pathname, self.nrows)
+
+    def __len__(self):
+        return self.nrows
+
+    @property
+    def nrows(self):
+        return int(self._v_attrs.nrows)
+
+    def _arrays(self):
+        """ The anchor and exception arrays, read once and kept until the
+        column is appended to
+        """
+        if self._cache is None:
+            self._cache = [self._group._f_get_child(n).read()
+                           for n in DELTA_NODES]
+        return self._cache
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self.read_rows(np.array([key]))[0]
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.nrows)
+            if step == 1:
+                return self.read(start, stop)
+            return self.read_rows(np.arange(start, stop, step))
+        return self.read_rows(np.asarray(key))
+
+    def read(self, start=0, stop=None):
+        """ Returns the times of rows start to stop
+        """
+        stop = self.nrows if stop is None else min(stop, self.nrows)
+        stop = max(start, stop)
+        anchor_rows, anchor_values, exc_rows, exc_values = self._arrays()
+        values = np.empty(stop - start, dtype=self.dtype)
+        first, last = np.searchsorted(anchor_rows, [start, stop], 'right') - 1
+        for seg in range(max(first, 0), last + 1):
+            seg_start = max(anchor_rows[seg], start)
+            seg_stop = stop if seg == len(anchor_rows) - 1 else \
+                       min(anchor_rows[seg + 1], stop)
+            if seg_stop > seg_start:
+                values[seg_start - start:seg_stop - start] = _delta_predict(
+                    anchor_rows[seg:seg + 1], anchor_values[seg:seg + 1],
+                    self.interval, np.arange(seg_start, seg_stop))
+        lo, hi = np.searchsorted(exc_rows, [start, stop])
+        values[exc_rows[lo:hi] - start] = exc_values[lo:hi]
+        return values
+
+    def read_rows(self, rows):
+        """ Returns the times of the given rows
+        """
+        if (rows < 0).any():
+            rows = np.where(rows < 0, rows + self.nrows, rows)
+        anchor_rows, anchor_values, exc_rows, exc_values = self._arrays()
+        values = _delta_predict(anchor_rows, anchor_values, self.interval,
+                                rows)
+        idx = np.searchsorted(exc_rows, rows)
+        hit = idx < len(exc_rows)
+        hit[hit] = exc_rows[idx[hit]] == rows[hit]
+        values[hit] = exc_values[idx[hit]]
+        return values
+
+    def append(self, values):
+        """ Appends times, continuing the last regular segment if they follow
+        on from it.
+        """
+        values = np.asarray(values, dtype=self.dtype)
+        if not len(values):
+            return
+        n = self.nrows
+        if n == 0:
+            encoded = delta_encode(values, self.interval)
+        else:
+            anchor_rows, anchor_values = self._arrays()[:2]
+            anchor = (anchor_rows[-1], anchor_values[-1])
+            encoded = delta_encode(values, self.interval, start_row=n,
+                                   anchor=anchor, last=self[n - 1])
+        self._write(values, encoded)
+
+    def _write(self, values, encoded):
+        for name, arr in zip(DELTA_NODES, encoded):
+            if len(arr):
+                self._group._f_get_child(name).append(arr)
+        self._v_attrs.nrows = self.nrows + len(values)
+        self._cache = None
+
+
+class BufferedAppender():
+    """ A context manager that collects appended rows in preallocated column
+    buffers and writes them to a RadarTable or RadarDataGroup in whole,
+    chunk-aligned blocks, rather than one small write per appended frame.
+    Example:
+        with table.appender() as app:
+            for df in frames:
+                app.append(df)
+    Parameters
+    __________
+    node: RadarTable or RadarDataGroup
+        The node to append to
+    chunks_per_block: int
+        The number of chunks written per block. Default 8.
+    chunk_rows: int (optional)
+        The chunk length, for RadarDataGroup columns that do not exist yet.
+        Taken from the table or existing columns otherwise. Default 4096.
+    Notes
+    _____
+    String buffers have the length of the existing column, or the longest
+    string in the first appended frame; longer strings are truncated.
+    """
+    def __init__(self, node, chunks_per_block=8, chunk_rows=None):
+        self.node = node
+        self._is_table = isinstance(node, tables.Table)
+        self._chunks_per_block = chunks_per_block
+        self._chunk_rows = chunk_rows
+        self._buffers = None
+        self._np_dtypes = {}
+        self._n = 0
+        self._nrows = 0
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    def _allocate(self, obj):
+        names = obj_col_names(obj)
+        if self._is_table:
+            chunk_rows = self.node.chunkshape[0]
+            self._nrows = self.node.nrows
+            self._buffers = np.zeros(chunk_rows * self._chunks_per_block,
+                                     dtype=self.node.dtype)
+            self._np_dtypes = self.node._np_dtypes()
+        else:
+            existing = [self.node._column(c) for c in names
+                        if c in self.node._v_children]
+            if existing:
+                chunk_rows = existing[0].chunkshape[0]
+                self._nrows = existing[0].nrows
+            else:
+                chunk_rows = self._chunk_rows or DEFAULT_CHUNK_ROWS
+            block_rows = chunk_rows * self._chunks_per_block
+            self._buffers = {}
+            for col in names:
+                if col in self.node._v_children:
+                    colnode = self.node._column(col)
+                    dtype = colnode.atom.dtype
+                    self._np_dtypes[col] = getattr(colnode._v_attrs,
+                                                   'np_dtype', dtype.str)
+                else:
+                    arr, self._np_dtypes[col] = \
+                        _hdf_compatible(_column_array(obj, col))
+                    dtype = arr.dtype
+                self._buffers[col] = np.empty(block_rows, dtype=dtype)
+        self._chunk_rows = chunk_rows
+        self._block_rows = chunk_rows * self._chunks_per_block
+
+    def _capacity(self):
+        # The first block is shortened so later blocks start on a chunk
+        # boundary
+        return self._block_rows - (self._nrows % self._chunk_rows)
+
+    def append(self, obj):
+        """ Appends a DataFrame or numpy record array
+        """
+        if self._buffers is None:
+            self._allocate(obj)
+        columns = {col: _hdf_compatible(_column_array(obj, col))[0]
+                   for col in obj_col_names(obj)}
+        length = len(obj)
+        i = 0
+        while i < length:
+            j = min(length, i + self._capacity() - self._n)
+            for col, arr in columns.items():
+                self._buffers[col][self._n:self._n + j - i] = arr[i:j]
+            self._n += j - i
+            i = j
+            if self._n == self._capacity():
+                self.flush()
+
+    def flush(self):
+        """ Writes any buffered rows
+        """
+        if not self._n:
+            return
+        _require_writing(self.node._v_file)
+        if self._is_table:
+            self.node.append(self._buffers[:self._n])
         else:
-            self._f_get_child(name).append(arr)
+            for col, buf in self._buffers.items():
+                if col in self.node._v_children:
+                    self.node._column(col).append(buf[:self._n])
+                else:
+                    self.node.insert_array(
+                        buf[:self._n], col,
+                        attrs={'np_dtype': self._np_dtypes[col]},
+                        chunkshape=(self._chunk_rows,))
+        self._nrows += self._n
+        self.rows_written += self._n
+        self._n = 0
+
+
+def chunk_policy(frequency, rowsize, duration=None,
+                 chunk_seconds=_CHUNK_SECONDS,
+                 min_chunk_bytes=_MIN_CHUNK_BYTES,
+                 max_chunk_bytes=_MAX_CHUNK_BYTES):
+    """ Returns the expected rows and chunkshape for a table of regularly
+    sampled data, so that each chunk holds about chunk_seconds of samples,
+    within a range of chunk sizes.
+    Parameters
+    __________
+    frequency: float
+        The sample rate (Hz)
+    rowsize: int
+        The size of a table row in bytes
+    duration: float (optional)
+        The expected recording duration (s). Default 28 days.
+    chunk_seconds: float
+        The target duration of samples per chunk. Default 60 s.
+    min_chunk_bytes: int
+        The minimum chunk size, for low frequency data. Default 16 KB.
+    max_chunk_bytes: int (optional)
+        The maximum chunk size, for high frequency data, or None for no
+        maximum. Default 128 KB.
+    Returns
+    _______
+    expectedrows: int
+    chunkshape: tuple
+    """
+    if duration is None:
+        duration = _EXPECTED_DURATION
+    chunk_rows = int(round(frequency * chunk_seconds))
+    if max_chunk_bytes is not None:
+        chunk_rows = min(chunk_rows, max_chunk_bytes // rowsize)
+    chunk_rows = max(chunk_rows, -(-min_chunk_bytes // rowsize), 1)
+    expectedrows = max(int(frequency * duration), chunk_rows)
+    return expectedrows, (chunk_rows,)
+
+def build_pyramid(node, levels=PYRAMID_LEVELS, columns=None,
+                  time_column='value.time', block_rows=1000000):
+    """ Builds min/max/mean summaries of the numeric columns of a RadarTable
+    or RadarDataGroup at several time resolutions. Each level is stored as a
+    RadarTable named 'level_<resolution>' under PYRAMID_ROOT + the node's
+    path, with columns 'time' (bin start), 'count', and '<column>.min',
+    '<column>.max', '<column>.mean' for each column. Bins are aligned to the
+    epoch. The node is read in blocks, and must be sorted by time.
+    Parameters
+    __________
+    node: RadarTable or RadarDataGroup
+    levels: list
+        Resolutions as pandas Timedelta strings. Default 1s, 10s, 1min, 10min
+    columns: list (optional)
+        The columns to summarise. All numeric, non-time columns by default.
+    time_column: str
+        The time column. Default 'value.time'
+    block_rows: int
+        The number of rows read at a time
+    Returns
+    _______
+    levels: list
+        The created summary tables
+    """
+    if columns is None:
+        columns = _summary_columns(node, time_column)
+    levels = sorted(levels, key=lambda l: pd.Timedelta(l).value)
+    resolutions = [pd.Timedelta(l).value for l in levels]
+    nrows = _node_len(node, time_column)
+
+    parts, carry = [], None
+    for start in range(0, nrows, block_rows):
+        df = _read_node(node, [time_column] + columns, start,
+                        min(start + block_rows, nrows))
+        vals = df[columns].to_numpy(np.float64)
+        agg = _reduce_bins(_time_ns(df[time_column]) // resolutions[0],
+                           np.ones(len(df), dtype=np.int64),
+                           vals, vals, vals)
+        if carry is not None:
+            agg = _reduce_bins(*(np.concatenate((c, a))
+                                 for c, a in zip(carry, agg)))
+        # The final bin may continue into the next block
+        parts.append(tuple(a[:-1] for a in agg))
+        carry = tuple(a[-1:] for a in agg)
+    if carry is not None:
+        parts.append(carry)
+    if not parts:
+        return []
+    agg = tuple(np.concatenate(a) for a in zip(*parts))
+
+    where = PYRAMID_ROOT + node._v_pathname
+    tabs = []
+    for i, (level, res) in enumerate(zip(levels, resolutions)):
+        if i > 0:
+            agg = _reduce_bins(agg[0] * resolutions[i - 1] // res, *agg[1:])
+        bins, count, vmin, vmax, vsum = agg
+        data = {'time': pd.to_datetime(bins * res), 'count': count}
+        for j, col in enumerate(columns):
+            data[col + '.min'] = vmin[:, j].astype(np.float32)
+            data[col + '.max'] = vmax[:, j].astype(np.float32)
+            data[col + '.mean'] = (vsum[:, j] / count).astype(np.float32)
+        tab = ProjectFile.create_radar_table(
+            node._v_file, where, 'level_' + level, obj=pd.DataFrame(data),
+            overwrite=True, createparents=True)
+        tab._v_attrs.RADAR_TYPE = 'PYRAMID'
+        tab._v_attrs.resolution = res
+        tabs.append(tab)
+    return tabs
+
+def read_summary(node, start=None, end=None, columns=None,
+                 min_points=MIN_SUMMARY_POINTS, time_column='value.time'):
+    """ Reads a time window of a RadarTable or RadarDataGroup from the
+    coarsest summary level (see build_pyramid) that still gives at least
+    min_points bins over the window, or from the raw data if no level does.
+    Parameters
+    __________
+    node: RadarTable or RadarDataGroup
+    start, end: datetime-like (optional)
+        The window. The node's first/last times by default.
+    columns: list or str (optional)
+        Data column names. All summarised columns by default.
+    min_points: int
+        The minimum number of points wanted over the window
+    time_column: str
+        The raw data time column. Default 'value.time'
+    Returns
+    _______
+    df: pandas.DataFrame
+        Indexed by time. Summary levels have '<column>.min', '<column>.max'
+        and '<column>.mean' columns; raw data has the columns themselves.
+    """
+    if isinstance(columns, str):
+        columns = [columns]
+    first, last = _node_time_extent(node, time_column)
+    start = first if start is None else pd.Timestamp(start)
+    end = last if end is None else pd.Timestamp(end)
+    span = (end - start).value
+
+    for level in reversed(_pyramid_levels(node)):
+        if span // level._v_attrs.resolution < min_points:
+            continue
+        level_cols = None
+        if columns is not None:
+            level_cols = ['time', 'count'] + ['{}.{}'.format(c, stat) for c
+                                              in columns for stat in
+                                              PYRAMID_STATS]
+        df = level.time_slice(start, end, level_cols, time_column='time')
+        return df.set_index('time')
+
+    raw_cols = None if columns is None else [time_column] + list(columns)
+    df = node.time_slice(start, end, raw_cols, time_column=time_column)
+    return df.set_index(time_column)
+
+def _pyramid_levels(node):
+    """ Returns the summary tables of a node, finest first
+    """
+    where = PYRAMID_ROOT + node._v_pathname
+    if where not in node._v_file:
+        return []
+    levels = []
+    for child in node._v_file.get_node(where)._f_iter_nodes():
+        if isinstance(child, tables.Table) and \
+           'resolution' in child._v_attrs:
+            child.__class__ = RadarTable
+            levels.append(child)
+    return sorted(levels, key=lambda l: l._v_attrs.resolution)
+
+def _reduce_bins(bins, count, vmin, vmax, vsum):
+    """ Combines consecutive rows of partial aggregates in the same bin
+    """
+    if len(bins) == 0:
+        return bins, count, vmin, vmax, vsum
+    starts = np.r_[0, np.flatnonzero(np.diff(bins)) + 1]
+    return (bins[starts],
+            np.add.reduceat(count, starts),
+            np.minimum.reduceat(vmin, starts, axis=0),
+            np.maximum.reduceat(vmax, starts, axis=0),
+            np.add.reduceat(vsum, starts, axis=0))
+
+def _time_ns(col):
+    """ Returns a time column as int64 ns since the epoch
+    """
+    arr = np.asarray(col)
+    if arr.dtype.kind == 'M':
+        return arr.astype('M8[ns]').view(np.int64)
+    elif arr.dtype.kind == 'f':
+        return (arr * 1e9).astype(np.int64)
+    return arr.astype(np.int64)
+
+def _node_columns(node):
+    if isinstance(node, tables.Table):
+        return list(node.colnames)
+    return [c._v_name for c in node._f_iter_nodes()]
+
+def _node_len(node, time_column):
+    if isinstance(node, tables.Table):
+        return node.nrows
+    return node._column(time_column).nrows
+
+def _read_node(node, columns, start, stop):
+    if isinstance(node, tables.Table):
+        return node.read_columns(columns, start, stop)
+    return node[list(columns), start:stop]
+
+def _read_group_partition(rows, filename, path, columns, time_column=None):
+    """ Reads rows of a RadarDataGroup for RadarDataGroup.to_dask, through an
+    open handle on the file if there is one, or a new read-only handle.
+    """
+    start, stop = rows
+    columns = list(columns)
+    read_columns = columns if time_column is None or time_column in columns \
+                   else columns + [time_column]
+    with _HDF5_LOCK:
+        handles = tables.file._open_files.get_handlers_by_name(filename)
+        if handles:
+            df = _read_group_rows(next(iter(handles)), path, read_columns,
+                                  start, stop)
+        else:
+            with tables.open_file(filename, mode='r') as h5:
+                df = _read_group_rows(h5, path, read_columns, start, stop)
+    if time_column is None:
+        df.index = pd.RangeIndex(start, stop)
+    else:
+        df.index = pd.to_datetime(_time_ns(df[time_column]))
+    return df[columns]
+
+def _read_group_rows(h5, path, columns, start, stop):
+    group = h5.get_node(path)
+    group.__class__ = RadarDataGroup
+    return group[list(columns), start:stop]
+
+def _time_divisions(col, starts, nrows):
+    """ Returns the times at partition boundaries of a time column, or None if
+    the column is not sorted across the boundaries.
+    """
+    bounds = np.array(starts[1:], dtype=np.int64)
+    times = _time_ns(col[np.concatenate([[0], bounds - 1, bounds,
+                                         [nrows - 1]])])
+    first, before, after, last = np.split(times, [1, 1 + len(bounds),
+                                                  1 + 2 * len(bounds)])
+    divisions = np.concatenate([first, after, last])
+    if (before >= after).any() or (np.diff(divisions) < 0).any():
+        return None
+    return list(pd.to_datetime(divisions))
+
+def _node_time_extent(node, time_column):
+    n = _node_len(node, time_column)
+    times = pd.concat([_read_node(node, [time_column], 0, 1),
+                       _read_node(node, [time_column], n - 1, n)])
+    times = pd.to_datetime(_time_ns(times[time_column]))
+    return times[0], times[-1]
+
+def _summary_columns(node, time_column):
+    """ Returns the numeric, non-time columns of a node
+    """
+    if isinstance(node, tables.Table):
+        np_dtypes = node._np_dtypes()
+        dtypes = {c: np.dtype(np_dtypes.get(c, node.coldtypes[c]))
+                  for c in node.colnames}
+    else:
+        dtypes = {c: np.dtype(d) for c, d in
+                  node._col_dtypes(_node_columns(node)).items()}
+        dtypes.update({c._v_name: c.atom.dtype for c in node._f_iter_nodes()
+                       if c._v_name not in dtypes})
+    return [c for c, d in dtypes.items()
+            if d.kind in 'biuf' and c != time_column and c not in TIME_COLS]
+
+def _bisect(read_row, nrows, value, side='left'):
+    """ Binary search of a sorted on-disk column, given a function that
+    reads a single row.
+    """
+    lo, hi = 0, nrows
+    while lo < hi:
+        mid = (lo + hi) // 2
+        x = read_row(mid)
+        if x < value or (side == 'right' and x == value):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def delta_encode(values, interval, tolerance=None, start_row=0, anchor=None,
+                 last=None):
+    """ Encodes times as segments of a regular sequence and exceptions.
+    A new segment starts wherever the step from the previous time differs
+    from the interval by more than the tolerance (a gap); other times that
+    differ from their segment's sequence are exceptions.
+    Parameters
+    __________
+    values: numpy.ndarray
+        Times as int64 or float64, in the units of the interval
+    interval: float
+        The sample interval
+    tolerance: float (optional)
+        The largest step error that is not a gap. Half the interval by
+        default.
+    start_row: int
+        The row number of the first value, when appending
+    anchor: tuple (optional)
+        The (row, time) of the current segment, when appending
+    last: number (optional)
+        The last time written, when appending
+    Returns
+    _______
+    anchor_rows, anchor_values, exception_rows, exception_values: ndarray
+        The new segments and exceptions
+    """
+    if not len(values):
+        empty = np.array([], dtype=np.int64)
+        return empty, values, empty, values
+    tolerance = interval / 2 if tolerance is None else tolerance
+    rows = np.arange(start_row, start_row + len(values))
+    steps = np.diff(values) if last is None else \
+            np.diff(np.concatenate([[last], values]))
+    breaks = np.flatnonzero(np.abs(steps - interval) > tolerance)
+    breaks = breaks + 1 if last is None else breaks
+    if anchor is None:
+        breaks = np.concatenate([[0], breaks]).astype(np.int64)
+        anchor_rows, anchor_values = breaks + start_row, values[breaks]
+        all_rows, all_values = anchor_rows, anchor_values
+    else:
+        anchor_rows, anchor_values = breaks + start_row, values[breaks]
+        all_rows = np.concatenate([[anchor[0]], anchor_rows])
+        all_values = np.concatenate([[anchor[1]], anchor_values])
+    predicted = _delta_predict(all_rows, all_values.astype(values.dtype),
+                               interval, rows)
+    exceptions = np.flatnonzero(predicted != values)
+    return (anchor_rows.astype(np.int64), anchor_values,
+            exceptions + start_row, values[exceptions])
+
+def _delta_predict(anchor_rows, anchor_values, interval, rows):
+    """ Returns the regular sequence times of rows
+    """
+    segment = np.searchsorted(anchor_rows, rows, side='right') - 1
+    steps = rows - anchor_rows[segment]
+    if anchor_values.dtype.kind == 'f':
+        return anchor_values[segment] + steps * interval
+    if float(interval).is_integer():
+        return anchor_values[segment] + steps * np.int64(interval)
+    return anchor_values[segment] + np.rint(steps * interval).astype(np.int64)
+
+def _filters_dict(filters):
+    """ Returns the keyword arguments to recreate a tables.Filters
+    """
+    return {'complib': filters.complib, 'complevel': filters.complevel,
+            'shuffle': filters.shuffle, 'bitshuffle': filters.bitshuffle,
+            'fletcher32': filters.fletcher32}
+
+def _column_array(obj, col):
+    """ Returns a column of a DataFrame or numpy record array as an array
+    """
+    if isinstance(obj, np.ndarray):
+        return obj[col]
+    return obj[col].to_numpy()
+
+def _hdf_compatible(arr):
+    """ Converts an array to a HDF5 compatible type: datetimes (of any unit)
+    to int64 nanoseconds and objects (strings) to fixed length bytes.
+    Returns
+    _______
+    arr: numpy.ndarray
+        The converted array
+    dtype: str
+        The original numpy dtype string
+    """
+    if arr.dtype.kind == 'M' and arr.dtype != np.dtype('M8[ns]'):
+        # e.g. datetime64[us], from pandas >= 3 date_range or to_datetime
+        arr = arr.astype('M8[ns]')
+    dt = arr.dtype.str
+    if dt in NP_HDF_CONVERTERS:
+        if dt == '|O':
+            arr = arr.astype(str)
+        arr = arr.astype(NP_HDF_CONVERTERS[dt](arr))
+    return arr, dt
+
+def _df_to_usable(df):
+    """ Converts a DataFrame to a numpy record array of HDF5 compatible types.
+    Parameters
+    __________
+    df: pandas.DataFrame
+    Returns
+    _______
+    arr: numpy.recarray
+        The data with datetimes as int64 and strings as fixed length bytes
+    np_dtypes: dict
+        The original numpy dtype string of each converted column
+    """
+    arrays, np_dtypes = [], {}
+    names = obj_col_names(df)
+    for col in names:
+        arr, dt = _hdf_compatible(_column_array(df, col))
+        if dt in NP_HDF_CONVERTERS:
+            np_dtypes[col] = dt
+        arrays.append(arr)
+    return np.rec.fromarrays(arrays, names=names), np_dtypes
+
+def _restore_dtype(arr, dtype):
+    """ Restores the numpy dtype of an array converted by _df_to_usable.
+    Datetimes are returned as a view, without a copy.
+    """
+    if dtype == '<M8[ns]':
+        return arr.view('M8[ns]')
+    elif dtype == '|O':
+        return arr.astype(str).astype(object)
+    return arr
+
+def _as_column_type(value, dtype):
+    """ Converts a time to the stored type of a time column for comparison
+    """
+    if dtype.kind == 'M':
+        return pd.Timestamp(value).to_datetime64()
+    elif dtype.kind == 'i':
+        return pd.Timestamp(value).value
+    elif dtype.kind == 'f' and not isinstance(value, (int, float)):
+        return pd.Timestamp(value).timestamp()
+    return value
+
+def radar_index(node, rebuild=False):
+    """ Returns the RADAR index of a project file or subproject group: a nested
+    dictionary of {name: {'type': RADAR_TYPE, 'children': {...}}} for each
+    subproject and participant group below the node.
+    The index of a file is stored in the table INDEX_NODE, with a row for
+    each child of the root and of each subproject group, so that opening a
+    project does not need to load every group in the file. If the table is
+    missing, rebuild is True, or groups have since been added or removed, the
+    index is built by walking the file and stored when the file is writable.
+    Parameters
+    __________
+    node: tables.Group
+        The root or a subproject group
+    rebuild: bool
+        Whether to ignore a stored index
+    Returns
+    _______
+    index: dict
+    """
+    entries = _index_entries(node._v_file.root, rebuild=rebuild)
+    if node._v_pathname not in entries:
+        return _nested_index(_walk_index_entries(node), '/')
+    return _nested_index(entries, node._v_pathname)
+
+def _require_writing(h5file):
+    """ Raises a RuntimeError if h5file is a SWMR writer (see ProjectFile)
+    writing outside of ProjectFile.writing(), where readers could see the
+    file part way through a write.
+    """
+    lock = getattr(h5file, '_lock', None)
+    if lock is not None and lock.writer and not lock.holds_exclusive():
+        raise RuntimeError('SWMR writes to {} must be made within '
+                           'ProjectFile.writing()'.format(h5file.filename))
+
+def _register_data_node(node):
+    """ Adds the groups above a newly written table or data group to the
+    RADAR index of its ProjectFile and to the file's data tree, if they are
+    not in it already. The index is stored when the file is flushed or
+    closed. Nodes directly under the root or under internal groups (named
+    '_...', e.g. PYRAMID_ROOT) are not registered.
+    """
+    h5 = node._v_file
+    entries = getattr(h5, '_index_entries', None)
+    parts = list(filter(None, node._v_parent._v_pathname.split('/')))
+    if entries is None or not parts or \
+            any(name.startswith('_') for name in parts):
+        return
+    group, path, tree = h5.root, '/', h5.data
+    for name in parts:
+        children = entries[path]
+        group = _get_child(group, name)
+        path = _join_path(path, name)
+        radar_type = children.get(name)
+        if not radar_type:
+            # New, or not yet given a RADAR_TYPE when last registered
+            radar_type = _radar_type(group)
+            if children.get(name) != radar_type:
+                children[name] = radar_type
+                if radar_type == 'SUBPROJECT':
+                    entries.update(_walk_index_entries(group, path))
+                    entry = {'type': radar_type,
+                             'children': _nested_index(entries, path)}
+                else:
+                    entry = {'type': radar_type}
+                tree._add_index_entry(name, entry)
+                h5._index_changed = True
+        if radar_type != 'SUBPROJECT':
+            break
+        tree = tree.subprojects[name]
+
+def _index_entries(root, rebuild=False):
+    """ Loads the stored RADAR index of a file, or walks the file if it is
+    missing or out of date (storing it when the file is writable).
+    Returns
+    _______
+    entries: dict
+        {group path: {child name: RADAR_TYPE or ''}} for the root and each
+        subproject group
+    """
+    entries = None if rebuild else _read_index_entries(root)
+    if entries is None or not _index_is_current(root, entries):
+        entries = _walk_index_entries(root)
+        if root._v_file.mode != 'r':
+            _store_index_entries(root, entries)
+    return entries
+
+def _read_index_entries(root):
+    if INDEX_NODE not in root:
+        return None
+    entries = {'/': {}}
+    for path, radar_type in root._f_get_child(INDEX_NODE).read():
+        path, radar_type = path.decode('utf-8'), radar_type.decode('utf-8')
+        parent, name = path.rsplit('/', 1)
+        entries.setdefault(parent or '/', {})[name] = radar_type
+        if radar_type == 'SUBPROJECT':
+            entries.setdefault(path, {})
+    return entries
+
+def _store_index_entries(root, entries):
+    rows = [(_join_path(path, name).encode('utf-8'),
+             radar_type.encode('utf-8'))
+            for path, children in sorted(entries.items())
+            for name, radar_type in sorted(children.items())]
+    itemsizes = [max([len(row[i]) for row in rows] + [1]) for i in (0, 1)]
+    obj = np.array(rows, dtype=[('path', 'S{}'.format(itemsizes[0])),
+                                ('type', 'S{}'.format(itemsizes[1]))])
+    if INDEX_NODE in root:
+        root._f_get_child(INDEX_NODE)._f_remove()
+    root._v_file.create_table(root, INDEX_NODE, obj=obj,
+                              title='RADAR index')
+
+def _index_children(group):
+    """ Names of the children of a group that may be subprojects or
+    participants, i.e. excluding internal nodes such as PYRAMID_ROOT
+    """
+    return sorted(name for name in group._v_children
+                  if not name.startswith('_'))
+
+def _index_is_current(root, entries):
+    """ Whether the children of the groups of a stored index are unchanged """
+    for path, children in entries.items():
+        group = root
+        try:
+            for name in filter(None, path.split('/')):
+                group = _get_child(group, name)
+        except tables.NoSuchNodeError:
+            return False
+        if _index_children(group) != sorted(children):
+            return False
+    return True
+
+def _walk_index_entries(group, path='/'):
+    """ Index entries (see _index_entries) of a group and the subproject
+    groups below it, where the group is at path
+    """
+    entries = {}
+    def walk(group, path):
+        children = entries[path] = {}
+        for name in _index_children(group):
+            child = _get_child(group, name)
+            children[name] = _radar_type(child)
+            if children[name] == 'SUBPROJECT':
+                walk(child, _join_path(path, name))
+    walk(group, path)
+    return entries
+
+def _nested_index(entries, path):
+    """ The nested index (see radar_index) of the group at path """
+    index = {}
+    for name, radar_type in entries[path].items():
+        if radar_type == 'SUBPROJECT':
+            index[name] = {'type': radar_type, 'children':
+                           _nested_index(entries, _join_path(path, name))}
+        elif radar_type == 'PARTICIPANT':
+            index[name] = {'type': radar_type}
+    return index
+
+def _radar_type(node):
+    if not isinstance(node, tables.Group) or \
+       'RADAR_TYPE' not in node._v_attrs:
+        return ''
+    return str(node._v_attrs.RADAR_TYPE)
+
+def _join_path(path, name):
+    return path.rstrip('/') + '/' + name
+
+def _get_child(group, name):
+    child = group._f_get_child(name)
+    if isinstance(child, tables.link.Link):
+        child = child()
+    return child
 
+def _load_participant(group, name):
+    child = group._f_get_child(name)
+    if isinstance(child, tables.link.Link):
+        child = child()
+    child.__class__ = ParticipantGroup
+    return child
 
 def open_project_file(filename, mode='r', title='', root_uep='/',
                       filters=_FILTER, **kwargs):
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
+import bisect
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import h5py
-from radar.util.common import PD_HDF_TYPES
 
 STATIC_LEN_STR_FIELDS = (
     'key.projectId',
@@ -10,41 +11,370 @@ STATIC_LEN_STR_FIELDS = (
     'key.sourceId',
 )
 
+# Source datasets are created with at least MIN_ROWS rows, grow by
+# GROWTH_FACTOR when full, and are chunked by CHUNK_ROWS
+MIN_ROWS = 4096
+GROWTH_FACTOR = 2
+CHUNK_ROWS = 4096
+
+# Lookup tables of dictionary encoded string columns are stored in this
+# subgroup of each source. String columns with at most CATEGORY_FRACTION
+# unique values per row (and key columns) are dictionary encoded, until they
+# have more than MAX_CATEGORIES values, when they are stored as plain strings.
+CATEGORY_GROUP = '_categories'
+CATEGORY_FRACTION = 0.5
+MAX_CATEGORIES = 2**16
+
 def hdf_compat_dtypes(data):
     if 'datetime64' in str(data.dtype):
-        d = data.astype(np.int64)
+        d = data.astype('M8[ns]').astype(np.int64)
     elif 'object' in str(data.dtype):
         # if data.name in STATIC_LEN_STR_FIELDS:
-        d = data.astype(np.string_)
+        d = data.astype(np.bytes_)
     else:
         return data
     return d
 
 def append_hdf5(dataframe, hdf5, user_id, schema=None, source=None):
+    """ Appends a DataFrame to the user_id/source group of a file.
+    The SourceWriter of each source is kept on the h5py.File object, so
+    appends through the same object share its cached lookup tables. Call
+    trim_hdf5 when writing is finished to close the writers.
+    """
     if not (schema or source):
         raise ValueError('schema or source key-word argument must be supplied')
     if not source:
-        source = shema.name
+        source = schema.name
 
     if type(dataframe.index) != pd.core.indexes.range.RangeIndex:
         dataframe = dataframe.reset_index(level=0)
 
     h5_data_path = user_id + '/' + source
-    if not h5_data_path in hdf5:
-        hdf5.create_group(h5_data_path)
+    writers = vars(hdf5).setdefault('_source_writers', {})
+    if h5_data_path not in writers:
+        writers[h5_data_path] = SourceWriter(hdf5.require_group(h5_data_path))
+    writers[h5_data_path].append(dataframe)
+
+def trim_hdf5(hdf5):
+    """ Closes the writers kept by append_hdf5, and trims the over-allocated
+    datasets of every source in a file to the number of rows written. See
+    SourceWriter.
+    """
+    for writer in vars(hdf5).pop('_source_writers', {}).values():
+        writer.close()
+    groups = []
+    hdf5.visititems(lambda name, node: groups.append(node)
+                    if isinstance(node, h5py.Group) and 'nrows' in node.attrs
+                    else None)
+    for group in groups:
+        SourceWriter(group).trim()
+
+
+class SourceWriter():
+    """ Appends DataFrames to the column datasets of a user_id/source group.
+    All datasets of the source are resized together, over-allocating by
+    GROWTH_FACTOR so that most appends do not resize. The number of rows
+    written is stored in the group attribute 'nrows' (used by read_hdf5), and
+    trim() cuts the datasets to that length when writing is finished.
+    Key columns and low cardinality string columns are dictionary encoded,
+    as integer codes with a lookup table, and read back as Categoricals.
+    Lookup tables are read once and kept in memory for the writer's
+    lifetime, so a source appended to many times should keep one writer.
+    The writer is a context manager that closes it on exit:
+        with SourceWriter(hdf5.require_group('user/source')) as writer:
+            for df in frames:
+                writer.append(df)
+    Parameters
+    __________
+    group: h5py.Group
+        The source group
+    category_fraction: float
+        The maximum number of unique values per row of a new string column
+        for it to be dictionary encoded
+    max_categories: int
+        The maximum number of values of a dictionary encoded column. Columns
+        passing it are rewritten as plain strings.
+    """
+    def __init__(self, group, category_fraction=CATEGORY_FRACTION,
+                 max_categories=MAX_CATEGORIES):
+        self.group = group
+        self.category_fraction = category_fraction
+        self.max_categories = max_categories
+        self._lookups = {}
+
+    @property
+    def nrows(self):
+        return _group_nrows(self.group)
+
+    def __enter__(self):
+        return self
 
-    for col in dataframe.keys():
-        if col in hdf5[h5_data_path]:
-            append_dataset(hdf5, h5_data_path, col, dataframe[col])
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """ Trims the datasets and drops the cached lookup tables
+        """
+        self.trim()
+        self._lookups = {}
+
+    def _datasets(self):
+        return [node for node in self.group.values()
+                if isinstance(node, h5py.Dataset)]
+
+    def append(self, df):
+        """ Appends the columns of a DataFrame
+        """
+        n, m = self.nrows, len(df)
+        datasets = self._datasets()
+        capacity = min((ds.shape[0] for ds in datasets), default=0)
+        if n + m > capacity:
+            capacity = max(n + m, GROWTH_FACTOR * capacity, MIN_ROWS)
+            for ds in datasets:
+                ds.resize(capacity, axis=0)
+        for col in df.keys():
+            arr = self._encode(col, df[col], capacity)
+            self.group[col][n:n + m] = arr
+        self.group.attrs['nrows'] = n + m
+
+    def trim(self):
+        """ Resizes the datasets to the number of rows written
+        """
+        n = self.nrows
+        for ds in self._datasets():
+            if ds.shape[0] != n:
+                ds.resize(n, axis=0)
+
+    def _encode(self, col, data, capacity):
+        """ Returns a column converted for writing, creating its dataset (and
+        lookup table) if needed
+        """
+        data = pd.Series(data)
+        dtype = str(data.dtype)
+        is_string = data.dtype == np.dtype('O') or \
+                    pd.api.types.is_string_dtype(data.dtype)
+        if col in self.group:
+            ds = self.group[col]
+            if _stored_dtype(ds) == 'category':
+                return self._codes(col, data)
+            elif is_string:
+                return _plain_strings(data)
+            return hdf_compat_dtypes(data).to_numpy()
+
+        kwargs = {'shape': (capacity,), 'maxshape': (None,),
+                  'chunks': (CHUNK_ROWS,)}
+        if is_string and (col in STATIC_LEN_STR_FIELDS or
+                          data.nunique() <= self.category_fraction * len(data)):
+            ds = self.group.create_dataset(col, dtype=np.int32, fillvalue=-1,
+                                           **kwargs)
+            ds.attrs['dtype'] = 'category'
+            return self._codes(col, data)
+        elif is_string:
+            arr = _plain_strings(data)
+            ds = self.group.create_dataset(
+                col, dtype=h5py.string_dtype(), **kwargs)
+            dtype = 'object'
         else:
-            make_dataset(hdf5, h5_data_path, col, dataframe[col])
+            arr = hdf_compat_dtypes(data).to_numpy()
+            ds = self.group.create_dataset(col, dtype=arr.dtype, **kwargs)
+        ds.attrs['dtype'] = dtype
+        return arr
+
+    def _lookup(self, col):
+        """ Returns the lookup table dataset of a column and its values as a
+        pandas.Index, read from the file on first use
+        """
+        lookups = self.group.require_group(CATEGORY_GROUP)
+        if col not in lookups:
+            lookups.create_dataset(col, shape=(0,), maxshape=(None,),
+                                   dtype=h5py.string_dtype(),
+                                   chunks=(CHUNK_ROWS,))
+        if col not in self._lookups:
+            self._lookups[col] = pd.Index(lookups[col].asstr()[:],
+                                          dtype=object)
+        return lookups[col], self._lookups[col]
 
+    def _codes(self, col, data):
+        """ Returns the lookup table codes of string values, adding new values
+        to the table, or the values as plain strings if the column has passed
+        max_categories
+        """
+        lookup, categories = self._lookup(col)
+        values = data.astype(object).where(data.notna(), None)
+        new = pd.unique(values.dropna())
+        new = new[categories.get_indexer(new) == -1]
+        if len(new):
+            if len(categories) + len(new) > self.max_categories:
+                self._to_plain_strings(col)
+                return _plain_strings(data)
+            lookup.resize(len(categories) + len(new), axis=0)
+            lookup[len(categories):] = list(new)
+            categories = categories.append(pd.Index(new, dtype=object))
+            self._lookups[col] = categories
+        return categories.get_indexer(values).astype(np.int32)
 
-def read_hdf5(hdf5, user_id, source_ids='all'):
+    def _to_plain_strings(self, col):
+        """ Rewrites a dictionary encoded column as plain strings, removing
+        its lookup table
+        """
+        ds = self.group[col]
+        written = _read_dataset(ds, 0, self.nrows)
+        capacity = ds.shape[0]
+        del self.group[col]
+        del self.group[CATEGORY_GROUP][col]
+        self._lookups.pop(col, None)
+        ds = self.group.create_dataset(
+            col, shape=(capacity,), maxshape=(None,), chunks=(CHUNK_ROWS,),
+            dtype=h5py.string_dtype())
+        ds[:len(written)] = _plain_strings(pd.Series(written, dtype=object))
+        ds.attrs['dtype'] = 'object'
+
+
+
+def read_hdf5(hdf5, user_id, source_ids='all', columns=None, start=None,
+              end=None, time_column='value.time', workers=None):
+    """ Reads a participant's data written by append_hdf5
+    Parameters
+    __________
+    hdf5: h5py.File or str
+        The open file, or its path
+    user_id: str
+        The participant
+    source_ids: str or list
+        The source name(s) to read, or 'all'
+    columns: list (optional)
+        The columns to read. All columns by default.
+    start, end: datetime-like (optional)
+        The time range (inclusive) to read, found by binary search of the
+        sorted time column
+    time_column: str
+        The time column. Default 'value.time'
+    workers: int (optional)
+        The number of processes to read sources concurrently, each with its
+        own read-only handle to the file (h5py holds a global lock, so
+        threads would read one at a time). An open file must be opened
+        read-only. The frames are copied back from the workers, so this
+        pays off when reads are dominated by decompression rather than by
+        the size of the result. By default sources are read in this
+        process.
+    Returns
+    _______
+    data: pandas.DataFrame or dict
+        A DataFrame for a single source name, or a dictionary of
+        {source: DataFrame} for a list of sources or 'all'
+    """
+    if isinstance(hdf5, str):
+        with h5py.File(hdf5, 'r') as f:
+            return read_hdf5(f, user_id, source_ids, columns, start, end,
+                             time_column, workers)
+    single = isinstance(source_ids, str) and source_ids != 'all'
     if source_ids == 'all':
-        source_ids = list(hdf5['user_id'].keys())
-    df =  -1
-    return df
+        source_ids = list(hdf5[user_id].keys())
+    elif single:
+        source_ids = [source_ids]
+    paths = [user_id + '/' + source for source in source_ids]
+    kwargs = {'columns': columns, 'start': start, 'end': end,
+              'time_column': time_column}
+    if workers is not None and workers > 1 and len(paths) > 1:
+        if hdf5.mode != 'r':
+            raise ValueError('Reading with workers requires the file to be '
+                             'opened read-only')
+        with ProcessPoolExecutor(min(workers, len(paths)),
+                                 initializer=_open_worker_file,
+                                 initargs=(hdf5.filename,)) as pool:
+            dfs = list(pool.map(_read_worker_source, paths,
+                                [kwargs] * len(paths)))
+    else:
+        dfs = [read_source(hdf5[path], **kwargs) for path in paths]
+    if single:
+        return dfs[0]
+    return dict(zip(source_ids, dfs))
+
+def read_source(group, columns=None, start=None, end=None,
+                time_column='value.time'):
+    """ Reads the columns of a source group within a time range
+    Parameters
+    __________
+    group: h5py.Group
+        The user_id/source group
+    columns, start, end, time_column:
+        See read_hdf5
+    Returns
+    _______
+    df: pandas.DataFrame
+    """
+    if columns is None:
+        columns = [name for name, node in group.items()
+                   if isinstance(node, h5py.Dataset)]
+    lo, hi = 0, _group_nrows(group)
+    if start is not None or end is not None:
+        times = group[time_column]
+        dtype = _stored_dtype(times)
+        lo = 0 if start is None else \
+             bisect.bisect_left(times, _time_value(start, dtype), 0, hi)
+        hi = hi if end is None else \
+             bisect.bisect_right(times, _time_value(end, dtype), 0, hi)
+    return pd.DataFrame({col: _read_dataset(group[col], lo, hi)
+                         for col in columns})
+
+# The read-only file handle of a read_hdf5 worker process
+_worker_file = None
+
+def _open_worker_file(filename):
+    global _worker_file
+    _worker_file = h5py.File(filename, 'r')
+
+def _read_worker_source(path, kwargs):
+    return read_source(_worker_file[path], **kwargs)
+
+def _plain_strings(data):
+    """ Returns string values as an object array for a string dataset, with
+    missing values as empty strings
+    """
+    return data.fillna('').astype(str).to_numpy(dtype=object)
+
+def _group_nrows(group):
+    """ Returns the number of rows written to a source group: its 'nrows'
+    attribute, or the length of its first dataset for files written without
+    over-allocation.
+    """
+    if 'nrows' in group.attrs:
+        return int(group.attrs['nrows'])
+    return next((node.shape[0] for node in group.values()
+                 if isinstance(node, h5py.Dataset)), 0)
+
+def _stored_dtype(dataset):
+    if 'dtype' not in dataset.attrs:
+        return str(dataset.dtype)
+    dtype = dataset.attrs['dtype']
+    return dtype.decode() if isinstance(dtype, bytes) else str(dtype)
+
+def _read_dataset(dataset, start=0, stop=None):
+    """ Reads a hyperslab of a dataset and restores its original dtype
+    """
+    dtype = _stored_dtype(dataset)
+    if dtype == 'category':
+        lookup = dataset.parent[CATEGORY_GROUP][dataset.name.split('/')[-1]]
+        return pd.Categorical.from_codes(dataset[start:stop],
+                                         lookup.asstr()[:])
+    if h5py.check_string_dtype(dataset.dtype) is not None:
+        return dataset.asstr()[start:stop]
+    arr = dataset[start:stop]
+    if dtype.startswith('datetime64'):
+        # Written as int64 ns; the stored name may be truncated
+        return arr.view('M8[ns]')
+    elif dtype == 'object':
+        return arr.astype(str).astype(object)
+    return arr.astype(dtype, copy=False)
+
+def _time_value(value, dtype):
+    """ Converts a time to the stored type of a time column for comparison
+    """
+    if dtype.startswith('datetime64') or dtype.startswith('int'):
+        return pd.Timestamp(value).value
+    elif not isinstance(value, (int, float)):
+        return pd.Timestamp(value).timestamp()
+    return value
 
 def make_dataset(hdf5, key, name, data, dtype=None):
     if data.dtype == np.dtype('O') and dtype==None:
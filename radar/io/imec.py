@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
+from fractions import Fraction
 import tables
 import numpy as np
 import pandas as pd
-import dask.array as da
+from scipy import signal
 import matplotlib.pyplot as plt
 
+# Largest denominator of the up/down ratios used for polyphase resampling
+MAX_RESAMPLE_DENOMINATOR = 1000
+
 class Imec(object):
     def __init__(self, imec_file_path):
         self._h5 = tables.File(imec_file_path)
@@ -27,40 +31,161 @@ class Imec(object):
                 'Temp': ['Temp'],
                 }
         self._freqs = {}
-        self._timecols = {}
+        self._timeidx = {}
         for modal, arrs in self.modalities.items():
-            self._timecols[modal] = self._make_timecol(arrs[0])
             self._freqs[modal] = self.signal_freq(arrs[0])
+            self._timeidx[modal] = TimeIndex(self._start_time,
+                                             self._freqs[modal],
+                                             len(self._h5arrs[arrs[0]]))
 
     def signal_freq(self, key):
         return float(getattr(getattr(self._radar.Signal, key)._v_attrs,
                              '#Freq'))
 
-    def _make_timecol(self, arr):
-        col_len = len(self._h5arrs[arr])
-        col_freq = self.signal_freq(arr)
-        chunks = self._h5arrs[arr].chunkshape
-        col = da_date_idx(self._start_time, col_len, col_freq, chunks)
-        return col
+    def close(self):
+        self._h5.close()
+
+    def time_index(self, modality):
+        """ Returns the TimeIndex of the given modality """
+        return self._timeidx[modality]
 
     def get_df(self, modality, index):
-        cols = {'time': self._timecols[modality][index].compute()}
+        cols = {'time': self._timeidx[modality][index]}
         cols.update({name: self._h5arrs[name][index]
                      for name in self.modalities[modality]})
         return pd.DataFrame(cols)
 
     def get_df_time(self, modality, start_time, stop_time, sample_rate=None):
-        dateidx = DateToIdx(self._start_time, self._freqs[modality])
-        start_idx = dateidx(start_time)
-        start_idx = 0 if start_idx < 0 else start_idx
-        stop_idx = dateidx(stop_time)
-        index = slice(start_idx, stop_idx, None)
+        index = self._timeidx[modality].slice(start_time, stop_time)
         df = self.get_df(modality, index)
         df.set_index('time', inplace=True)
         if sample_rate is not None:
-            df = df.resample(sample_rate).pad()
+            df = df.resample(sample_rate).ffill()
         return df
 
+    def iter_windows(self, modality, window, step=None, start_time=None,
+                     stop_time=None, readahead=8):
+        """ Iterates over fixed length windows of a modality's channels.
+        The signals are read in blocks aligned to the HDF5 chunks, reading
+        ahead of the current window, so that overlapping windows are served
+        from the buffer rather than read again.
+        Parameters
+        __________
+        modality: str
+            A key of Imec.modalities
+        window: int or timedelta-like
+            The window length, as a number of samples or a duration
+        step: int or timedelta-like (optional)
+            The distance between the start of consecutive windows. The
+            window length (non-overlapping windows) by default.
+        start_time, stop_time: datetime-like (optional)
+            The span of the recording to iterate over. Only windows that end
+            before stop_time are returned.
+        readahead: int
+            The minimum number of HDF5 chunks read at a time
+        Yields
+        ______
+        start: numpy.datetime64
+            The time of the first sample of the window
+        values: numpy.array
+            The window's samples, with shape (window, channels). A view of
+            the read buffer, so copy it to keep it past the next window.
+        """
+        index = self._timeidx[modality]
+        freq = self._freqs[modality]
+        window = _n_samples(window, freq)
+        step = window if step is None else _n_samples(step, freq)
+        if window < 1 or step < 1:
+            raise ValueError('window and step must be at least one sample')
+        arrs = [self._h5arrs[name] for name in self.modalities[modality]]
+        span = index.slice(start_time, stop_time)
+        stop = min(span.stop, *(len(arr) for arr in arrs))
+        buf = _ChunkBuffer(arrs, stop, readahead)
+        for start in range(span.start, stop - window + 1, step):
+            yield index.to_date(start), buf.read(start, start + window)
+
+    def get_aligned(self, modalities, start_time, stop_time, target_rate,
+                    as_frame=True):
+        """ Returns the channels of one or more modalities over a time span,
+        resampled to a common rate. Each modality is only read over the
+        requested span (with a margin for the filter), and is upsampled or
+        decimated by polyphase filtering (scipy.signal.resample_poly).
+        Parameters
+        __________
+        modalities: str or list of str
+            Keys of Imec.modalities
+        start_time, stop_time: datetime-like
+            The span to return
+        target_rate: float
+            The output sampling rate (Hz)
+        as_frame: bool
+            Whether to return a DataFrame. Otherwise returns the times and
+            values arrays.
+        Returns
+        _______
+        df: pandas.DataFrame
+            One float column per channel, indexed by time (start_time + i /
+            target_rate). Times outside of a modality's recording are NaN.
+            Where the resampled samples are offset from these times, values
+            are linearly interpolated between them.
+        or times, values: numpy.array
+            Times (datetime64[ns]) and values with shape (times, channels)
+        """
+        if isinstance(modalities, str):
+            modalities = [modalities]
+        start = pd.Timestamp(start_time)
+        rows = int(round((pd.Timestamp(stop_time) - start).total_seconds()
+                         * target_rate))
+        times = TimeIndex(start, target_rate, max(rows, 0))
+        columns = [name for modality in modalities
+                   for name in self.modalities[modality]]
+        values = np.hstack([self._resample_span(modality, times)
+                            for modality in modalities])
+        if not as_frame:
+            return times[:], values
+        return pd.DataFrame(values, columns=columns,
+                            index=pd.DatetimeIndex(times[:], name='time'))
+
+    def _resample_span(self, modality, times):
+        """ Resamples a modality's channels to the samples of a TimeIndex,
+        returning an array with shape (len(times), channels).
+        """
+        index = self._timeidx[modality]
+        names = self.modalities[modality]
+        length = min(len(self._h5arrs[name]) for name in names)
+        out = np.full((len(times), len(names)), np.nan)
+        if not len(times) or not length:
+            return out
+        ratio = Fraction(times.freq / index.freq) \
+                    .limit_denominator(MAX_RESAMPLE_DENOMINATOR)
+        up, down = ratio.numerator, ratio.denominator
+        # resample_poly's filter spans 10 * max(up, down) upsampled samples
+        # either side, so read that many input samples around the span
+        margin = 10 * max(up, down) // up + 1
+        first = int(np.floor((times.start - index.start) / index.interval))
+        last = int(np.ceil((times.to_date(len(times) - 1).astype('int64')
+                            - index.start) / index.interval))
+        read_start = min(max(first - margin, 0), length)
+        read_stop = min(max(last + margin + 1, 0), length)
+        if read_start >= read_stop:
+            return out
+        data = np.stack([self._h5arrs[name][read_start:read_stop]
+                         for name in names], axis=1).astype(np.float64)
+        if up != down:
+            data = signal.resample_poly(data, up, down, axis=0)
+        # Output times as positions in the resampled data, interpolating
+        # between resampled samples when the two grids are offset
+        t = times.to_date(np.arange(len(times))).astype('int64')
+        pos = (t - index.to_date(read_start).astype('int64')) \
+              / (index.interval * down / up)
+        end = index.start + (length - 1) * index.interval
+        valid = (t >= index.start) & (t <= end) & (pos >= 0) & \
+                (pos <= len(data) - 1)
+        for i in range(len(names)):
+            out[valid, i] = np.interp(pos[valid], np.arange(len(data)),
+                                      data[:, i])
+        return out
+
     def plot_timespan(self, modality, start_time, stop_time, sample_rate=None):
         df = self.get_df_time(modality, start_time, stop_time, sample_rate)
         fig = plt.plot(df)
@@ -68,24 +193,172 @@ class Imec(object):
         return fig
 
 
+class TimeIndex():
+    """ The time index of a regularly sampled signal, mapping sample indices
+    to timestamps (start + i / freq) and back by arithmetic, so timestamps are
+    only created for the rows that are read.
+    Parameters
+    __________
+    start: pandas.Timestamp or str
+        The time of the first sample
+    freq: float
+        The sampling frequency (Hz)
+    length: int
+        The number of samples
+    """
+    def __init__(self, start, freq, length):
+        self.start = pd.Timestamp(start).value
+        self.freq = float(freq)
+        self.length = int(length)
+        self.interval = 1e9 / self.freq
+
+    def __repr__(self):
+        return 'TimeIndex({}, {} Hz, {} samples)'.format(
+            pd.Timestamp(self.start), self.freq, self.length)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        """ Returns the timestamps (datetime64[ns]) of the samples at an int,
+        slice or array index, as with a datetime64 array of the full index.
+        """
+        if isinstance(index, slice):
+            idx = np.arange(*index.indices(self.length))
+        elif np.ndim(index) == 0:
+            idx = int(index)
+            if not -self.length <= idx < self.length:
+                raise IndexError('Index {} is out of bounds for TimeIndex of '
+                                 'length {}'.format(index, self.length))
+            idx = idx % self.length
+        else:
+            idx = np.arange(self.length)[index]
+        return self.to_date(idx)
+
+    def to_date(self, idx):
+        """ Converts sample indices (scalar or array) to datetime64[ns]
+        Parameters
+        __________
+        idx: int or array of int
+        Returns
+        _______
+        dates: numpy.datetime64 or array of numpy.datetime64
+        """
+        ns = self.start + np.round(np.asarray(idx) * self.interval) \
+                            .astype('int64')
+        return ns.astype('M8[ns]')
+
+    def to_idx(self, date):
+        """ Converts timestamps (scalar or array) to the nearest sample
+        indices. Indices are not bounded by the length of the signal.
+        Parameters
+        __________
+        date: datetime-like or array of datetime-like
+        Returns
+        _______
+        idx: int or numpy.array of int64
+        """
+        if np.ndim(date) == 0:
+            return int(round((pd.Timestamp(date).value - self.start)
+                             / self.interval))
+        ns = np.asarray(pd.to_datetime(date), dtype='M8[ns]').view('int64')
+        return np.round((ns - self.start) / self.interval).astype('int64')
+
+    def slice(self, start_time=None, stop_time=None):
+        """ Returns the slice of samples between two timestamps, bounded by
+        the length of the signal.
+        Parameters
+        __________
+        start_time, stop_time: datetime-like (optional)
+            Start and stop times. The start or end of the signal by default.
+        Returns
+        _______
+        index: slice
+        """
+        start = 0 if start_time is None else self.to_idx(start_time)
+        stop = self.length if stop_time is None else self.to_idx(stop_time)
+        start = min(max(start, 0), self.length)
+        stop = min(max(stop, start), self.length)
+        return slice(start, stop)
+
+
+class _ChunkBuffer():
+    """ Read-ahead buffer of rows of equal length arrays, read in blocks
+    aligned to the first array's HDF5 chunks.
+    Parameters
+    __________
+    arrs: list of tables.Array
+        The arrays (channels) to read
+    length: int
+        The number of rows that may be read
+    readahead: int
+        The minimum number of chunks read at a time
+    """
+    def __init__(self, arrs, length, readahead=8):
+        self.arrs = arrs
+        self.length = length
+        chunkshape = arrs[0].chunkshape
+        self.chunk = chunkshape[0] if chunkshape else 1024
+        self.block = self.chunk * max(readahead, 1)
+        self.dtype = np.result_type(*(arr.dtype for arr in arrs))
+        self._buf = np.empty((len(arrs), 0), dtype=self.dtype)
+        self._start = 0
+
+    def read(self, start, stop):
+        """ Returns rows start to stop, with shape (rows, channels) """
+        if start < self._start or stop > self._start + self._buf.shape[1]:
+            self._fill(start, stop)
+        offset = start - self._start
+        return self._buf[:, offset:offset + stop - start].T
+
+    def _fill(self, start, stop):
+        new_start = start - start % self.chunk
+        new_stop = max(stop, new_start + self.block)
+        new_stop = min(-(-new_stop // self.chunk) * self.chunk, self.length)
+        buf = np.empty((len(self.arrs), new_stop - new_start),
+                       dtype=self.dtype)
+        # Rows already buffered are copied rather than read again
+        old_stop = self._start + self._buf.shape[1]
+        keep = max(0, min(old_stop, new_stop) - max(self._start, new_start))
+        read_from = new_start
+        if keep and self._start <= new_start:
+            buf[:, :keep] = self._buf[:, new_start - self._start:
+                                         new_start - self._start + keep]
+            read_from = new_start + keep
+        for i, arr in enumerate(self.arrs):
+            out = buf[i, read_from - new_start:]
+            if arr.dtype == self.dtype:
+                arr.read(read_from, new_stop, out=out)
+            else:
+                out[:] = arr.read(read_from, new_stop)
+        self._buf = buf
+        self._start = new_start
+
+
+def _n_samples(duration, freq):
+    """ Returns a number of samples, given as an int or as a timedelta-like
+    duration at the given frequency (Hz).
+    """
+    if isinstance(duration, (int, np.integer)):
+        return int(duration)
+    return int(round(pd.Timedelta(duration).total_seconds() * freq))
+
+
 class IdxToDate():
     def __init__(self, start, freq):
-        self.start = pd.Timestamp(start, 'ns').asm8.astype('int64')
+        self._index = TimeIndex(start, freq, 0)
+        self.start = self._index.start
         self.freq = freq
+
     def __call__(self, x):
-        return (self.start + (int(1e9 / self.freq) * x)).astype('M8[ns]')
+        return self._index.to_date(x)
 
 
 class DateToIdx():
     def __init__(self, start, freq):
-        self.start = pd.Timestamp(start, 'ns').asm8.astype('int64')
+        self._index = TimeIndex(start, freq, 0)
+        self.start = self._index.start
         self.freq = freq
 
     def __call__(self, date):
-        date = pd.Timestamp(date, 'ns').asm8.astype('int64')
-        idx = (((date - self.start) / 1e9) * self.freq)
-        return int(round(idx))
-
-def da_date_idx(start, N, freq, chunks):
-    return da.fromfunction(IdxToDate(start, freq), shape=(N,),
-                           chunks=chunks, dtype='M8[ns]')
+        return self._index.to_idx(date)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import os
+import json
+import pandas as pd
+from .csv import _filename_time, FILE_DURATION
+
+"""
+Project manifests for filesystem projects.
+A manifest records the directory tree of a project folder (subprojects,
+participants, modalities), the name, size and mtime of each file, and the
+time extent of each modality folder. On re-opening a project only the
+directories whose mtime has changed are listed again, and each directory's
+mtime is only checked when it is first listed.
+"""
+
+MANIFEST_FILE = '.radar_manifest.json'
+MANIFEST_VERSION = 1
+
+
+class ProjectManifest():
+    """ A cached listing of a project folder.
+    Directory listings are reused while the directory's mtime is unchanged.
+    Files are expected to be added rather than modified in place (as with
+    RADAR hourly output), since modifying a file does not change the mtime of
+    its directory.
+    Parameters
+    __________
+    path: str
+        The project root folder
+    filename: str
+        The manifest filename within the project root
+    """
+    def __init__(self, path, filename=MANIFEST_FILE):
+        self.root = os.path.abspath(path)
+        self.path = os.path.join(self.root, filename)
+        self.dirs = {}
+        self.changed = False
+        self._checked = set()
+        self.load()
+
+    def __repr__(self):
+        return 'RADAR project manifest {} ({} directories)'.format(
+            self.path, len(self.dirs))
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get('version') != MANIFEST_VERSION:
+            return
+        self.dirs = manifest['dirs']
+
+    def save(self, force=False):
+        """ Writes the manifest if it has changed. Write errors (e.g. a
+        read-only project folder) are ignored. An existing manifest is
+        overwritten in place, so the project root's mtime is not changed.
+        """
+        if not (self.changed or force):
+            return
+        manifest = {'version': MANIFEST_VERSION,
+                    'dirs': self.dirs}
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(manifest, f, separators=(',', ':'))
+            self.changed = False
+        except OSError:
+            pass
+
+    def _rel(self, path):
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        return '' if rel == os.curdir else rel
+
+    def _scan(self, rel, mtime):
+        folders, files = [], {}
+        with os.scandir(os.path.join(self.root, rel)) as it:
+            for entry in it:
+                if entry.is_dir():
+                    folders.append(entry.name)
+                elif entry.is_file():
+                    if not rel and entry.name == os.path.basename(self.path):
+                        continue
+                    st = entry.stat()
+                    files[entry.name] = [st.st_mtime_ns, st.st_size]
+        self.dirs[rel] = {'mtime': mtime,
+                          'folders': sorted(folders),
+                          'files': files,
+                          'extent': _time_extent(files)}
+        self.changed = True
+        return self.dirs[rel]
+
+    def _dir(self, path):
+        rel = self._rel(path)
+        if rel in self._checked:
+            return self.dirs[rel]
+        mtime = os.stat(os.path.join(self.root, rel)).st_mtime_ns
+        entry = self.dirs.get(rel)
+        if entry is None or entry['mtime'] != mtime:
+            entry = self._scan(rel, mtime)
+        self._checked.add(rel)
+        return entry
+
+    def refresh(self):
+        """ Checks the mtimes of the project root and the folders within it
+        (e.g. participants), listing again only those that have changed, and
+        drops directories that are no longer listed. Deeper directories are
+        checked when they are first listed (see _dir), so unchanged
+        modality folders are not visited.
+        """
+        self._checked = set()
+        for name in self._dir(self.root)['folders']:
+            self._dir(os.path.join(self.root, name))
+        # Parents sort before their children, so removals cascade
+        for rel in sorted(self.dirs):
+            parent, name = os.path.split(rel)
+            if rel and (parent not in self.dirs or
+                        name not in self.dirs[parent]['folders']):
+                del self.dirs[rel]
+                self.changed = True
+
+    def listfolders(self, path):
+        """ Returns a list of folder names within the given path
+        """
+        return list(self._dir(path)['folders'])
+
+    def listfiles(self, path):
+        """ Returns a list of file names within the given path
+        """
+        return list(self._dir(path)['files'])
+
+    def files(self, path):
+        """ Returns a dictionary of {filename: [mtime_ns, size]} for the files
+        within the given path
+        """
+        return dict(self._dir(path)['files'])
+
+    def time_extent(self, path):
+        """ Returns the (start, end) times covered by RADAR hourly files in the
+        given path, or None if the filenames have no times.
+        """
+        extent = self._dir(path)['extent']
+        if extent is None:
+            return None
+        return tuple(pd.Timestamp(t) for t in extent)
+
+
+def _time_extent(files):
+    starts = [_filename_time(f) for f in files]
+    starts = [s for s in starts if s is not None]
+    if not starts:
+        return None
+    return [min(starts).isoformat(), (max(starts) + FILE_DURATION).isoformat()]
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import os
+import fcntl
+import struct
+from contextlib import contextmanager
+
+"""
+Single writer, multiple reader (SWMR) access to project files across
+processes.
+Each file has a lock file alongside it ('<file>.lock') holding two POSIX
+record locks and a generation counter:
+- the writer lock, held by the one process that has the file open for writing
+- the data lock, held exclusively by the writer while it writes and flushes,
+  and shared by readers while they read or reopen the file
+- the generation, advanced by the writer after each flush so readers know
+  when to reopen the file to see new rows
+Record locks are per process, so a process should only hold one handle on a
+project file (as enforced by radar.io.hdf5.open_project_file).
+HDF5's own file locking would stop readers opening a file while the writer
+has it open, so processes using SWMR project files must be started with
+HDF5_USE_FILE_LOCKING=FALSE (see hdf5_file_locking_disabled).
+"""
+
+LOCK_EXT = '.lock'
+HDF5_LOCKING_ENV = 'HDF5_USE_FILE_LOCKING'
+
+# Lock byte offsets within the lock file, and the generation counter
+_DATA_LOCK = 0
+_WRITER_LOCK = 1
+_GENERATION_OFFSET = 8
+_GENERATION = struct.Struct('<Q')
+
+
+class FileLock():
+    """ The lock file of a project file.
+    Parameters
+    __________
+    path: str
+        Path of the locked (HDF5) file. The lock file is path + '.lock'
+    """
+    def __init__(self, path):
+        self.path = path + LOCK_EXT
+        try:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        except OSError:
+            # Readers of a project in a read-only folder with a lock file
+            self._fd = os.open(self.path, os.O_RDONLY)
+        self._mode = None
+        self._depth = 0
+        self.writer = False
+
+    def __repr__(self):
+        return 'RADAR lock file {} (generation {})'.format(
+            self.path, self.generation())
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def claim_writer(self):
+        """ Takes the writer lock for the life of this object, raising an
+        IOError if another process has the file open for writing.
+        """
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1,
+                        _WRITER_LOCK)
+        except OSError:
+            raise IOError('{} is already open for writing by another '
+                          'process'.format(self.path[:-len(LOCK_EXT)]))
+        self.writer = True
+
+    @contextmanager
+    def _hold(self, mode):
+        if self._depth == 0:
+            fcntl.lockf(self._fd, mode, 1, _DATA_LOCK)
+            self._mode = mode
+        elif mode == fcntl.LOCK_EX and self._mode != fcntl.LOCK_EX:
+            raise RuntimeError('Cannot take an exclusive lock while holding '
+                               'a shared lock')
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, _DATA_LOCK)
+                self._mode = None
+
+    def shared(self):
+        """ Context manager holding the data lock shared (for reading),
+        waiting for the writer to finish any flush in progress.
+        """
+        return self._hold(fcntl.LOCK_SH)
+
+    def exclusive(self):
+        """ Context manager holding the data lock exclusively (for writing),
+        waiting for readers to finish.
+        """
+        return self._hold(fcntl.LOCK_EX)
+
+    def holds_exclusive(self):
+        """ Whether this process holds the data lock exclusively
+        """
+        return self._mode == fcntl.LOCK_EX
+
+    def generation(self):
+        """ Returns the number of times the writer has flushed the file
+        """
+        data = os.pread(self._fd, _GENERATION.size, _GENERATION_OFFSET)
+        if len(data) < _GENERATION.size:
+            return 0
+        return _GENERATION.unpack(data)[0]
+
+    def advance(self):
+        """ Advances the generation. Should be called by the writer while
+        holding the exclusive lock, after flushing the file.
+        """
+        generation = self.generation() + 1
+        os.pwrite(self._fd, _GENERATION.pack(generation), _GENERATION_OFFSET)
+        return generation
+
+
+def hdf5_file_locking_disabled():
+    """ Whether HDF5 file locking is turned off for this process, as SWMR
+    access requires. HDF5 reads HDF5_USE_FILE_LOCKING once, when the library
+    is loaded, so it has to be set before tables or h5py are imported, for
+    example in the environment the process is started with.
+    """
+    return os.environ.get(HDF5_LOCKING_ENV, '').upper() in ('FALSE', '0')
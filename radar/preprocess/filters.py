@@ -1,13 +1,82 @@
 #!/usr/bin/env python3
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from scipy import signal
 
-def butterworth(arr, cutoff, freq, order=5, ftype='highpass'):
+DEFAULT_ORDER = 5
+GRAVITY_CUTOFF = 0.5
+# Relative size of a filter's impulse response at which streaming filters
+# treat it as settled
+SETTLE_TOLERANCE = 1e-9
+
+@lru_cache(maxsize=256)
+def _butter_sos(order, cutoff, freq, ftype):
+    sos = signal.butter(order, np.divide(cutoff, 0.5 * freq), ftype,
+                        output='sos')
+    sos.flags.writeable = False
+    return sos
+
+def butter_sos(cutoff, freq, order=DEFAULT_ORDER, ftype='highpass'):
+    """ Returns the second-order sections of a Butterworth filter. Designs
+    are cached, keyed by (order, cutoff, freq, ftype), so filtering many
+    signals with the same filter only designs it once.
+    Parameters
+    __________
+    cutoff: scalar or len-2 sequence
+        The critical frequencies (Hz), see butterworth
+    freq: float
+        The sampling frequency (Hz)
+    order: int
+        The order of the filter
+    ftype: {'highpass', 'lowpass', 'bandpass', 'bandstop'}
+        The filter type. Default is 'highpass'
+    Returns
+    _______
+    sos: numpy.array
+        The second-order sections, shape (n_sections, 6). A copy of the
+        cached design.
+    """
+    if np.ndim(cutoff):
+        cutoff = tuple(float(c) for c in cutoff)
+    else:
+        cutoff = float(cutoff)
+    return _butter_sos(int(order), cutoff, float(freq), ftype).copy()
+
+def sosfiltfilt(arr, sos, axis=None):
+    """ Applies a two-pass (zero phase) filter to all channels of an array
+    in one call.
+    Parameters
+    __________
+    arr: list, numpy array, pandas Series or DataFrame
+        The signal(s). Numpy arrays are filtered along the last axis by
+        default (one vector per row); pandas objects along the index (one
+        vector per column).
+    sos: numpy.array
+        Second-order sections of the filter, e.g. from butter_sos
+    axis: int (optional)
+        The time axis of a numpy array
+    Returns
+    _______
+    filtered: numpy.array, or the type of arr for pandas objects
+    """
+    if isinstance(arr, pd.DataFrame):
+        return pd.DataFrame(signal.sosfiltfilt(sos, arr.values, axis=0),
+                            index=arr.index, columns=arr.columns)
+    if isinstance(arr, pd.Series):
+        return pd.Series(signal.sosfiltfilt(sos, arr.values),
+                         index=arr.index, name=arr.name)
+    return signal.sosfiltfilt(sos, np.asarray(arr),
+                              axis=-1 if axis is None else axis)
+
+def butterworth(arr, cutoff, freq, order=DEFAULT_ORDER, ftype='highpass',
+                axis=None):
     """ butterworth filters the array through a two-pass butterworth filter.
     Parameters
     __________
-    arr: list or numpy.array
-        The timeseries array on which the filter is applied
+    arr: list, numpy array, pandas Series or DataFrame
+        The timeseries array(s) on which the filter is applied. Multiple
+        vectors are filtered together, see sosfiltfilt.
     cutoff: scalar or len-2 sequence
         The critical frequencies for the Butterworth filter. The point at
         which the gain drops to 1/sqrt(2) of the passband. Must be length-2
@@ -17,10 +86,228 @@ def butterworth(arr, cutoff, freq, order=5, ftype='highpass'):
         The frequency (Hz) of the input array
     ftype: {'highpass', 'lowpass', 'bandpass'}
         The filter type. Default is 'highpass'
+    axis: int (optional)
+        The time axis of a numpy array. The last axis by default.
+    """
+    return sosfiltfilt(arr, butter_sos(cutoff, freq, order, ftype), axis)
+
+def sos_padlen(sos):
+    """ Returns the number of samples sosfiltfilt pads each end of a signal
+    with by default, for the filter with second-order sections sos.
+    """
+    ntaps = 2 * len(sos) + 1
+    ntaps -= min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum())
+    return 3 * ntaps
+
+def settle_length(sos, tol=SETTLE_TOLERANCE):
+    """ Returns the number of samples after which the impulse response of a
+    filter stays below tol relative to its peak.
+    Parameters
+    __________
+    sos: numpy.array
+        Second-order sections of the filter
+    tol: float
+        The relative tolerance
+    Returns
+    _______
+    length: int
     """
-    nyq = 0.5 * freq
-    b, a = signal.butter(order, cutoff/nyq, ftype)
-    return signal.filtfilt(b, a, arr)
+    n = 1024
+    while True:
+        impulse = np.zeros(n)
+        impulse[0] = 1
+        h = np.abs(signal.sosfilt(sos, impulse))
+        above = np.flatnonzero(h > tol * h.max())
+        if above[-1] < n // 2 or n >= 2**26:
+            return int(above[-1]) + 1
+        n *= 4
+
+def stream_sosfiltfilt(chunks, sos, axis=0, padlen=None, overlap=None,
+                       tol=SETTLE_TOLERANCE):
+    """ Applies a two-pass (zero phase) filter to a signal given as an
+    iterator of consecutive chunks, without holding the whole signal in
+    memory.
+    The forward pass is carried across chunks in the filter state. The
+    backward pass over each block of forward filtered samples starts
+    `overlap` samples later, by which point the error from starting it
+    there has decayed below tol. The ends of the signal are padded as in
+    scipy.signal.sosfiltfilt, so the output matches sosfiltfilt on the
+    whole signal closely (to around 1e-8 of the signal's magnitude with the
+    default tol).
+    Parameters
+    __________
+    chunks: iterable
+        Consecutive chunks of the signal, as numpy arrays (e.g. Imec window
+        values), pandas Series or DataFrames (e.g. RadarDataGroup rows or
+        CsvTable partitions)
+    sos: numpy.array
+        Second-order sections of the filter, e.g. from butter_sos
+    axis: int
+        The time axis of numpy array chunks. The first axis by default, as
+        for rows of a table. Pandas chunks are filtered along the index.
+    padlen: int (optional)
+        Samples of odd extension at each end of the signal, sos_padlen(sos)
+        by default
+    overlap: int (optional)
+        Samples held back between chunks for the backward pass,
+        settle_length(sos, tol) by default
+    tol: float
+        Tolerance used to choose overlap
+    Yields
+    ______
+    filtered: numpy.array, or the type of the chunks for pandas objects
+        Consecutive chunks of the filtered signal. These lag the input
+        chunks by overlap samples, with the remainder yielded at the end.
+    """
+    sos = np.asarray(sos, dtype=np.float64)
+    padlen = sos_padlen(sos) if padlen is None else padlen
+    overlap = settle_length(sos, tol) if overlap is None else overlap
+    zi_init = signal.sosfilt_zi(sos)
+    state = {'zi': None}
+
+    def initial(x0):
+        return zi_init.reshape(zi_init.shape + (1,) * np.ndim(x0)) * x0
+
+    def forward(x):
+        y, state['zi'] = signal.sosfilt(sos, x, axis=0, zi=state['zi'])
+        return y
+
+    def backward(y):
+        y = y[::-1]
+        return signal.sosfilt(sos, y, axis=0, zi=initial(y[0]))[0][::-1]
+
+    stream = _ChunkStream(axis)
+    pending = None
+    for chunk in chunks:
+        x = stream.add(chunk)
+        if pending is None:
+            if len(stream.tail) <= padlen:
+                continue
+            # Forward filter the odd extension before the first sample
+            x = stream.tail
+            ext = 2 * x[0] - x[padlen:0:-1]
+            state['zi'] = initial(ext[0])
+            forward(ext)
+            pending = forward(x)
+        elif len(x):
+            pending = np.concatenate([pending, forward(x)])
+        stream.tail = stream.tail[-(padlen + 1):]
+        if len(pending) > overlap:
+            out = backward(pending)[:len(pending) - overlap]
+            pending = pending[len(out):]
+            yield stream.output(out)
+
+    if pending is None:
+        if stream.tail is not None and len(stream.tail):
+            yield stream.output(signal.sosfiltfilt(sos, stream.tail, axis=0,
+                                                   padlen=padlen))
+        return
+    # Forward filter the odd extension after the last sample
+    x = stream.tail
+    ext = 2 * x[-1] - x[-2:-(padlen + 2):-1]
+    full = np.concatenate([pending, forward(ext)])
+    yield stream.output(backward(full)[:len(pending)])
+
+def stream_butterworth(chunks, cutoff, freq, order=DEFAULT_ORDER,
+                       ftype='highpass', **kwargs):
+    """ Streaming version of butterworth, filtering a signal given as an
+    iterator of chunks. See stream_sosfiltfilt for the other arguments.
+    """
+    return stream_sosfiltfilt(chunks, butter_sos(cutoff, freq, order, ftype),
+                              **kwargs)
+
+
+class _ChunkStream():
+    """ Converts the chunks of a stream to arrays with time on the first axis,
+    keeping the last samples and the pandas index of samples not yet output,
+    and converts output back to the type of the chunks.
+    """
+    def __init__(self, axis):
+        self.axis = axis
+        self.tail = None
+        self.like = None
+        self.index = None
+
+    def add(self, chunk):
+        if isinstance(chunk, (pd.DataFrame, pd.Series)):
+            self.like = chunk.iloc[:0]
+            self.index = chunk.index if self.index is None else \
+                         self.index.append(chunk.index)
+            x = np.asarray(chunk.values, dtype=np.float64)
+        else:
+            x = np.moveaxis(np.asarray(chunk, dtype=np.float64), self.axis, 0)
+        self.tail = x if self.tail is None else \
+                    np.concatenate([self.tail, x])
+        return x
+
+    def output(self, out):
+        if self.like is None:
+            return np.moveaxis(out, 0, self.axis)
+        index, self.index = self.index[:len(out)], self.index[len(out):]
+        if isinstance(self.like, pd.Series):
+            return pd.Series(out, index=index, name=self.like.name)
+        return pd.DataFrame(out, index=index, columns=self.like.columns)
+
+
+class FilterBank():
+    """ A set of named Butterworth filters for signals of one sampling
+    frequency, each applied to all channels of a signal in one call.
+    Parameters
+    __________
+    freq: float
+        The sampling frequency (Hz)
+    filters: dict
+        {name: (cutoff, ftype)} or {name: dict of butter_sos arguments}
+    order: int
+        The order of filters that do not give one
+    """
+    def __init__(self, freq, filters, order=DEFAULT_ORDER):
+        self.freq = freq
+        self.filters = {}
+        for name, spec in filters.items():
+            if not isinstance(spec, dict):
+                spec = dict(zip(('cutoff', 'ftype'), spec))
+            spec = dict({'order': order}, **spec)
+            self.filters[name] = butter_sos(freq=freq, **spec)
+
+    def __repr__(self):
+        return 'FilterBank({} Hz, {})'.format(self.freq, list(self.filters))
+
+    def __call__(self, arr, axis=None):
+        """ Returns {name: filtered arr} for each filter, see sosfiltfilt """
+        return {name: sosfiltfilt(arr, sos, axis)
+                for name, sos in self.filters.items()}
+
+def accel_components(accel_array, freq, cutoff=GRAVITY_CUTOFF,
+                     order=DEFAULT_ORDER, axis=None):
+    """ accel_components separates acceleration into gravity and linear
+    acceleration with a single lowpass filter pass. Gravity is the two-pass
+    Butterworth lowpass filtered acceleration, and linear acceleration is
+    the remainder, so the two sum to the input. (accel_linear instead
+    highpass filters the input.)
+    Parameters
+    __________
+    accel_array : list(s), numpy array(s) or pandas DataFrame
+        The acceleration data. Each dimension is treated as a seperate
+        accelerometer vector. Vectors should be in rows for numpy arrays but
+        columns for pandas DataFrames
+    freq: float
+        The frequency (Hz) of the accelerometer
+    cutoff: float
+        The cutoff frequency (Hz). Default 0.5Hz
+    order: int
+        The order of the filter. Default 5
+    axis: int (optional)
+        The time axis of a numpy array. The last axis by default.
+    Returns
+    _______
+    gravity, linear_accel: type(accel_array)
+    """
+    if not isinstance(accel_array, (pd.DataFrame, pd.Series)):
+        accel_array = np.asarray(accel_array)
+    gravity = butterworth(accel_array, cutoff=cutoff, freq=freq, order=order,
+                          ftype='lowpass', axis=axis)
+    return gravity, accel_array - gravity
 
 def accel_linear(accel_array, freq):
     """ acceleration_gravity runs a filter on the input array(s) to remove the
@@ -40,20 +327,8 @@ def accel_linear(accel_array, freq):
     linear_accel: type(accel_array)
         The linear acceleration as predicted by the highpass filter
     """
-    if accel_array.ndim > 1:
-        linear_accel = accel_array.copy()
-        if isinstance(accel_array, pd.DataFrame):
-            for col in linear_accel:
-                linear_accel[col] = butterworth(linear_accel[col], cutoff=0.5,
-                                                freq=freq, ftype='highpass')
-        else:
-            for arr in linear_accel:
-                arr = butterworth(arr, cutoff=0.5, freq=freq, ftype='highpass')
-
-    else:
-        linear_accel = butterworth(accel_array, cutoff=0.5, freq=freq,
-                                   ftype='highpass')
-    return linear_accel
+    return butterworth(accel_array, cutoff=GRAVITY_CUTOFF, freq=freq,
+                       ftype='highpass')
 
 def accel_gravity(accel_array, freq):
     """ accel_gravity runs a filter on the input array(s) to extract
@@ -73,17 +348,5 @@ def accel_gravity(accel_array, freq):
     gravity: type(accel_array)
         The gravity as predicted by the lowpass filter
     """
-    if accel_array.ndim > 1:
-        gravity = accel_array.copy()
-        if isinstance(accel_array, pd.DataFrame):
-            for col in gravity:
-                gravity[col] = butterworth(gravity[col], cutoff=0.5,
-                                           freq=freq, ftype='lowpass')
-        else:
-            for arr in gravity:
-                arr = butterworth(arr, cutoff=0.5, freq=freq, ftype='lowpass')
-
-    else:
-        gravity = butterworth(accel_array, cutoff=0.5, freq=freq,
-                              ftype='lowpass')
-    return gravity
+    return butterworth(accel_array, cutoff=GRAVITY_CUTOFF, freq=freq,
+                       ftype='lowpass')
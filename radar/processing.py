@@ -37,8 +37,9 @@ class ProcessMap():
         if isinstance(obj, types.GeneratorType):
             d = next(obj)
             tab = ProjectFile.create_radar_table(hdf_file, where, name, obj=d)
-            for d in obj:
-                tab.append(d)
+            with tab.appender() as appender:
+                for d in obj:
+                    appender.append(d)
         else:
             ProjectFile.create_radar_table(hdf_file, where, name, obj=obj)
 
@@ -2,7 +2,7 @@
 import os
 import glob
 from . import visualise
-from .common import AttrRecDict, progress_bar
+from .common import AttrRecDict, LazyData, progress_bar
 from .io.fs import open_project_folder as fs_project
 from .io.hdf5 import open_project_file as h5_project
 from .util.specifications import ProjectSpecs
@@ -54,11 +54,17 @@ class Project():
 
     def _get_participants(self, participant_data_dict):
         for ptc_name, ptc_data in participant_data_dict.items():
-            if not isinstance(ptc_data, AttrRecDict):
+            if isinstance(ptc_data, LazyData):
+                self.participants[ptc_name] = LazyData(
+                    self._load_participant, ptc_name, ptc_data)
+            elif not isinstance(ptc_data, AttrRecDict):
                 if not isinstance(ptc_data, dict):
                     ptc_data = ptc_data.get_data_dict()
                 self.add_participant(ptc_name, data=ptc_data)
 
+    def _load_participant(self, name, ptc_data):
+        return Participant(data=ptc_data().get_data_dict(), name=name)
+
     def add_participant(self, name, where='.', data=None, info=None):
         proj = self if where == '.' else self.subprojects[where]
         proj.participants[name] = Participant(data=data, name=name, info=info)
@@ -92,6 +92,20 @@ class ModalitySpec(OrderedDict):
     def timedelta_columns(self):
         return self._type_columns('DURATION')
 
+    def frequency(self):
+        """ Returns the sample rate (Hz) of the modality, from either the
+        sample_rate frequency or interval (s). Returns None for dynamic or
+        configurable sample rates.
+        """
+        rate = getattr(self, 'sample_rate', None)
+        if not isinstance(rate, dict):
+            return None
+        if 'frequency' in rate:
+            return float(rate['frequency'])
+        if 'interval' in rate:
+            return 1 / float(rate['interval'])
+        return None
+
 
 class FieldSpec(OrderedDict):
     """
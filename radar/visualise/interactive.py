@@ -10,17 +10,30 @@ import bokeh.models
 
 DEFAULT_COLORS = bokeh.palettes.Set1[8]
 
-def time_span(dataframe, ycols, timespan, xcol=None, fig=None, colors=None):
+def time_span(dataframe, ycols, timespan, xcol=None, fig=None, colors=None,
+              min_points=None):
     """ Returns a bokeh line plot of the given columns in a pandas dataframe.
+    The data may instead be a radar.io.hdf5 RadarTable or RadarDataGroup, in
+    which case the coarsest stored summary level with at least min_points
+    over the timespan is plotted (the mean as a line, and the min/max range as
+    a band), or the raw data if there is no such level.
     """
     if fig is None:
-        fig = bokeh.plotting.figure(plot_width=800,
-                                    plot_height=250,
+        fig = bokeh.plotting.figure(width=800,
+                                    height=250,
                                     x_axis_type='datetime',
                                     tools='xpan,xwheel_zoom,box_zoom,reset,save',
                                     active_scroll='xwheel_zoom',
                                     active_drag='xpan')
-    df = dataframe.loc[timespan[0]:timespan[1]]
+    if hasattr(dataframe, 'read_summary'):
+        if min_points is None:
+            # Plot.width replaced plot_width in bokeh 3
+            width = getattr(fig, 'width', None) or fig.plot_width
+            min_points = 2 * width
+        df = dataframe.read_summary(timespan[0], timespan[1], ycols,
+                                    min_points=min_points)
+    else:
+        df = dataframe.loc[timespan[0]:timespan[1]]
     if xcol is None:
         xcol = df.index
     else:
@@ -32,7 +45,13 @@ def time_span(dataframe, ycols, timespan, xcol=None, fig=None, colors=None):
     for i, column in enumerate(ycols):
         color = colors[i%len(colors)]
         name = column.split('.')[-1]
-        fig.line(xcol, df[column], line_color=color, legend=name)
+        if column + '.mean' in df:
+            fig.varea(xcol, df[column + '.min'], df[column + '.max'],
+                      fill_color=color, fill_alpha=0.3)
+            fig.line(xcol, df[column + '.mean'], line_color=color,
+                     legend_label=name)
+        else:
+            fig.line(xcol, df[column], line_color=color, legend_label=name)
     fig.toolbar.logo = None
 
     return fig
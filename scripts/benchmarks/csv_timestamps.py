@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+""" Benchmarks the vectorised epoch timestamp conversion in
+radar.io.csv.read_folder against per-cell timestamp parsing, on a synthetic
+folder of hourly Empatica E4 acceleration CSV files.
+"""
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+import pandas as pd
+from radar.common import date_parser
+from radar.defaults import TIME_COLS
+from radar.io.csv import read_folder, _read_folder
+
+FREQ = 32
+
+# The columns of an Empatica E4 acceleration file and their types, as
+# read_folder would take them from the modality's schema
+COLUMNS = {
+    'key.projectId': object,
+    'key.userId': object,
+    'key.sourceId': object,
+    'value.time': np.float64,
+    'value.timeReceived': np.float64,
+    'value.x': np.float32,
+    'value.y': np.float32,
+    'value.z': np.float32,
+}
+
+def make_folder(path, hours, freq=FREQ, start='2018-01-01'):
+    start = pd.Timestamp(start).timestamp()
+    n = int(3600 * freq)
+    for h in range(hours):
+        t = start + h * 3600 + np.arange(n) / freq
+        df = pd.DataFrame({
+            'key.projectId': 'radar',
+            'key.userId': 'user',
+            'key.sourceId': 'source',
+            'value.time': t,
+            'value.timeReceived': t + 0.5,
+            'value.x': np.random.randn(n).astype(np.float32),
+            'value.y': np.random.randn(n).astype(np.float32),
+            'value.z': np.random.randn(n).astype(np.float32),
+        })
+        fname = pd.Timestamp(t[0], unit='s').strftime('%Y%m%d_%H00.csv')
+        df.to_csv(os.path.join(path, fname), index=False)
+
+def per_cell(path):
+    dtype = {col: dtype for col, dtype in COLUMNS.items()
+             if col not in TIME_COLS}
+    return _read_folder(path, usecols=list(COLUMNS), dtype=dtype,
+                        converters={col: date_parser for col in TIME_COLS})
+
+def vectorised(path):
+    return read_folder(path, usecols=list(COLUMNS), dtype=COLUMNS,
+                       time_columns=list(TIME_COLS))
+
+def timeit(func, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hours', type=int, default=6,
+                        help='Number of hourly files to generate')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        make_folder(path, args.hours)
+        rows = args.hours * 3600 * FREQ
+        print('{} hourly files, {} rows'.format(args.hours, rows))
+        for name, func in (('per-cell', per_cell),
+                           ('vectorised', vectorised)):
+            t = timeit(func, path, repeat=args.repeat)
+            print('{:>12}: {:8.3f} s  {:12.0f} rows/s'.format(
+                name, t, rows / t))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+""" Benchmarks windowed feature extraction (radar.feature.extract_features)
+on a synthetic accelerometer signal, against computing the same features
+with a loop over pandas windows, and checks that the results match.
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from radar.feature import extract_features
+
+MODALITY = 'android_empatica_e4_acceleration'
+
+def looped(df, window, step, freq, percentiles=(25, 50, 75)):
+    rows = {}
+    n_window, n_step = int(round(window * freq)), int(round(step * freq))
+    for start in range(0, len(df) - n_window + 1, n_step):
+        w = df.iloc[start:start + n_window]
+        row = {}
+        for col in w:
+            x = w[col].values
+            row[col + '.mean'] = x.mean()
+            row[col + '.std'] = x.std()
+            for q in percentiles:
+                row['{}.p{}'.format(col, q)] = np.percentile(x, q)
+            row[col + '.energy'] = (x**2).mean()
+            row[col + '.zero_crossings'] = \
+                (np.diff(np.signbit(x).astype(int)) != 0).sum()
+        rows[df.index[start]] = row
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--frequency', type=float, default=32)
+    parser.add_argument('--window', type=float, default=30,
+                        help='Window length (s)')
+    parser.add_argument('--step', type=float, default=10,
+                        help='Window step (s)')
+    parser.add_argument('--loop-hours', type=float, default=1,
+                        help='Hours of the signal used by the looped version')
+    args = parser.parse_args()
+
+    rows = int(args.hours * 3600 * args.frequency)
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2018-01-01', periods=rows,
+                          freq=pd.Timedelta(1 / args.frequency, 's'))
+    t = np.arange(rows) / args.frequency
+    df = pd.DataFrame(rng.standard_normal((rows, 3)) * 0.2
+                      + np.sin(2 * np.pi * 1.5 * t)[:, None],
+                      index=index, columns=['value.x', 'value.y', 'value.z'])
+
+    t0 = time.perf_counter()
+    out = extract_features(df, args.window, args.step, modality=MODALITY)
+    t_all = time.perf_counter() - t0
+    print('{} hours at {} Hz, {} windows x {} features: {:.3f} s'.format(
+        args.hours, args.frequency, len(out), out.shape[1], t_all))
+
+    part = df.iloc[:int(args.loop_hours * 3600 * args.frequency)]
+    features = ['mean', 'std', 'p25', 'p50', 'p75', 'energy',
+                'zero_crossings']
+    t0 = time.perf_counter()
+    ref = looped(part, args.window, args.step, args.frequency)
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = extract_features(part, args.window, args.step, features=features)
+    t_new = time.perf_counter() - t0
+    assert new.index.equals(ref.index)
+    assert np.allclose(new[ref.columns], ref)
+    print('{} hours, {} features: looped {:.3f} s, extract_features '
+          '{:.3f} s'.format(args.loop_hours, len(features), t_loop, t_new))
+
+if __name__ == '__main__':
+    main()
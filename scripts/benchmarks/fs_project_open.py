@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+""" Benchmarks the time to open a filesystem RADAR project with
+radar.io.fs.open_project_folder, and the extra time taken to load every
+modality (equivalent to the previous eager behaviour), on a synthetic
+project folder.
+"""
+import os
+import time
+import tempfile
+import argparse
+from radar.io.fs import open_project_folder
+
+HEADER = 'key.projectId,key.userId,key.sourceId,value.time,value.timeReceived,value.x\n'
+
+def make_project(path, participants, modalities, files):
+    for p in range(participants):
+        for m in range(modalities):
+            folder = os.path.join(path, 'ptc{:04d}'.format(p),
+                                  'modality{:02d}'.format(m))
+            os.makedirs(folder)
+            for h in range(files):
+                fname = '20180101_{:02d}00.csv'.format(h % 24)
+                if h >= 24:
+                    fname = '201801{:02d}_{:02d}00.csv'.format(
+                        h // 24 + 1, h % 24)
+                with open(os.path.join(folder, fname), 'w') as f:
+                    f.write(HEADER)
+                    f.write('p,u,s,{0},{0},0.0\n'.format(1514764800 + h*3600))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--participants', type=int, default=50)
+    parser.add_argument('--modalities', type=int, default=10)
+    parser.add_argument('--files', type=int, default=24,
+                        help='Hourly files per modality')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        make_project(path, args.participants, args.modalities, args.files)
+        print('{} participants, {} modalities, {} files each'.format(
+            args.participants, args.modalities, args.files))
+
+        t0 = time.perf_counter()
+        project = open_project_folder(path)
+        t_open = time.perf_counter() - t0
+        print('Open project: {:8.4f} s'.format(t_open))
+
+        t0 = time.perf_counter()
+        for participant in project.participants:
+            participant.data.values()
+        t_load = time.perf_counter() - t0
+        print('Load all modalities: {:8.4f} s'.format(t_load))
+        print('Open + load all (eager): {:8.4f} s'.format(t_open + t_load))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+""" Benchmarks appending a stream of small DataFrames to a
+radar.io.hdf5.RadarTable and RadarDataGroup, one write per frame compared
+with a BufferedAppender writing chunk-aligned blocks.
+"""
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file
+
+def make_frames(frames, rows, freq=32):
+    start = pd.Timestamp('2018-01-01').value
+    for i in range(frames):
+        t = start + ((i * rows + np.arange(rows)) * 1e9 / freq).astype(np.int64)
+        yield pd.DataFrame({
+            'value.time': pd.to_datetime(t),
+            'value.x': np.random.randn(rows).astype(np.float32),
+            'value.y': np.random.randn(rows).astype(np.float32),
+            'value.z': np.random.randn(rows).astype(np.float32),
+        })
+
+def per_frame(node, frames):
+    for df in frames:
+        node.append_dataframe(df)
+
+def buffered(node, frames):
+    with node.appender() as appender:
+        for df in frames:
+            appender.append(df)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=32,
+                        help='Rows per frame')
+    args = parser.parse_args()
+
+    total = args.frames * args.rows
+    print('{} frames of {} rows'.format(args.frames, args.rows))
+    with tempfile.TemporaryDirectory() as path:
+        h5 = open_project_file(os.path.join(path, 'bench.h5'), mode='w')
+        frames = list(make_frames(args.frames, args.rows))
+        first = frames[0]
+        for name, func in (('per-frame', per_frame),
+                           ('buffered', buffered)):
+            nodes = (
+                ('table', h5.create_radar_table('/' + name.replace('-', ''),
+                                                'table', obj=first)),
+                ('group', h5.create_radar_data_group(
+                    '/' + name.replace('-', ''), 'group', obj=first)),
+            )
+            for kind, node in nodes:
+                t0 = time.perf_counter()
+                func(node, frames)
+                h5.flush()
+                elapsed = time.perf_counter() - t0
+                print('{:>10} {}: {:8.3f} s  {:12.0f} rows/s'.format(
+                    name, kind, elapsed, total / elapsed))
+        h5.close()
+
+if __name__ == '__main__':
+    main()
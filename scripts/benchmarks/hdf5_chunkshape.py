@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+""" Benchmarks sequential and windowed read throughput of a regularly sampled
+(32 Hz by default) radar.io.hdf5.RadarTable written with different chunk
+policies: the PyTables default (expectedrows=1000000, automatic chunkshape),
+radar.io.hdf5.chunk_policy, and chunks holding fixed durations of samples
+from 10 s to 30 min.
+"""
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file, chunk_policy
+
+
+# Policy name and chunk_policy keyword arguments (None for the PyTables
+# default). Fixed durations are not capped by size.
+POLICIES = (
+    ('default', None),
+    ('policy', {}),
+) + tuple((name, {'chunk_seconds': seconds, 'max_chunk_bytes': None})
+          for name, seconds in (('10s', 10), ('1min', 60), ('2min', 120),
+                                ('5min', 300), ('10min', 600),
+                                ('30min', 1800)))
+
+def make_dataframe(rows, freq):
+    t = pd.Timestamp('2018-01-01').value + \
+        (np.arange(rows) * 1e9 / freq).astype(np.int64)
+    return pd.DataFrame({
+        'value.time': pd.to_datetime(t),
+        'value.timeReceived': pd.to_datetime(t + int(5e8)),
+        'value.x': np.random.randn(rows).astype(np.float32),
+        'value.y': np.random.randn(rows).astype(np.float32),
+        'value.z': np.random.randn(rows).astype(np.float32),
+    })
+
+def timeit(func, *args):
+    t0 = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t0
+
+def read_windows(table, starts, window_rows):
+    for start in starts:
+        table.read_columns(start=start, stop=start + window_rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=float, default=2)
+    parser.add_argument('--frequency', type=float, default=32,
+                        help='Sample rate (Hz)')
+    parser.add_argument('--windows', type=int, default=200,
+                        help='Number of random windows to read')
+    parser.add_argument('--window', type=float, default=300,
+                        help='Window length (s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Repeats of each read, of which the best is '
+                             'reported')
+    args = parser.parse_args()
+
+    rows = int(args.days * 24 * 3600 * args.frequency)
+    df = make_dataframe(rows, args.frequency)
+    window_rows = int(args.window * args.frequency)
+    starts = np.random.randint(0, rows - window_rows, args.windows)
+    print('{} rows, {} windows of {} s'.format(rows, args.windows,
+                                               args.window))
+    with tempfile.TemporaryDirectory() as path:
+        h5 = open_project_file(os.path.join(path, 'bench.h5'), mode='w')
+        rowsize = df.to_records(index=False).dtype.itemsize
+        for name, policy in POLICIES:
+            kwargs = {}
+            if policy is not None:
+                expectedrows, chunkshape = chunk_policy(
+                    args.frequency, rowsize, duration=args.days * 24 * 3600,
+                    **policy)
+                kwargs = {'expectedrows': expectedrows,
+                          'chunkshape': chunkshape}
+            table = h5.create_radar_table('/bench', name, obj=df, **kwargs)
+            h5.flush()
+
+            seq = min(timeit(table.read_columns)
+                      for _ in range(args.repeat))
+            win = min(timeit(read_windows, table, starts, window_rows)
+                      for _ in range(args.repeat))
+
+            print('{:>8} chunkshape {:>8}: sequential {:8.1f} Mrows/s, '
+                  'windowed {:8.1f} windows/s'.format(
+                      name, str(table.chunkshape[0]), rows / seq / 1e6,
+                      args.windows / win))
+        h5.close()
+
+if __name__ == '__main__':
+    main()
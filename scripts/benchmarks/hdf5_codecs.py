@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+""" Benchmarks Blosc codecs, compression levels and shuffle filters on a
+sample of each modality, reporting the compression ratio and write and read
+throughput, and selects a filter profile.
+Uses synthetic samples of typical modalities, or RADAR CSV modality folders
+given as name=path.
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from radar.defaults import TIME_COLS
+from radar.io.csv import _read_folder
+from radar.io.hdf5 import open_project_file
+from radar.io.compression import candidate_filters, benchmark_filters, \
+                                 select_filter
+
+def synthetic(rows, freq, columns, jitter=0.002):
+    start = pd.Timestamp('2018-01-01').timestamp()
+    t = start + np.arange(rows) / freq + np.random.randn(rows) * jitter
+    df = pd.DataFrame({
+        'key.projectId': 'RADAR-CNS',
+        'key.userId': 'a3f1c2d4-6b0e-4c55-9d2a-0f4e8b1c7a90',
+        'key.sourceId': '00:07:80:1F:52:0F',
+        'value.time': t,
+        'value.timeReceived': t + 0.5 + np.random.rand(rows) * 0.1,
+    }, index=range(rows))
+    walk = np.cumsum(np.random.randn(rows, len(columns)), axis=0) * 0.01
+    for i, col in enumerate(columns):
+        df[col] = (walk[:, i] + np.random.randn(rows) * 0.05).astype(np.float32)
+    return df
+
+def synthetic_samples(rows):
+    return {
+        'android_empatica_e4_acceleration':
+            synthetic(rows, 32, ['value.x', 'value.y', 'value.z']),
+        'android_empatica_e4_blood_volume_pulse':
+            synthetic(rows, 64, ['value.bloodVolumePulse']),
+        'android_phone_battery_level':
+            synthetic(rows // 100, 1 / 60., ['value.batteryLevel']),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('folders', nargs='*',
+                        help='Modality folders as name=path')
+    parser.add_argument('--extension', default='.csv.gz')
+    parser.add_argument('--rows', type=int, default=200000,
+                        help='Rows per synthetic or CSV sample')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 5, 9])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--store', metavar='H5_FILE',
+                        help='Store the selected profile in a project file')
+    args = parser.parse_args()
+
+    if args.folders:
+        samples = {}
+        for arg in args.folders:
+            name, path = arg.split('=', 1)
+            df = _read_folder(path, extension=args.extension,
+                              time_columns=TIME_COLS)
+            samples[name] = df.iloc[:args.rows]
+    else:
+        samples = synthetic_samples(args.rows)
+
+    filters = candidate_filters(levels=args.levels)
+    profile = {}
+    pd.set_option('display.width', 120)
+    for name, df in samples.items():
+        results = benchmark_filters(df, filters, repeats=args.repeats)
+        profile[name] = select_filter(results)
+        print('{} ({} rows)'.format(name, len(df)))
+        print(results.sort_values('ratio', ascending=False)
+                     .to_string(index=False, float_format='{:.2f}'.format))
+        print('Selected:', profile[name], '\n')
+
+    if args.store:
+        with open_project_file(args.store, mode='a') as h5:
+            h5.set_filter_profile(profile)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+""" Benchmarks reading a subset of columns from a radar.io.hdf5.RadarTable,
+comparing RadarTable.__getitem__ (record array and DataFrame.from_records),
+reading each column with Table.read(field=...), and the columnar
+RadarTable.read_columns (blocks of records split into columns), by time and
+peak memory, for the whole table and for shorter row ranges.
+"""
+import os
+import time
+import tempfile
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file
+
+def make_dataframe(rows, freq=32):
+    t = pd.Timestamp('2018-01-01').value + \
+        (np.arange(rows) * 1e9 / freq).astype(np.int64)
+    return pd.DataFrame({
+        'key.projectId': 'radar',
+        'key.userId': 'user',
+        'key.sourceId': 'source',
+        'value.time': pd.to_datetime(t),
+        'value.timeReceived': pd.to_datetime(t + int(5e8)),
+        'value.x': np.random.randn(rows).astype(np.float32),
+        'value.y': np.random.randn(rows).astype(np.float32),
+        'value.z': np.random.randn(rows).astype(np.float32),
+    })
+
+def measure(func, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def records(table, columns, stop):
+    return table[:stop][columns]
+
+def fields(table, columns, stop):
+    return pd.DataFrame({col: table.read(0, stop, field=col)
+                         for col in columns})
+
+def columnar(table, columns, stop):
+    return table.read_columns(columns, stop=stop)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--ranges', type=int, nargs='*',
+                        default=[100, 10000, 1000000],
+                        help='Shorter row ranges to read')
+    args = parser.parse_args()
+
+    columns = ['value.time', 'value.x']
+    with tempfile.TemporaryDirectory() as path:
+        h5 = open_project_file(os.path.join(path, 'bench.h5'), mode='w')
+        table = h5.create_radar_table('/participant', 'acceleration',
+                                      obj=make_dataframe(args.rows))
+        h5.flush()
+        print('{} rows, reading columns {}'.format(args.rows, columns))
+        for rows in sorted(set(args.ranges + [args.rows])):
+            for name, func in (('records', records), ('fields', fields),
+                               ('columnar', columnar)):
+                elapsed, peak = measure(func, table, columns, rows)
+                print('{:>8} rows {:>10}: {:8.4f} s  peak {:8.1f} MB'.format(
+                    rows, name, elapsed, peak / 1e6))
+        h5.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+""" Compares storing the time columns of a regularly sampled modality as full
+arrays and as delta encoded columns (RadarDataGroup.insert_delta_times):
+file size, full read time and windowed read times, by row and by time
+(RadarDataGroup.time_slice), checking that the times
+read back exactly match those written.
+"""
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file
+
+def make_frame(rows, freq, gaps, jitter):
+    rng = np.random.default_rng(0)
+    interval = int(1e9 / freq)
+    t = pd.Timestamp('2018-01-01').value + np.arange(rows) * interval
+    for row in rng.choice(rows, gaps, replace=False):
+        t[row:] += int(rng.integers(1, 3600)) * 10**9
+    jittered = rng.choice(rows, int(jitter * rows), replace=False)
+    t[jittered] += rng.integers(-interval // 4, interval // 4, len(jittered))
+    return pd.DataFrame({
+        'value.time': t.view('M8[ns]'),
+        'value.timeReceived': t / 1e9,
+        'value.x': rng.standard_normal(rows).astype(np.float32),
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--frequency', type=float, default=32)
+    parser.add_argument('--gaps', type=int, default=50)
+    parser.add_argument('--jitter', type=float, default=0.001,
+                        help='Fraction of jittered samples')
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.frequency, args.gaps, args.jitter)
+    interval = 1 / args.frequency
+    time_cols = ['value.time', 'value.timeReceived']
+    print('{} rows at {} Hz, {} gaps, {:.2%} jitter'.format(
+        args.rows, args.frequency, args.gaps, args.jitter))
+    with tempfile.TemporaryDirectory() as path:
+        for name, delta_times in (
+                ('full', None),
+                ('delta', {col: interval for col in time_cols})):
+            fn = os.path.join(path, name + '.h5')
+            h5 = open_project_file(fn, mode='w')
+            group = h5.create_radar_data_group('/p', 'acc')
+            t0 = time.perf_counter()
+            group.insert_dataframe(df, delta_times=delta_times)
+            h5.close()
+            t_write = time.perf_counter() - t0
+
+            h5 = open_project_file(fn, mode='r')
+            group = h5.create_radar_data_group('/p', 'acc')
+            t0 = time.perf_counter()
+            out = group[time_cols]
+            t_read = time.perf_counter() - t0
+            assert all(out[col].equals(df[col]) for col in time_cols)
+            t0 = time.perf_counter()
+            for start in range(0, args.rows, args.rows // 100):
+                group[time_cols, start:start + 1000]
+            t_window = (time.perf_counter() - t0) / 100
+            times = df['value.time'].values
+            t0 = time.perf_counter()
+            for start in range(0, args.rows, args.rows // 100):
+                stop = min(start + 999, args.rows - 1)
+                group.time_slice(times[start], times[stop], columns=time_cols)
+            t_slice = (time.perf_counter() - t0) / 100
+            h5.close()
+            print('{:>6}: {:8.1f} MB  write {:7.3f} s  read {:7.3f} s  '
+                  '1000 row window {:7.3f} ms  time_slice {:7.3f} ms'.format(
+                      name, os.path.getsize(fn) / 1e6, t_write, t_read,
+                      1e3 * t_window, 1e3 * t_slice))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+""" Benchmarks building a RADAR HDF5 project file with ProjectFile as the number
+of participants grows, then opening it, walking every group in the file
+compared with using the stored RADAR index, and the time to then access a
+single participant.
+"""
+import os
+import time
+import tempfile
+import argparse
+import numpy as np
+import pandas as pd
+import tables
+from radar.io.hdf5 import open_project_file, INDEX_NODE
+
+MODALITIES = ('android_phone_acceleration', 'android_phone_battery_level',
+              'android_phone_step_count', 'fitbit_heart_rate')
+
+def make_project(path, participants, subprojects=2, rows=64):
+    df = pd.DataFrame({
+        'value.time': np.arange(rows, dtype=np.int64) * 10**9,
+        'value.x': np.random.randn(rows).astype(np.float32),
+    })
+    h5 = open_project_file(path, mode='w')
+    for i in range(participants):
+        sp = 'SP{}'.format(i % subprojects)
+        if sp not in h5.root:
+            h5.create_group('/', sp)._v_attrs.RADAR_TYPE = 'SUBPROJECT'
+        ptc = h5.create_group('/' + sp, 'P{:05d}'.format(i))
+        ptc._v_attrs.RADAR_TYPE = 'PARTICIPANT'
+        for m in MODALITIES:
+            h5.save_dataframe(df, ptc._v_pathname, m, expectedrows=rows)
+    h5.close()
+
+def time_open(path, participant=None, mode='r'):
+    t0 = time.perf_counter()
+    h5 = open_project_file(path, mode=mode)
+    t_open = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    if participant is not None:
+        getattr(h5.data.participants, participant).get_data_dict()
+    t_access = time.perf_counter() - t0
+    h5.close()
+    return t_open, t_access
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--participants', type=int, nargs='+',
+                        default=[50, 500, 2500, 5000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        for n in args.participants:
+            fn = os.path.join(path, 'bench_{}.h5'.format(n))
+            t0 = time.perf_counter()
+            make_project(fn, n)
+            t_build = time.perf_counter() - t0
+            participant = 'P{:05d}'.format(n - 1)
+            indexed = time_open(fn, participant)
+            writable = time_open(fn, mode='a')
+            with tables.open_file(fn, mode='a') as h5:
+                h5.remove_node('/', INDEX_NODE)
+            walk = time_open(fn, participant)
+            print('{:>6} participants  build {:8.3f} ms/participant  '
+                  'open: walk {:8.4f} s  index {:8.4f} s  (mode a {:8.4f} s)'
+                  '  one participant: {:8.4f} s'.format(
+                      n, t_build / n * 1000, walk[0], indexed[0],
+                      writable[0], indexed[1]))
+
+if __name__ == '__main__':
+    main()
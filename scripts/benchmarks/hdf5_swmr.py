@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+""" Measures how quickly reader processes see rows appended to a RADAR HDF5
+project file by a writer process, using ProjectFile's single writer, multiple
+reader (swmr=True) mode.
+Each appended row records the time it was written; readers poll the file and
+record the delay between a row being written and first being read.
+"""
+import os
+# SWMR project files need HDF5 file locking off before HDF5 is loaded
+os.environ.setdefault('HDF5_USE_FILE_LOCKING', 'FALSE')
+import time
+import tempfile
+import argparse
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file
+
+NODE = '/writer'
+NAME = 'data'
+
+def make_frame(rows, start=0):
+    return pd.DataFrame({
+        'written': np.full(rows, time.time()),
+        'value.x': np.arange(start, start + rows, dtype=np.float32),
+    })
+
+def writer(path, commits, rows, interval, ready, done):
+    h5 = open_project_file(path, mode='w', swmr=True)
+    with h5.writing():
+        table = h5.create_radar_table(NODE, NAME, obj=make_frame(rows))
+    ready.set()
+    durations = []
+    for i in range(1, commits):
+        time.sleep(interval)
+        t0 = time.perf_counter()
+        with h5.writing():
+            table.append_dataframe(make_frame(rows, i * rows))
+        durations.append(time.perf_counter() - t0)
+    h5.close()
+    done.set()
+    print('writer: {} commits of {} rows, commit time mean {:.2f} ms, '
+          'max {:.2f} ms'.format(commits, rows, 1e3 * np.mean(durations),
+                                 1e3 * np.max(durations)))
+
+def reader(path, idx, poll, expected, ready, done, results):
+    ready.wait()
+    h5 = open_project_file(path, mode='r', swmr=True)
+    latencies = []
+    seen = 0
+    while seen < expected:
+        with h5.reading():
+            table = h5.get_node(NODE, NAME)
+            nrows = table.nrows
+            if nrows > seen:
+                written = table.read(seen, nrows, field='written')
+                now = time.time()
+                latencies.extend(now - np.unique(written))
+                values = table.read(seen, nrows, field='value.x')
+                assert np.array_equal(values, np.arange(seen, nrows))
+                seen = nrows
+        if done.is_set() and seen < expected and not h5.refresh():
+            break
+        time.sleep(poll)
+    h5.close()
+    results.put((idx, seen, latencies))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--commits', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=256,
+                        help='Rows per commit')
+    parser.add_argument('--interval', type=float, default=0.01,
+                        help='Seconds between writer commits')
+    parser.add_argument('--poll', type=float, default=0.002,
+                        help='Seconds between reader polls')
+    args = parser.parse_args()
+
+    expected = args.commits * args.rows
+    with tempfile.TemporaryDirectory() as path:
+        fn = os.path.join(path, 'swmr.h5')
+        ready, done = mp.Event(), mp.Event()
+        results = mp.Queue()
+        procs = [mp.Process(target=writer, args=(fn, args.commits, args.rows,
+                                                 args.interval, ready, done))]
+        procs.extend(mp.Process(target=reader,
+                                args=(fn, i, args.poll, expected, ready,
+                                      done, results))
+                     for i in range(args.readers))
+        for p in procs:
+            p.start()
+        out = sorted(results.get() for _ in range(args.readers))
+        for p in procs:
+            p.join()
+
+    for idx, seen, latencies in out:
+        lat = 1e3 * np.array(latencies)
+        print('reader {}: {}/{} rows, latency ms: median {:.2f}, '
+              'p95 {:.2f}, max {:.2f}'.format(
+                  idx, seen, expected, np.median(lat),
+                  np.percentile(lat, 95), lat.max()))
+
+if __name__ == '__main__':
+    main()
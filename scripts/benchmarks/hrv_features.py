@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+""" Benchmarks windowed heart rate variability features of inter-beat
+interval streams (radar.feature.hrv_features) on a synthetic IBI stream of
+the given number of days, against computing the same features window by
+window with pandas and scipy.signal.lombscargle, and checks that the
+results match.
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.signal import lombscargle
+from radar.feature import hrv_features
+from radar.feature.hrv import IBI_COLUMN, TIME_COLUMN, LF_BAND, HF_BAND, \
+                              FREQ_STEP
+
+def synthetic(days, dropout=0.3):
+    rng = np.random.default_rng(0)
+    n = int(days * 86400 / 0.8)
+    k = np.arange(n) * 0.8
+    ibi = (0.8 + 0.05 * np.sin(2 * np.pi * 0.25 * k)
+           + 0.03 * np.sin(2 * np.pi * 0.1 * k)
+           + 0.1 * np.sin(2 * np.pi * k / 86400)
+           + 0.01 * rng.standard_normal(n))
+    t = pd.Timestamp('2018-01-01').timestamp() + np.cumsum(ibi)
+    keep = rng.random(n) > dropout
+    return pd.DataFrame({TIME_COLUMN: t[keep], IBI_COLUMN: ibi[keep]})
+
+def looped(df, window, step, min_beats=30):
+    freqs = np.arange(LF_BAND[0], HF_BAND[1] + FREQ_STEP / 2, FREQ_STEP)
+    lf_mask = (freqs >= LF_BAND[0]) & (freqs < LF_BAND[1])
+    hf_mask = (freqs >= HF_BAND[0]) & (freqs < HF_BAND[1])
+    t, ibi = df[TIME_COLUMN].values, df[IBI_COLUMN].values
+    rows = {}
+    start = t[0] // step * step
+    while start <= t[-1]:
+        m = (t >= start) & (t < start + window)
+        x, y = t[m], ibi[m]
+        if len(y) >= min_beats:
+            valid = np.abs(np.diff(x) - y[1:]) <= 0.25
+            d = np.diff(y)[valid]
+            p = lombscargle(x - x[0], y - y.mean(), 2 * np.pi * freqs)
+            lf = p[lf_mask].sum() * FREQ_STEP
+            hf = p[hf_mask].sum() * FREQ_STEP
+            rows[start] = {'n_beats': len(y), 'mean_nn': y.mean(),
+                           'sdnn': y.std(ddof=1),
+                           'rmssd': np.sqrt((d**2).mean()),
+                           'pnn50': (np.abs(d) > 0.05).mean(),
+                           'lf': lf, 'hf': hf, 'lf_hf': lf / hf}
+        start += step
+    return pd.DataFrame.from_dict(rows, orient='index')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=float, default=90)
+    parser.add_argument('--window', type=float, default=300,
+                        help='Window length (s)')
+    parser.add_argument('--step', type=float, default=60,
+                        help='Window step (s)')
+    parser.add_argument('--loop-days', type=float, default=1,
+                        help='Days of the stream used by the looped version')
+    args = parser.parse_args()
+
+    df = synthetic(args.days)
+    t0 = time.perf_counter()
+    out = hrv_features(df, args.window, args.step)
+    t_all = time.perf_counter() - t0
+    print('{} days, {} beats, {} windows: {:.2f} s'.format(
+        args.days, len(df), len(out), t_all))
+
+    part = df[df[TIME_COLUMN] < df[TIME_COLUMN].iloc[0]
+              + args.loop_days * 86400]
+    t0 = time.perf_counter()
+    ref = looped(part, args.window, args.step)
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = hrv_features(part, args.window, args.step).dropna()
+    t_new = time.perf_counter() - t0
+    assert np.allclose(new.index.astype('int64') / 1e9, ref.index)
+    assert np.allclose(new[ref.columns], ref, rtol=1e-6)
+    print('{} days: looped {:.2f} s, hrv_features {:.3f} s'.format(
+        args.loop_days, t_loop, t_new))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+""" Benchmarks opening IMEC recordings, reading time spans of a modality,
+iterating over overlapping windows of a modality and reading time spans of
+several modalities resampled to a common rate (radar.io.imec.Imec), using
+a synthetic IMEC HDF5 file of the given duration.
+Windows are read with Imec.iter_windows and, for comparison, with one
+Imec.get_df call each. Aligned spans are read with Imec.get_aligned and with
+Imec.get_df_time and pandas resampling.
+"""
+import os
+import time
+import tempfile
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+import tables
+from radar.io.imec import Imec
+
+START = pd.Timestamp('2018-01-01 09:00:00')
+FREQS = {'ACC-X': 51.2, 'ACC-Y': 51.2, 'ACC-Z': 51.2, 'Battery': 1,
+         'ECG': 256, 'EMG': 1024, 'GSR-1': 32, 'GSR-2': 32, 'PIE': 32,
+         'Temp': 1}
+
+def write_imec(path, hours, chunk=16384):
+    """ Writes a synthetic IMEC file with the layout read by Imec """
+    rng = np.random.default_rng(0)
+    warnings.simplefilter('ignore', tables.NaturalNameWarning)
+    with tables.open_file(path, mode='w') as h5:
+        radar = h5.create_group('/Devices', 'Radar', createparents=True)
+        radar._v_attrs['#DateTime'] = str(START).encode()
+        filters = tables.Filters(complib='blosc:lz4', complevel=1,
+                                 shuffle=True)
+        for name, freq in FREQS.items():
+            group = h5.create_group('/Devices/Radar/Signal', name,
+                                    createparents=True)
+            group._v_attrs['#Freq'] = str(freq).encode()
+            rows = int(hours * 3600 * freq)
+            data = h5.create_earray(group, 'Data', tables.Int16Atom(),
+                                    shape=(0,), expectedrows=rows,
+                                    chunkshape=(min(chunk, max(rows, 1)),),
+                                    filters=filters)
+            for i in range(0, rows, 10**7):
+                n = min(10**7, rows - i)
+                data.append(np.cumsum(rng.integers(-8, 9, n)).astype('i2'))
+
+def timed(func, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = func()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--modality', default='ECG')
+    parser.add_argument('--span', type=float, default=60,
+                        help='Seconds read per time span')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--window', type=float, default=30,
+                        help='Window length (seconds)')
+    parser.add_argument('--step', type=float, default=5,
+                        help='Window step (seconds)')
+    parser.add_argument('--aligned', nargs='+',
+                        default=['ECG', 'Accelerometer', 'GSR'],
+                        help='Modalities read by get_aligned')
+    parser.add_argument('--target-rate', type=float, default=100,
+                        help='Sampling rate (Hz) of aligned spans')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        fn = os.path.join(path, 'imec.h5')
+        write_imec(fn, args.hours)
+        t_open, imec = timed(lambda: Imec(fn).close(), 5)
+        imec = Imec(fn)
+        print('{} hour recording, open {:.2f} ms'.format(args.hours,
+                                                        1e3 * t_open))
+        freq = imec._freqs[args.modality]
+        span = pd.Timedelta(args.span, 's')
+        starts = START + pd.to_timedelta(
+            np.linspace(0, args.hours * 3600 - args.span, args.repeats), 's')
+        t0 = time.perf_counter()
+        for start in starts:
+            df = imec.get_df_time(args.modality, start, start + span)
+            assert len(df) == round(args.span * freq)
+            assert abs(df.index[0] - start) <= pd.Timedelta(1 / freq, 's')
+        t_span = (time.perf_counter() - t0) / args.repeats
+        print('{}: {:.0f} s span ({} rows) {:.2f} ms'.format(
+            args.modality, args.span, len(df), 1e3 * t_span))
+
+        window = pd.Timedelta(args.window, 's')
+        step = pd.Timedelta(args.step, 's')
+        index = imec.time_index(args.modality)
+        t0 = time.perf_counter()
+        n = 0
+        for start, values in imec.iter_windows(args.modality, window, step):
+            n += 1
+        t_iter = time.perf_counter() - t0
+        print('iter_windows: {} windows of {:g} s every {:g} s, '
+              '{:.2f} s ({:.3f} ms per window)'.format(
+                  n, args.window, args.step, t_iter, 1e3 * t_iter / n))
+
+        win, hop = round(args.window * freq), round(args.step * freq)
+        n = min(n, 1000)
+        t0 = time.perf_counter()
+        for i in range(n):
+            df = imec.get_df(args.modality, slice(i * hop, i * hop + win))
+        t_naive = time.perf_counter() - t0
+        windows = imec.iter_windows(args.modality, window, step)
+        for i, (start, values) in zip(range(n), windows):
+            df = imec.get_df(args.modality, slice(i * hop, i * hop + win))
+            assert start == index[i * hop]
+            assert np.array_equal(values, df.iloc[:, 1:].values)
+        print('get_df: {:.3f} ms per window'.format(1e3 * t_naive / n))
+
+        rule = pd.Timedelta(1 / args.target_rate, 's')
+        t0 = time.perf_counter()
+        for start in starts:
+            df = imec.get_aligned(args.aligned, start, start + span,
+                                  args.target_rate)
+        t_aligned = (time.perf_counter() - t0) / args.repeats
+        t0 = time.perf_counter()
+        for start in starts:
+            df = pd.concat([imec.get_df_time(m, start, start + span, rule)
+                            for m in args.aligned], axis=1, sort=True)
+        t_pandas = (time.perf_counter() - t0) / args.repeats
+        print('{} at {:g} Hz, {:.0f} s span: get_aligned {:.2f} ms, '
+              'get_df_time and resample {:.2f} ms'.format(
+                  ', '.join(args.aligned), args.target_rate, args.span,
+                  1e3 * t_aligned, 1e3 * t_pandas))
+        imec.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+""" Benchmarks Butterworth filtering of multi-channel accelerometer signals
+(radar.preprocess.filters): designing the filter on each call and filtering
+channel by channel with filtfilt, against the cached second-order sections
+filtering all channels in one sosfiltfilt call, gravity and linear
+acceleration from one filter pass (accel_components), and streaming
+filtering of the signal in chunks (stream_butterworth).
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from scipy import signal
+from radar.preprocess import filters
+
+def per_channel(df, cutoff, freq, order, ftype):
+    out = df.copy()
+    for col in out:
+        b, a = signal.butter(order, cutoff / (0.5 * freq), ftype)
+        out[col] = signal.filtfilt(b, a, out[col])
+    return out
+
+def timed(func, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = func()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--channels', type=int, default=3)
+    parser.add_argument('--frequency', type=float, default=32)
+    parser.add_argument('--segments', type=int, default=200,
+                        help='Number of short segments filtered one by one')
+    parser.add_argument('--chunk', type=int, default=65536,
+                        help='Rows per chunk when streaming')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    t = np.arange(args.rows) / args.frequency
+    values = (np.sin(2 * np.pi * 0.05 * t)[:, None]
+              + rng.standard_normal((args.rows, args.channels)))
+    df = pd.DataFrame(values, columns=['value.{}'.format(i)
+                                       for i in range(args.channels)])
+    freq = args.frequency
+    print('{} rows x {} channels at {} Hz'.format(args.rows, args.channels,
+                                                 freq))
+
+    t_old, old = timed(lambda: (per_channel(df, 0.5, freq, 5, 'lowpass'),
+                                per_channel(df, 0.5, freq, 5, 'highpass')),
+                       args.repeats)
+    t_new, new = timed(lambda: (filters.accel_gravity(df, freq),
+                                filters.accel_linear(df, freq)),
+                       args.repeats)
+    t_one, one = timed(lambda: filters.accel_components(df, freq),
+                       args.repeats)
+    print('gravity and linear, per channel filtfilt: {:.3f} s'.format(t_old))
+    print('gravity and linear, sosfiltfilt:          {:.3f} s'.format(t_new))
+    print('accel_components (one pass):              {:.3f} s'.format(t_one))
+    print('max difference from per channel filtfilt: gravity {:.2e}, '
+          'linear {:.2e}'.format(np.abs(old[0] - new[0]).values.max(),
+                                 np.abs(old[1] - new[1]).values.max()))
+    assert np.allclose(one[0] + one[1], df)
+
+    segments = np.array_split(values.T, args.segments, axis=1)
+    t_old, _ = timed(lambda: [[signal.filtfilt(
+        *signal.butter(5, 0.5 / (0.5 * freq), 'highpass'), ch)
+        for ch in seg] for seg in segments], args.repeats)
+    t_new, _ = timed(lambda: [filters.butterworth(seg, 0.5, freq)
+                              for seg in segments], args.repeats)
+    print('{} segments of {} rows: per call design {:.3f} s, '
+          'cached {:.3f} s'.format(args.segments, segments[0].shape[1],
+                                   t_old, t_new))
+
+    def chunks():
+        for i in range(0, args.rows, args.chunk):
+            yield values[i:i + args.chunk]
+
+    t_whole, whole = timed(lambda: filters.butterworth(
+        values, 0.5, freq, ftype='lowpass', axis=0), args.repeats)
+    t_stream, stream = timed(lambda: np.concatenate(list(
+        filters.stream_butterworth(chunks(), 0.5, freq, ftype='lowpass'))),
+        args.repeats)
+    print('lowpass of {} row chunks: whole array {:.3f} s, streamed {:.3f} s, '
+          'max difference {:.2e}'.format(args.chunk, t_whole, t_stream,
+                                         np.abs(whole - stream).max()))
+
+if __name__ == '__main__':
+    main()
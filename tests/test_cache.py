@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+pytest.importorskip('pyarrow')
+import radar.io.cache as cache
+from radar.io.cache import FolderCache, CachedTable, typed_columns
+
+def write_files(folder, hours=3, rows=20):
+    os.makedirs(folder, exist_ok=True)
+    start = pd.Timestamp('2018-01-01').timestamp()
+    for h in range(hours):
+        t = start + h * 3600 + np.arange(rows, dtype=float)
+        pd.DataFrame({'key.userId': 'user', 'value.time': t,
+                      'value.x': np.arange(rows) / 3.0}).to_csv(
+            os.path.join(folder, '20180101_{:02d}00.csv'.format(h)),
+            index=False)
+
+def test_typed_columns():
+    df = pd.DataFrame({'key.userId': ['user'] * 4,
+                       'value.name': ['a', 'b', 'c', 'd'],
+                       'value.duration_time': [1.5] * 4,
+                       'value.x': [0.5] * 4})
+    out = typed_columns(df)
+    assert out['key.userId'].dtype == 'category'
+    assert out['value.name'].dtype != 'category'
+    assert out['value.duration_time'].dtype == np.float64
+    assert out['value.x'].dtype == np.float32
+
+def test_cache_reused_until_sources_change(tmp_path, monkeypatch):
+    folder = str(tmp_path / 'ptc' / 'acc')
+    write_files(folder)
+    folder_cache = FolderCache(str(tmp_path / 'cache'))
+    path = folder_cache.cached_file(folder)
+    table = CachedTable(str(tmp_path / 'ptc'), 'acc', cache=folder_cache)
+    df = table._data.compute()
+    assert len(df) == 60
+    assert df['value.time'].dtype == 'datetime64[ns]'
+    assert df['key.userId'].dtype == 'category'
+
+    read_folder = cache._read_folder
+    def fail(*args, **kwargs):
+        raise AssertionError('The folder should not be read again')
+    monkeypatch.setattr(cache, '_read_folder', fail)
+    assert folder_cache.cached_file(folder) == path
+
+    write_files(folder, hours=4)
+    monkeypatch.setattr(cache, '_read_folder', read_folder)
+    folder_cache.cached_file(folder)
+    assert len(cache.read_cached(path, columns=['value.x'])) == 80
+
+def test_evict(tmp_path):
+    folder_cache = FolderCache(str(tmp_path / 'cache'))
+    for name in ('acc', 'eda'):
+        write_files(str(tmp_path / name))
+        folder_cache.cached_file(str(tmp_path / name))
+    assert len(folder_cache.entries()) == 2
+    folder_cache.evict(max_size=folder_cache.size() - 1)
+    assert len(folder_cache.entries()) == 1
+    folder_cache.clear()
+    assert folder_cache.size() == 0
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import tables
+from radar.io.compression import candidate_filters, benchmark_filters, \
+    select_filter, tune_filter_profile
+from radar.io.hdf5 import open_project_file
+
+def make_frame(rows=1000):
+    return pd.DataFrame({'value.time': np.arange(rows, dtype=np.float64),
+                         'value.x': np.random.randn(rows)})
+
+def settings(filters):
+    return filters.complib, filters.complevel, filters.shuffle, \
+        filters.bitshuffle
+
+def test_filter_profile(tmp_path):
+    path = str(tmp_path / 'project.h5')
+    zstd = tables.Filters(complib='blosc:zstd', complevel=5)
+    lz4 = tables.Filters(complib='blosc:lz4', complevel=9, bitshuffle=True)
+    h5 = open_project_file(path, mode='w')
+    assert h5.filter_profile() == {}
+    h5.set_filter_profile({'acc': zstd})
+    h5.set_filter_profile({'eda': lz4})
+    assert h5.filter_profile() == {'acc': zstd, 'eda': lz4}
+    assert h5.modality_filters('bvp') == h5.filters
+    h5.create_radar_table('/ptc', 'acc', obj=make_frame())
+    h5.create_radar_data_group('/ptc', 'eda', obj=make_frame())
+    h5.create_radar_table('/ptc', 'bvp', obj=make_frame(), filters=lz4)
+    h5.close()
+
+    h5 = open_project_file(path, mode='a')
+    assert settings(h5.get_node('/ptc/acc').filters) == settings(zstd)
+    assert settings(h5.get_node('/ptc/eda/value.x').filters) == \
+        settings(lz4)
+    assert settings(h5.get_node('/ptc/bvp').filters) == settings(lz4)
+    h5.set_filter_profile({'bvp': zstd}, update=False)
+    assert h5.filter_profile() == {'bvp': zstd}
+    h5.close()
+
+def test_select_filter():
+    filters = candidate_filters(codecs=('blosc:lz4', 'nocodec'), levels=(1,))
+    assert len(filters) == 3
+    assert [f.bitshuffle for f in filters] == [False, True, False]
+    results = benchmark_filters(make_frame(), filters, repeats=1)
+    assert len(results) == 3 and (results['ratio'] > 0).all()
+
+    results = pd.DataFrame({'complib': ['blosc:lz4', 'blosc:zstd'],
+                            'complevel': [1, 9], 'shuffle': [True, True],
+                            'bitshuffle': [False, False],
+                            'ratio': [2., 4.], 'read_mbs': [100., 90.],
+                            'write_mbs': [100., 10.]})
+    assert select_filter(results).complib == 'blosc:lz4'
+    assert select_filter(results, write_weight=0).complib == 'blosc:zstd'
+
+    profile = tune_filter_profile({'acc': make_frame()}, filters[:1],
+                                  repeats=1)
+    assert profile == {'acc': filters[0]}
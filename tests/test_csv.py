@@ -0,0 +1,93 @@
+import os
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from radar.io.csv import CsvTable, read_folder, file_time_index, \
+    TIME_EXTENT_CACHE, _read_files, _read_file, _scan_time_extents
+
+def write_hourly_files(path, hours=3, rows=10, start='2018-01-01'):
+    start = pd.Timestamp(start).timestamp()
+    frames = []
+    for h in range(hours):
+        t = start + h * 3600 + np.arange(rows, dtype=float)
+        df = pd.DataFrame({'value.time': t, 'value.timeReceived': t + 0.5,
+                           'value.x': np.arange(rows, dtype=float) + h})
+        fname = pd.Timestamp(t[0], unit='s').strftime('%Y%m%d_%H00.csv')
+        df.to_csv(str(path / fname), index=False)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+def test_epoch_times_converted(tmp_path):
+    expected = write_hourly_files(tmp_path)
+    df = read_folder(str(tmp_path), dtype={'value.time': np.float64,
+                                           'value.timeReceived': np.float64},
+                     time_columns=['value.time', 'value.timeReceived'])
+    assert df['value.time'].dtype == 'datetime64[ns]'
+    assert df['value.timeReceived'].dtype == 'datetime64[ns]'
+    assert (df['value.timeReceived'] - df['value.time'] ==
+            pd.Timedelta('500ms')).all()
+    seconds = (df['value.time'] - pd.Timestamp(0)).dt.total_seconds()
+    assert list(seconds) == list(expected['value.time'])
+
+def test_parsed_frames_bounded(tmp_path):
+    expected = write_hourly_files(tmp_path, hours=24)
+    files = sorted(str(f) for f in tmp_path.iterdir())
+    lock = threading.Lock()
+    alive = []
+    peak = [0]
+
+    def release():
+        with lock:
+            alive.pop()
+
+    def reader(f, **kwargs):
+        with lock:
+            alive.append(f)
+            peak[0] = max(peak[0], len(alive))
+        df = _read_file(f, **kwargs)
+        weakref.finalize(df, release)
+        return df
+
+    df = _read_files(files, workers=2, max_in_flight=3, batch_files=4,
+                     reader=reader)
+    assert df['value.x'].tolist() == expected['value.x'].tolist()
+    # Frames being parsed or waiting to be yielded, and one batch
+    assert peak[0] <= 3 + 4
+
+def test_time_range_reads_overlapping_files(tmp_path):
+    expected = write_hourly_files(tmp_path, hours=4, rows=3600)
+    table = CsvTable(str(tmp_path.parent), tmp_path.name)
+    assert table._data.known_divisions
+    files = table.files_between('2018-01-01 01:30', '2018-01-01 02:10')
+    assert [os.path.basename(f) for f in files] == \
+        ['20180101_0100.csv', '20180101_0200.csv']
+    df = table.loc['2018-01-01 01:30':'2018-01-01 02:10']
+    seconds = (df.index - pd.Timestamp(0)).total_seconds()
+    start = pd.Timestamp('2018-01-01 01:30').timestamp()
+    assert list(seconds) == [t for t in expected['value.time']
+                             if start <= t <= start + 2400]
+
+def test_time_index_requires_time_column(tmp_path):
+    write_hourly_files(tmp_path)
+    files = sorted(str(f) for f in tmp_path.iterdir())
+    assert file_time_index(files, 'value.missing') is None
+    assert file_time_index(files).index.tolist() == files
+
+def test_time_extents_cached_in_memory(tmp_path, monkeypatch):
+    expected = write_hourly_files(tmp_path)
+    files = sorted(str(f) for f in tmp_path.iterdir())
+    renamed = [str(tmp_path / 'part{}.csv'.format(i)) for i in range(3)]
+    for f, new in zip(files, renamed):
+        os.rename(f, new)
+    # The cache cannot be written where the data is
+    (tmp_path / TIME_EXTENT_CACHE).mkdir()
+    index = file_time_index(renamed)
+    assert index['start'].iloc[0] == \
+        pd.Timestamp(expected['value.time'].iloc[0], unit='s')
+
+    def fail(*args, **kwargs):
+        raise AssertionError('Files should not be scanned again')
+    monkeypatch.setattr(pd, 'read_csv', fail)
+    assert _scan_time_extents(renamed, 'value.time')[1][-1] == \
+        pd.Timestamp(expected['value.time'].iloc[-1], unit='s')
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+from radar.feature import extract_features
+
+def make_signal(gap=None):
+    index = pd.date_range('2020-01-01', periods=100, freq='100ms')
+    if gap is not None:
+        index = index.append(index[-1] + pd.Timedelta(gap, 's')
+                             + pd.to_timedelta(np.arange(100) * 0.1, 's'))
+    return pd.DataFrame({'value.x': np.arange(len(index), dtype=float)},
+                        index=index)
+
+def test_windows_do_not_span_gaps():
+    df = make_signal(gap=5.05)
+    out = extract_features(df, 2, 1, features=['min', 'max'])
+    starts = (out.index - df.index[0]).total_seconds()
+    assert list(starts) == list(range(9)) + list(range(15, 23))
+    # Each window only holds samples from within its two seconds
+    assert (out['value.x.max'] - out['value.x.min'] == 19).all()
+
+def test_time_column_signal():
+    df = make_signal()
+    times = (df.index - pd.Timestamp(0)).total_seconds()
+    df = df.reset_index(drop=True).assign(**{'value.time': times})
+    out = extract_features(df, 2, features=['mean'])
+    assert list(out.columns) == ['value.x.mean']
+    assert list(out['value.x.mean']) == [9.5, 29.5, 49.5, 69.5, 89.5]
+
+def test_no_frequency():
+    df = make_signal().reset_index(drop=True)
+    with pytest.raises(ValueError):
+        extract_features(df, 2, features=['mean'])
+    out = extract_features(df, 2, freq=10, features=['mean'])
+    assert list(out.index) == [0, 20, 40, 60, 80]
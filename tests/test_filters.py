@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from scipy import signal
+from radar.preprocess.filters import butter_sos, butterworth, FilterBank, \
+    accel_components, stream_butterworth, stream_sosfiltfilt, _butter_sos
+
+def make_signal(rows=2000, channels=3):
+    t = np.arange(rows) / 50
+    return np.stack([np.sin(2 * np.pi * (i + 1) * t) + 0.1 * i
+                     + np.random.randn(rows) for i in range(channels)])
+
+def test_butter_sos_cache():
+    _butter_sos.cache_clear()
+    sos = butter_sos(0.5, 50)
+    assert np.array_equal(sos, signal.butter(5, 0.5 / 25, 'highpass',
+                                             output='sos'))
+    # The cached design is shared, but callers get a copy
+    sos[:] = 0
+    assert not np.array_equal(butter_sos(0.5, 50.0, order=5.0), sos)
+    assert np.array_equal(butter_sos([1, 5], 50, ftype='bandpass'),
+                          butter_sos((1.0, 5.0), 50, ftype='bandpass'))
+    info = _butter_sos.cache_info()
+    assert (info.misses, info.hits) == (2, 2)
+
+def test_filter_channels_together():
+    arr = make_signal()
+    sos = signal.butter(5, 2 / 25, 'lowpass', output='sos')
+    expected = np.stack([signal.sosfiltfilt(sos, x) for x in arr])
+    assert np.allclose(butterworth(arr, 2, 50, ftype='lowpass'), expected)
+    assert np.allclose(butterworth(arr.T, 2, 50, ftype='lowpass', axis=0),
+                       expected.T)
+    df = pd.DataFrame(arr.T, columns=['x', 'y', 'z'])
+    out = butterworth(df, 2, 50, ftype='lowpass')
+    assert list(out) == ['x', 'y', 'z'] and np.allclose(out, expected.T)
+
+    bank = FilterBank(50, {'low': (2, 'lowpass'),
+                           'band': {'cutoff': (1, 5), 'ftype': 'bandpass',
+                                    'order': 3}})
+    out = bank(arr)
+    assert np.allclose(out['low'], expected)
+    assert np.allclose(out['band'], butterworth(arr, (1, 5), 50, order=3,
+                                                ftype='bandpass'))
+    gravity, linear = accel_components(df, 50)
+    assert np.allclose(gravity + linear, df)
+    assert np.allclose(gravity, butterworth(df, 0.5, 50, ftype='lowpass'))
+
+def chunked(arr, sizes):
+    bounds = np.cumsum([0] + list(sizes))
+    return [arr[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+def test_stream_sosfiltfilt():
+    arr = make_signal(rows=20000).T
+    sos = butter_sos(0.5, 50)
+    expected = signal.sosfiltfilt(sos, arr, axis=0)
+    scale = np.abs(arr).max()
+    # Chunks shorter and longer than the padding and overlap
+    for sizes in ([20000], [1000] * 20, [7, 13, 3000, 1, 16979]):
+        out = list(stream_sosfiltfilt(chunked(arr, sizes), sos))
+        assert sum(len(c) for c in out) == len(arr)
+        assert np.abs(np.concatenate(out) - expected).max() < 1e-6 * scale
+
+    # Channels in rows, and pandas chunks keep their index and columns
+    out = np.concatenate(list(stream_sosfiltfilt(
+        chunked(arr, [5000] * 4), sos)), axis=0)
+    rows = list(stream_sosfiltfilt([c.T for c in chunked(arr, [5000] * 4)],
+                                   sos, axis=1))
+    assert np.allclose(np.concatenate(rows, axis=1), out.T)
+    df = pd.DataFrame(arr, columns=['x', 'y', 'z'],
+                      index=pd.date_range('2020-01-01', periods=len(arr),
+                                          freq='20ms'))
+    out = pd.concat(stream_butterworth(chunked(df, [3000] * 6 + [2000]),
+                                       0.5, 50))
+    assert out.index.equals(df.index) and list(out) == ['x', 'y', 'z']
+    assert np.abs(out.values - expected).max() < 1e-6 * scale
+
+def test_stream_short_signal():
+    arr = make_signal(rows=100, channels=1)[0]
+    sos = butter_sos(5, 50, ftype='lowpass')
+    out = np.concatenate(list(stream_sosfiltfilt(chunked(arr, [10] * 10),
+                                                 sos)))
+    assert np.allclose(out, signal.sosfiltfilt(sos, arr))
+    assert list(stream_sosfiltfilt([], sos)) == []
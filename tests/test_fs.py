@@ -0,0 +1,61 @@
+import os
+from radar.io.csv import CsvTable
+from radar.io.fs import open_project_folder
+from radar.io.manifest import MANIFEST_FILE
+
+HEADER = 'key.userId,value.time,value.x\n'
+
+def make_project(path, participants=('ptc1', 'ptc2'),
+                 modalities=('acc', 'eda'), hours=3):
+    for ptc in participants:
+        for modality in modalities:
+            folder = os.path.join(path, ptc, modality)
+            os.makedirs(folder)
+            for h in range(hours):
+                fname = '20180101_{:02d}00.csv'.format(h)
+                with open(os.path.join(folder, fname), 'w') as f:
+                    f.write(HEADER)
+                    f.write('{},{},{}\n'.format(ptc, 1514764800 + h * 3600, h))
+
+def test_modalities_load_lazily(tmp_path):
+    make_project(str(tmp_path))
+    project = open_project_folder(str(tmp_path))
+    assert not (tmp_path / MANIFEST_FILE).exists()
+    assert sorted(project.participants.keys()) == ['ptc1', 'ptc2']
+    data = project.participants['ptc1'].data
+    assert sorted(data.keys()) == ['acc', 'eda']
+    assert data.loaded() == []
+    assert isinstance(data['acc'], CsvTable)
+    assert data.loaded() == ['acc']
+    assert data['acc']['value.x'].tolist() == [0.0, 1.0, 2.0]
+
+def test_manifest_reopen(tmp_path, monkeypatch):
+    path = str(tmp_path)
+    make_project(path)
+    project = open_project_folder(path, manifest=True)
+    assert (tmp_path / MANIFEST_FILE).exists()
+    assert project.participants['ptc1'].data['acc']['value.x'].tolist() == \
+        [0.0, 1.0, 2.0]
+
+    # New files and participants are found; removed participants dropped
+    with open(str(tmp_path / 'ptc1' / 'acc' / '20180101_0300.csv'), 'w') as f:
+        f.write(HEADER + 'ptc1,1514775600,3\n')
+    make_project(path, participants=('ptc3',))
+    os.rename(str(tmp_path / 'ptc2'), str(tmp_path / 'old'))
+    project = open_project_folder(path, manifest=True)
+    assert sorted(project.participants.keys()) == ['old', 'ptc1', 'ptc3']
+    assert project.participants['ptc1'].data['acc']['value.x'].tolist() == \
+        [0.0, 1.0, 2.0, 3.0]
+    assert 'ptc2' not in project._manifest.dirs
+    assert os.path.join('ptc2', 'acc') not in project._manifest.dirs
+
+    # Opening an unchanged project checks only the top level folders
+    stat = os.stat
+    paths = []
+    def counting_stat(path, *args, **kwargs):
+        paths.append(path)
+        return stat(path, *args, **kwargs)
+    monkeypatch.setattr(os, 'stat', counting_stat)
+    project = open_project_folder(path, manifest=True)
+    assert sorted(os.path.relpath(p, path) for p in paths) == \
+        ['.', 'old', 'ptc1', 'ptc3']
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file
+
+def make_frames(n=5, rows=1000):
+    # date_range gives datetime64[us] under pandas >= 3
+    index = pd.date_range('2020-01-01', periods=n * rows, freq='31250us')
+    df = pd.DataFrame({'value.time': index,
+                       'value.x': np.arange(n * rows, dtype=np.float32),
+                       'key.userId': 'user'})
+    return df, [df[i * rows:(i + 1) * rows] for i in range(n)]
+
+def test_buffered_append_table(tmp_path):
+    df, frames = make_frames()
+    h5 = open_project_file(str(tmp_path / 'project.h5'), mode='w')
+    table = h5.create_radar_table('/ptc', 'acc', obj=frames[0],
+                                  chunkshape=(256,))
+    with table.appender(chunks_per_block=2) as app:
+        for frame in frames[1:]:
+            app.append(frame)
+            # Writes end on chunk boundaries until the appender is flushed
+            assert table.nrows == len(frames[0]) or table.nrows % 256 == 0
+    assert app.rows_written == len(df) - len(frames[0])
+    assert table.nrows == len(df)
+    out = table.read_columns()
+    assert (out['value.time'].values == df['value.time'].values).all()
+    assert out['value.x'].tolist() == df['value.x'].tolist()
+    h5.close()
+
+def test_buffered_append_group(tmp_path):
+    df, frames = make_frames()
+    h5 = open_project_file(str(tmp_path / 'project.h5'), mode='w')
+    group = h5.create_radar_data_group('/ptc', 'acc')
+    with group.appender(chunk_rows=256) as app:
+        for frame in frames:
+            app.append(frame)
+    out = group[:]
+    assert (out['value.time'].values == df['value.time'].values).all()
+    assert out['value.x'].tolist() == df['value.x'].tolist()
+    assert (out['key.userId'] == 'user').all()
+    h5.close()
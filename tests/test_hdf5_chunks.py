@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file, chunk_policy
+
+def test_chunk_policy():
+    # A minute of samples, within the chunk size limits
+    assert chunk_policy(32, 28, duration=3600) == (115200, (1920,))
+    assert chunk_policy(1, 28, duration=3600) == (3600, (586,))
+    assert chunk_policy(128, 28, duration=3600) == (460800, (4681,))
+    assert chunk_policy(128, 28, duration=3600,
+                        max_chunk_bytes=None)[1] == (7680,)
+
+def test_table_chunks_follow_frequency(tmp_path):
+    df = pd.DataFrame({'value.time': np.arange(100, dtype=np.float64),
+                       'value.x': np.zeros(100, dtype=np.float32)})
+    h5 = open_project_file(str(tmp_path / 'project.h5'), mode='w')
+    table = h5.create_radar_table('/ptc', 'acc', obj=df, frequency=32)
+    assert table.chunkshape == (1920,)
+    assert table.nrows == 100
+    h5.close()
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file
+
+def make_frame(rows=5000):
+    index = pd.date_range('2020-01-01', periods=rows, freq='1s', unit='ns')
+    return pd.DataFrame({'value.time': index,
+                         'value.x': np.arange(rows, dtype=np.float64)})
+
+def make_group(tmp_path, df):
+    h5 = open_project_file(str(tmp_path / 'project.h5'), mode='w')
+    group = h5.create_radar_data_group('/ptc', 'acc')
+    for col in df:
+        group.insert_array(df[col].values, col, chunkshape=(1000,))
+    return h5, group
+
+def test_time_divisions(tmp_path):
+    df = make_frame()
+    h5, group = make_group(tmp_path, df)
+    h5.flush()
+    ddf = group.to_dask()
+    assert ddf.npartitions == 5
+    assert list(ddf.divisions) == list(df['value.time'][::1000]) + \
+        [df['value.time'].iloc[-1]]
+    expected = df.set_index('value.time', drop=False)
+    out = ddf.compute()
+    assert out.index.equals(expected.index)
+    assert out['value.x'].equals(expected['value.x'])
+    # A time selection only reads the partitions it needs
+    sel = ddf.loc['2020-01-01 00:20':'2020-01-01 00:40']
+    assert sel.npartitions == 2
+    assert sel.compute()['value.x'].equals(
+        expected.loc['2020-01-01 00:20':'2020-01-01 00:40', 'value.x'])
+    assert group.to_dask(chunks_per_partition=2).npartitions == 3
+    h5.close()
+
+def test_unsorted_and_untimed(tmp_path):
+    df = make_frame()
+    df['value.time'] = df['value.time'].values[::-1]
+    h5, group = make_group(tmp_path, df)
+    h5.flush()
+    ddf = group.to_dask()
+    assert not ddf.known_divisions
+    assert ddf.compute()['value.x'].tolist() == df['value.x'].tolist()
+    # Without a time column partitions are divided by row number
+    ddf = group.to_dask(columns=['value.x'], time_column='value.other')
+    assert list(ddf.divisions) == [0, 1000, 2000, 3000, 4000, 4999]
+    assert ddf.compute()['value.x'].tolist() == df['value.x'].tolist()
+    h5.close()
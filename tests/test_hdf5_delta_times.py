@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import tables
+from radar.io.hdf5 import open_project_file
+
+def make_frame(rows=1000, start=0, seed=0):
+    rng = np.random.default_rng(seed)
+    t = start + np.arange(rows, dtype=np.int64) * 10**8
+    # Gaps, and jittered samples that are not on the regular sequence
+    t[rows // 3:] += 7 * 10**9
+    t[2 * rows // 3:] += 10**9 // 3
+    jittered = rng.choice(rows, rows // 20, replace=False)
+    t[jittered] += rng.integers(-10**7, 10**7, len(jittered))
+    return pd.DataFrame({'value.time': t.view('M8[ns]'),
+                         'value.timeReceived': t / 1e9,
+                         'value.x': rng.standard_normal(rows)})
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'project.h5')
+    df = make_frame()
+    more = make_frame(start=df['value.time'].values[-1].astype(np.int64)
+                      + 10**8, seed=1)
+    delta_times = {'value.time': 0.1, 'value.timeReceived': 0.1}
+    h5 = open_project_file(path, mode='w')
+    group = h5.create_radar_data_group('/ptc', 'acc')
+    group.insert_dataframe(df, delta_times=delta_times)
+    assert group[['value.time']]['value.time'].equals(df['value.time'])
+    group.append_dataframe(more)
+    expected = pd.concat([df, more], ignore_index=True)
+    # Appending invalidates the arrays cached by the first read
+    assert group[['value.time']]['value.time'].equals(expected['value.time'])
+    h5.close()
+
+    h5 = open_project_file(path, mode='r')
+    group = h5.create_radar_data_group('/ptc', 'acc')
+    # Stored as anchors and exceptions rather than a full array
+    assert isinstance(group._f_get_child('value.time'), tables.Group)
+    out = group[:]
+    for col in expected:
+        assert out[col].equals(expected[col])
+    window = group['value.timeReceived', 990:1010]
+    assert window['value.timeReceived'].equals(
+        expected['value.timeReceived'][990:1010].reset_index(drop=True))
+    # Stored as int64 nanoseconds
+    column = group._column('value.time')
+    stored = expected['value.time'].values.view(np.int64)
+    assert column[-1] == stored[-1]
+    rows = np.array([0, 333, 334, 1500, -1])
+    assert (column[rows] == stored[rows]).all()
+
+    times = expected['value.time']
+    sliced = group.time_slice(times[400], times[700])
+    assert sliced['value.time'].equals(times[400:701].reset_index(drop=True))
+    h5.close()
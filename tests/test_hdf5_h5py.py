@@ -0,0 +1,58 @@
+import h5py
+import numpy as np
+import pandas as pd
+import pytest
+from radar.io.hdf5_h5py import SourceWriter, append_hdf5, read_hdf5, \
+    trim_hdf5, CATEGORY_GROUP
+
+def make_frame(i, rows=10):
+    return pd.DataFrame({'key.userId': ['user'] * rows,
+                         'value.name': ['name{}'.format(i * 2 + j % 2)
+                                        for j in range(rows)],
+                         'value.x': np.arange(rows, dtype=float)})
+
+def test_categories_fall_back_to_strings(tmp_path):
+    with h5py.File(str(tmp_path / 'data.h5'), 'w') as f:
+        writer = SourceWriter(f.require_group('user/source'),
+                              max_categories=6)
+        frames = [make_frame(i) for i in range(5)]
+        for df in frames:
+            writer.append(df)
+        assert list(f['user/source'][CATEGORY_GROUP]) == ['key.userId']
+        out = read_hdf5(f, 'user', 'source')
+    expected = pd.concat(frames, ignore_index=True)
+    assert out['key.userId'].dtype == 'category'
+    assert list(out['value.name']) == list(expected['value.name'])
+
+def test_writers_trim_on_close(tmp_path):
+    with h5py.File(str(tmp_path / 'data.h5'), 'w') as f:
+        with SourceWriter(f.require_group('user/source')) as writer:
+            writer.append(make_frame(0))
+            assert f['user/source/value.x'].shape[0] > 10
+        assert f['user/source/value.x'].shape[0] == 10
+
+        frames = [make_frame(i) for i in range(3)]
+        for df in frames:
+            append_hdf5(df, f, 'user', source='other')
+        assert f['user/other/value.x'].shape[0] > 30
+        trim_hdf5(f)
+        assert f['user/other/value.x'].shape[0] == 30
+        out = read_hdf5(f, 'user', 'other')
+    expected = pd.concat(frames, ignore_index=True)
+    assert list(out['value.name']) == list(expected['value.name'])
+
+def test_read_sources_with_workers(tmp_path):
+    path = str(tmp_path / 'data.h5')
+    with h5py.File(path, 'w') as f:
+        for source in ('acc', 'bvp', 'eda'):
+            with SourceWriter(f.require_group('user/' + source)) as writer:
+                writer.append(make_frame(0, rows=100))
+        with pytest.raises(ValueError):
+            read_hdf5(f, 'user', workers=2)
+    serial = read_hdf5(path, 'user', columns=['value.x', 'value.name'],
+                       start=None, end=None)
+    concurrent = read_hdf5(path, 'user', columns=['value.x', 'value.name'],
+                           workers=2)
+    assert list(concurrent) == ['acc', 'bvp', 'eda']
+    for source, df in serial.items():
+        assert concurrent[source].equals(df)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import tables
+from radar.io.hdf5 import open_project_file, INDEX_NODE
+
+def make_frame(rows=10):
+    return pd.DataFrame({'value.time': np.arange(rows, dtype=np.int64),
+                         'value.x': np.random.randn(rows)})
+
+def create_typed_group(h5, where, name, radar_type):
+    group = h5.create_group(where, name, createparents=True)
+    group._v_attrs.RADAR_TYPE = radar_type
+    return group
+
+def test_participant_written_after_creation(tmp_path):
+    path = str(tmp_path / 'project.h5')
+    h5 = open_project_file(path, mode='w')
+    create_typed_group(h5, '/', 'ptc', 'PARTICIPANT')
+    h5.save_dataframe(make_frame(), '/ptc', 'acc')
+    assert 'ptc' in h5.data.participants
+    h5.build_pyramid('/ptc/acc', levels=('1s',), time_column='value.time')
+    # Groups without a RADAR_TYPE are left as they are
+    h5.save_dataframe(make_frame(), '/other', 'acc')
+    assert 'RADAR_TYPE' not in h5.root.other._v_attrs
+    h5.close()
+
+    h5 = open_project_file(path, mode='r')
+    assert INDEX_NODE in h5.root
+    assert list(h5.data.participants.keys()) == ['ptc']
+    assert 'acc' in h5.data.participants['ptc'].get_data_dict()
+    h5.close()
+
+def test_subproject_participants(tmp_path):
+    path = str(tmp_path / 'project.h5')
+    h5 = open_project_file(path, mode='w')
+    create_typed_group(h5, '/', 'SP', 'SUBPROJECT')
+    create_typed_group(h5, '/SP', 'ptc1', 'PARTICIPANT')
+    h5.save_dataframe(make_frame(), '/SP/ptc1', 'acc')
+    create_typed_group(h5, '/SP', 'ptc2', 'PARTICIPANT')
+    h5.create_radar_data_group('/SP/ptc2', 'acc', obj=make_frame())
+    assert sorted(h5.data.subprojects['SP'].participants.keys()) == \
+        ['ptc1', 'ptc2']
+    h5.close()
+
+    h5 = open_project_file(path, mode='r')
+    assert list(h5.data.subprojects.keys()) == ['SP']
+    assert sorted(h5.data.subprojects['SP'].participants.keys()) == \
+        ['ptc1', 'ptc2']
+    h5.close()
+
+def test_groups_added_outside_project_file(tmp_path):
+    path = str(tmp_path / 'project.h5')
+    h5 = open_project_file(path, mode='w')
+    create_typed_group(h5, '/', 'ptc1', 'PARTICIPANT')
+    h5.save_dataframe(make_frame(), '/ptc1', 'acc')
+    h5.close()
+
+    with tables.open_file(path, mode='a') as h5:
+        create_typed_group(h5, '/', 'ptc2', 'PARTICIPANT')
+
+    h5 = open_project_file(path, mode='r')
+    assert sorted(h5.data.participants.keys()) == ['ptc1', 'ptc2']
+    h5.close()
+
+def test_large_project_opens_for_writing(tmp_path):
+    # Too large an index for an HDF5 attribute
+    path = str(tmp_path / 'project.h5')
+    with tables.open_file(path, mode='w') as h5:
+        for i in range(3000):
+            create_typed_group(h5, '/', 'participant{:05d}'.format(i),
+                               'PARTICIPANT')
+    h5 = open_project_file(path, mode='a')
+    assert len(h5.data.participants) == 3000
+    h5.save_dataframe(make_frame(), '/participant00000', 'acc')
+    h5.close()
+
+    h5 = open_project_file(path, mode='r')
+    assert len(h5.data.participants) == 3000
+    h5.close()
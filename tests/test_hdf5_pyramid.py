@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file, build_pyramid, read_summary, \
+    PYRAMID_ROOT
+
+def make_frame(rows=6000, unit='us'):
+    index = pd.date_range('2020-01-01', periods=rows, freq='100ms',
+                          unit=unit)
+    return pd.DataFrame({'value.time': index,
+                         'value.x': np.arange(rows, dtype=np.float32)})
+
+def test_build_pyramid(tmp_path):
+    df = make_frame()
+    h5 = open_project_file(str(tmp_path / 'project.h5'), mode='w')
+    table = h5.create_radar_table('/ptc', 'acc', obj=df)
+    # Blocks end part way through a bin
+    levels = build_pyramid(table, levels=['10s', '1s'], block_rows=333)
+    assert [l._v_pathname for l in levels] == [
+        PYRAMID_ROOT + '/ptc/acc/level_1s', PYRAMID_ROOT + '/ptc/acc/level_10s']
+
+    bins = df.set_index('value.time')['value.x'].resample('1s')
+    out = levels[0].read_columns()
+    assert out['time'].tolist() == bins.min().index.tolist()
+    assert (out['count'] == 10).all()
+    assert out['value.x.min'].tolist() == bins.min().tolist()
+    assert out['value.x.max'].tolist() == bins.max().tolist()
+    assert np.allclose(out['value.x.mean'], bins.mean())
+    out = levels[1].read_columns()
+    assert len(out) == 60 and (out['count'] == 100).all()
+    assert out['value.x.max'].tolist() == list(range(99, 6000, 100))
+    h5.close()
+
+def test_read_summary(tmp_path):
+    df = make_frame(unit='ns')
+    h5 = open_project_file(str(tmp_path / 'project.h5'), mode='w')
+    table = h5.create_radar_table('/ptc', 'acc', obj=df)
+    build_pyramid(table, levels=['1s', '10s'])
+    # The coarsest level with enough bins over the window
+    out = read_summary(table, min_points=50)
+    assert len(out) == 60
+    assert list(out) == ['count', 'value.x.min', 'value.x.max',
+                         'value.x.mean']
+    out = read_summary(table, end=df['value.time'][999], min_points=50,
+                       columns='value.x')
+    assert len(out) == 100 and out['value.x.max'].iloc[-1] == 999
+    # Falls back to the raw data
+    out = read_summary(table, end=df['value.time'][999], min_points=500)
+    assert out['value.x'].tolist() == df['value.x'][:1000].tolist()
+    h5.close()
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+from radar.io.hdf5 import open_project_file
+
+def make_frame(rows=10):
+    return pd.DataFrame({'value.time': np.arange(rows, dtype=np.int64),
+                         'value.x': np.random.randn(rows)})
+
+def test_swmr_requires_locking_disabled(tmp_path, monkeypatch):
+    monkeypatch.delenv('HDF5_USE_FILE_LOCKING', raising=False)
+    with pytest.raises(RuntimeError):
+        open_project_file(str(tmp_path / 'project.h5'), mode='w', swmr=True)
+
+def test_swmr_writes_require_writing(tmp_path, monkeypatch):
+    monkeypatch.setenv('HDF5_USE_FILE_LOCKING', 'FALSE')
+    h5 = open_project_file(str(tmp_path / 'project.h5'), mode='w', swmr=True)
+    with pytest.raises(RuntimeError):
+        h5.save_dataframe(make_frame(), '/ptc', 'acc')
+    with h5.writing():
+        table = h5.save_dataframe(make_frame(), '/ptc', 'acc')
+        group = h5.create_radar_data_group('/ptc', 'eda', obj=make_frame())
+    with pytest.raises(RuntimeError):
+        table.append_dataframe(make_frame())
+    with pytest.raises(RuntimeError):
+        group.append_dataframe(make_frame())
+    with pytest.raises(RuntimeError):
+        h5.flush()
+    with h5.writing():
+        table.append_dataframe(make_frame())
+    assert table.nrows == 20
+    h5.close()
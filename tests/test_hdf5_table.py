@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from radar.io.hdf5 import open_project_file
+
+def make_frame(rows=20000):
+    index = pd.date_range('2020-01-01', periods=rows, freq='1s')
+    return pd.DataFrame({'value.time': index,
+                         'value.timeReceived': (index - pd.Timestamp(0))
+                                               .total_seconds() + 0.5,
+                         'value.x': np.arange(rows, dtype=np.float32),
+                         'value.name': ['name{}'.format(i % 3)
+                                        for i in range(rows)]})
+
+def make_table(tmp_path, df, **kwargs):
+    h5 = open_project_file(str(tmp_path / 'project.h5'), mode='w')
+    return h5, h5.create_radar_table('/ptc', 'acc', obj=df,
+                                     chunkshape=(256,), **kwargs)
+
+def test_read_columns(tmp_path):
+    df = make_frame()
+    h5, table = make_table(tmp_path, df)
+    # Reads span several blocks of nrowsinbuf rows
+    table.nrowsinbuf = 1000
+    out = table.read_columns()
+    assert list(out) == list(df)
+    assert out['value.time'].dtype == 'datetime64[ns]'
+    assert (out['value.time'].values == df['value.time'].values).all()
+    assert out['value.name'].tolist() == df['value.name'].tolist()
+
+    out = table.read_columns('value.x', start=100, stop=15000, step=7)
+    assert list(out) == ['value.x']
+    assert out['value.x'].tolist() == df['value.x'][100:15000:7].tolist()
+    out = table.read_columns(['value.name', 'value.x'], start=-1, step=-3)
+    assert out['value.x'].tolist() == df['value.x'][::-3].tolist()
+    assert out['value.name'].tolist() == df['value.name'][::-3].tolist()
+    h5.close()
+
+def test_time_slice(tmp_path):
+    df = make_frame()
+    h5, table = make_table(tmp_path, df)
+    indexed = h5.create_radar_table('/ptc', 'indexed', obj=df,
+                                    index_columns='value.time')
+    assert indexed.colindexed['value.time']
+    start, end = df['value.time'][1000], df['value.time'][1100]
+    for t in (table, indexed):
+        # Bounds are inclusive, and may be given as strings
+        assert t._time_rows(start, end) == (1000, 1101)
+        assert t._time_rows(str(start), None) == (1000, len(df))
+        assert t._time_rows(None, pd.Timestamp('2019-01-01')) == (0, 0)
+        out = t.time_slice(start, end, columns='value.x')
+        assert out['value.x'].tolist() == df['value.x'][1000:1101].tolist()
+
+    # Epoch seconds columns are searched with datetimes
+    assert table._time_rows(start + pd.Timedelta('200ms'), end,
+                            time_column='value.timeReceived') == (1000, 1100)
+    out = table.read_columns(time_range=(start, end))
+    assert len(out) == 101
+    h5.close()
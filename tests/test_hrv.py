@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from scipy import signal
+from radar.feature import hrv_features, HRV_FEATURES
+from radar.feature.hrv import LF_BAND, HF_BAND, FREQ_STEP
+
+def make_beats(duration=1800, seed=0):
+    rng = np.random.default_rng(seed)
+    ibi = [0.8]
+    while sum(ibi) < duration:
+        t = sum(ibi)
+        ibi.append(0.8 + 0.05 * np.sin(2 * np.pi * 0.1 * t)
+                   + 0.03 * np.sin(2 * np.pi * 0.25 * t)
+                   + 0.02 * rng.standard_normal())
+    ibi = np.array(ibi)
+    times = pd.Timestamp('2020-01-01 00:02:30').value + \
+        np.round(np.cumsum(ibi) * 1e9).astype('int64')
+    df = pd.DataFrame({'value.time': times / 1e9,
+                       'value.interBeatInterval': ibi})
+    # A missed beat, a gap of several minutes, an artefact and a NaN
+    df = df.drop(index=[100] + list(range(800, 1300)))
+    df.loc[500, 'value.interBeatInterval'] = 3.
+    df.loc[600, 'value.interBeatInterval'] = np.nan
+    return df.reset_index(drop=True)
+
+def naive_features(df, start, window):
+    t = df['value.time'].values
+    ibi = df['value.interBeatInterval'].values
+    keep = (ibi >= 0.3) & (ibi <= 2) & ~np.isnan(ibi)
+    t, ibi = t[keep], ibi[keep]
+    sel = (t >= start) & (t < start + window)
+    t, ibi = t[sel], ibi[sel]
+    diff = np.diff(ibi)[np.abs(np.diff(t) - ibi[1:]) <= 0.25]
+    freqs = np.arange(LF_BAND[0], HF_BAND[1] + FREQ_STEP / 2, FREQ_STEP)
+    power = signal.lombscargle(t - t[0], ibi - ibi.mean(), 2 * np.pi * freqs)
+    lf = power[(freqs >= LF_BAND[0]) & (freqs < LF_BAND[1])].sum()
+    hf = power[(freqs >= HF_BAND[0]) & (freqs < HF_BAND[1])].sum()
+    return [len(ibi), ibi.mean(), ibi.std(ddof=1),
+            np.sqrt(np.mean(diff**2)), np.mean(np.abs(diff) > 0.05),
+            lf * FREQ_STEP, hf * FREQ_STEP, lf / hf]
+
+def test_hrv_features():
+    df = make_beats()
+    out = hrv_features(df, window=300, step=60)
+    assert list(out) == list(HRV_FEATURES)
+    assert out.index[0] == pd.Timestamp('2020-01-01 00:02:00')
+    assert (np.diff(out.index.values) == np.timedelta64(60, 's')).all()
+    starts = (out.index - pd.Timestamp(0)).total_seconds()
+    for start, (_, row) in zip(starts, out.iterrows()):
+        n = ((df['value.time'] >= start)
+             & (df['value.time'] < start + 300)).sum()
+        if row['n_beats'] < 30:
+            assert row.drop('n_beats').isna().all()
+            continue
+        assert np.allclose(row.values, naive_features(df, start, 300),
+                           rtol=1e-6)
+        assert row['n_beats'] <= n
+    # The gap leaves windows with too few beats
+    assert out['mean_nn'].isna().any()
+    assert out['lf'].notna().sum() > 10
+
+def test_hrv_time_index():
+    df = make_beats()
+    expected = hrv_features(df, frequency=False)
+    assert list(expected) == list(HRV_FEATURES[:5])
+    df = df.set_index(pd.to_datetime(df.pop('value.time'), unit='s'))
+    out = hrv_features(df.iloc[::-1], frequency=False)
+    assert np.allclose(out, expected, equal_nan=True)
+    empty = hrv_features(df.iloc[:0])
+    assert empty.empty and list(empty) == list(HRV_FEATURES)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+import tables
+from radar.io.imec import Imec, TimeIndex
+
+START = pd.Timestamp('2020-01-01 12:00:00')
+FREQS = {'ACC-X': 32, 'ACC-Y': 32, 'ACC-Z': 32, 'Battery': 1, 'ECG': 256,
+         'EMG': 256, 'GSR-1': 16, 'GSR-2': 16, 'PIE': 16, 'Temp': 1}
+
+def make_imec(path, duration=60):
+    with tables.File(path, 'w') as h5:
+        radar = h5.create_group('/Devices', 'Radar', createparents=True)
+        setattr(radar._v_attrs, '#DateTime', str(START).encode())
+        for i, (name, freq) in enumerate(FREQS.items()):
+            group = h5.create_group(radar, 'Signal', createparents=True) \
+                    if i == 0 else radar.Signal
+            channel = h5.create_group(group, name)
+            setattr(channel._v_attrs, '#Freq', str(freq))
+            data = np.arange(duration * freq, dtype=np.int16) + i * 1000
+            h5.create_carray(channel, 'Data', obj=data, chunkshape=(64,))
+    return Imec(path)
+
+def test_time_index():
+    index = TimeIndex(START, 3, 10)
+    expected = (START + pd.to_timedelta(np.round(np.arange(10) * 1e9 / 3),
+                                        'ns')).as_unit('ns').values
+    assert len(index) == 10
+    assert (index[:] == expected).all()
+    assert index[4] == expected[4] and index[-1] == expected[-1]
+    assert (index[2:8:3] == expected[2:8:3]).all()
+    assert (index[[1, 5]] == expected[[1, 5]]).all()
+    with pytest.raises(IndexError):
+        index[10]
+    assert index.to_idx(expected[7]) == 7
+    assert list(index.to_idx(expected[3:6])) == [3, 4, 5]
+    assert index.slice(expected[2], expected[5]) == slice(2, 5)
+    assert index.slice(START - pd.Timedelta(1, 'h')) == slice(0, 10)
+    assert index.slice(stop_time=START + pd.Timedelta(1, 'h')) == \
+        slice(0, 10)
+
+def test_imec_time_index(tmp_path):
+    imec = make_imec(str(tmp_path / 'imec.h5'))
+    assert len(imec.time_index('ECG')) == 60 * 256
+    df = imec.get_df_time('Accelerometer', START + pd.Timedelta(10, 's'),
+                          START + pd.Timedelta(11, 's'))
+    assert list(df) == ['ACC-X', 'ACC-Y', 'ACC-Z']
+    assert len(df) == 32 and df.index[0] == START + pd.Timedelta(10, 's')
+    assert df['ACC-X'].tolist() == list(range(320, 352))
+    imec.close()
+
+def test_iter_windows(tmp_path):
+    imec = make_imec(str(tmp_path / 'imec.h5'))
+    acc = imec.get_df('Accelerometer', slice(None))
+    # Overlapping windows across several read-ahead blocks
+    windows = [(t, v.copy()) for t, v in imec.iter_windows(
+        'Accelerometer', '2s', step=20, readahead=2)]
+    assert len(windows) == (60 * 32 - 64) // 20 + 1
+    for i, (start, values) in enumerate(windows):
+        rows = acc.iloc[i * 20:i * 20 + 64]
+        assert start == rows['time'].iloc[0]
+        assert (values == rows[['ACC-X', 'ACC-Y', 'ACC-Z']].values).all()
+
+    windows = list(imec.iter_windows('ECG', 256,
+                                     start_time=START + pd.Timedelta(1, 's'),
+                                     stop_time=START + pd.Timedelta(4, 's')))
+    assert [t for t, _ in windows] == [START + pd.Timedelta(s, 's')
+                                       for s in (1, 2, 3)]
+    assert windows[-1][1].shape == (256, 1)
+    assert windows[-1][1][-1, 0] == 4 * 256 - 1 + 4000
+    with pytest.raises(ValueError):
+        next(imec.iter_windows('ECG', 0))
+    imec.close()
+
+def test_get_aligned(tmp_path):
+    imec = make_imec(str(tmp_path / 'imec.h5'))
+    start = START + pd.Timedelta(20, 's')
+    df = imec.get_aligned(['ECG', 'GSR'], start, start + pd.Timedelta(10, 's'),
+                          32)
+    assert list(df) == ['ECG', 'GSR-1', 'GSR-2']
+    assert len(df) == 320 and df.index[0] == start
+    assert df.index[1] - df.index[0] == pd.Timedelta('31.25ms')
+    # The ramps are preserved by decimating and upsampling
+    seconds = (df.index - START).total_seconds().values
+    assert np.allclose(df['ECG'], seconds * 256 + 4000, rtol=1e-3)
+    assert np.allclose(df['GSR-1'], seconds * 16 + 6000, rtol=1e-3)
+
+    # Times outside of the recording are NaN
+    times, values = imec.get_aligned('Temp', START + pd.Timedelta(55, 's'),
+                                     START + pd.Timedelta(65, 's'), 2,
+                                     as_frame=False)
+    assert times.dtype == 'M8[ns]' and values.shape == (20, 1)
+    assert not np.isnan(values[:9]).any() and np.isnan(values[9:]).all()
+    imec.close()